@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -8,6 +9,59 @@ load_dotenv()
 
 SECRET_KEY = os.environ.get('SECRET_KEY', 'unsafe-secret-key-for-dev')
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 20))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 5))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", 0.5))
+LLM_RETRY_BACKOFF_MAX = float(os.getenv("LLM_RETRY_BACKOFF_MAX", 8))
+LLM_BATCH_MAX_ITEMS = int(os.getenv("LLM_BATCH_MAX_ITEMS", 100))
+LLM_BATCH_PROMPT_TOKENS = int(os.getenv("LLM_BATCH_PROMPT_TOKENS", 4000))
+LLM_BATCH_ITEMS_PER_PROMPT = int(os.getenv("LLM_BATCH_ITEMS_PER_PROMPT", 20))
+# Circuit breaker: stop calling the LLM once this share of the last
+# LLM_BREAKER_WINDOW calls failed, and probe again after the cooldown
+LLM_BREAKER_WINDOW = int(os.getenv("LLM_BREAKER_WINDOW", 20))
+LLM_BREAKER_MIN_CALLS = int(os.getenv("LLM_BREAKER_MIN_CALLS", 10))
+LLM_BREAKER_ERROR_RATE = float(os.getenv("LLM_BREAKER_ERROR_RATE", 0.5))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", 30))
+
+# Local TF-IDF model trained by `manage.py train_local_classifier`.
+# "fallback": answer when the LLM fails or the breaker is open; "tiered": also
+# skip the LLM when at least LOCAL_CLASSIFIER_MIN_CONFIDENCE sure; "off"
+CLASSIFY_LOCAL_MODE = os.getenv("CLASSIFY_LOCAL_MODE", "fallback")
+LOCAL_CLASSIFIER_PATH = os.getenv("LOCAL_CLASSIFIER_PATH", str(BASE_DIR / "var" / "local_classifier.npz"))
+LOCAL_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("LOCAL_CLASSIFIER_MIN_CONFIDENCE", 0.8))
+
+# Near-duplicate detection: a MinHash/LSH index over ticket title and
+# description, built by `manage.py build_similarity_index` and kept current as
+# tickets are saved and from the change log before each lookup. Matches need SIMILARITY_THRESHOLD Jaccard overlap; classify
+# reuses the labels of a ticket at least SIMILARITY_CLASSIFY_THRESHOLD similar
+# instead of calling the LLM (0 turns that off).
+SIMILARITY_ENABLED = os.getenv("SIMILARITY_ENABLED", "True") == "True"
+SIMILARITY_INDEX_PATH = os.getenv("SIMILARITY_INDEX_PATH", str(BASE_DIR / "var" / "similarity_index.npz"))
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", 0.5))
+SIMILARITY_MAX_CANDIDATES = int(os.getenv("SIMILARITY_MAX_CANDIDATES", 50))
+SIMILARITY_CLASSIFY_THRESHOLD = float(os.getenv("SIMILARITY_CLASSIFY_THRESHOLD", 0.9))
+
+# "sync": the client classifies before creating; "queue": create returns at
+# once and a classify_worker fills in category/priority
+CLASSIFY_ON_CREATE = os.getenv("CLASSIFY_ON_CREATE", "sync")
+CLASSIFY_WORKERS = int(os.getenv("CLASSIFY_WORKERS", 4))
+CLASSIFY_QUEUE_MAX_ATTEMPTS = int(os.getenv("CLASSIFY_QUEUE_MAX_ATTEMPTS", 5))
+CLASSIFY_QUEUE_RETRY_DELAY = float(os.getenv("CLASSIFY_QUEUE_RETRY_DELAY", 30))
+CLASSIFY_QUEUE_VISIBILITY_TIMEOUT = int(os.getenv("CLASSIFY_QUEUE_VISIBILITY_TIMEOUT", 300))
+
+# "memory" (per-process LRU), "django" (CACHES alias) or "none"
+CLASSIFY_CACHE_BACKEND = os.getenv("CLASSIFY_CACHE_BACKEND", "memory")
+CLASSIFY_CACHE_ALIAS = os.getenv("CLASSIFY_CACHE_ALIAS", "default")
+CLASSIFY_CACHE_TTL = int(os.getenv("CLASSIFY_CACHE_TTL", 24 * 60 * 60))
+CLASSIFY_CACHE_MAX_ENTRIES = int(os.getenv("CLASSIFY_CACHE_MAX_ENTRIES", 10000))
+# Any of "whitespace", "case", "signature"
+CLASSIFY_CACHE_NORMALIZE = [
+    step for step in os.getenv("CLASSIFY_CACHE_NORMALIZE", "whitespace,case,signature").split(",") if step
+]
 
 DEBUG = os.environ.get('DEBUG', 'True') == 'True'
 ALLOWED_HOSTS = ['*']
@@ -20,9 +74,46 @@ DATABASES = {
         'PASSWORD': os.getenv("POSTGRES_PASSWORD"),
         'HOST': os.getenv("POSTGRES_HOST", 'db'),
         'PORT': 5432,
+        # Keep connections open between requests; health checks replace one
+        # that went away before it is reused
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Pool connections instead (Django's native pool, needs psycopg 3 with the
+# pool extra). Persistent connections are switched off while it is on.
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 0))
+if DB_POOL_MAX_SIZE:
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv("DB_POOL_MIN_SIZE", 2)),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': float(os.getenv("DB_POOL_TIMEOUT", 10)),
+        }
+    }
+
+# Read replicas as comma-separated host[:port]; each becomes a replica_N alias
+# with the primary's credentials. Ticket list/detail/stats/trends/export read
+# from them, a client that just wrote stays on the primary for
+# DB_REPLICA_STICKY_SECONDS, and a replica that fails to connect is skipped
+# for DB_REPLICA_RETRY_SECONDS.
+for number, address in enumerate(
+    [address for address in os.getenv("DB_REPLICA_HOSTS", "").split(",") if address], start=1
+):
+    host, _, port = address.partition(":")
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': int(port or 5432),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['tickets.db_router.PrimaryReplicaRouter']
+DB_REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", 30))
+
 
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -31,6 +122,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'corsheaders',
 
     'rest_framework',
@@ -39,7 +131,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "tickets.metrics.MetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "tickets.admission.AdmissionControlMiddleware",
     "django.middleware.common.CommonMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -69,15 +163,137 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
-        'rest_framework.filters.SearchFilter',
+        'tickets.filters.TicketSearchFilter',
         'rest_framework.filters.OrderingFilter',
-    ]
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'tickets.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'tickets.pagination.TicketCursorPagination',
+    'PAGE_SIZE': int(os.getenv('PAGE_SIZE', 50)),
+}
+
+# Each process keeps its own LocMem cache unless REDIS_URL points the default
+# alias at a Redis server all processes share
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+if os.getenv('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+
+# Cached stats live in this alias, keyed by the ticket version the database
+# keeps, so sharing it only saves processes recomputing the same figures
+STATS_CACHE_ALIAS = os.getenv('STATS_CACHE_ALIAS', 'default')
+STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', 30))
+
+# Serve ticket list/retrieve from values() rows instead of TicketSerializer
+TICKET_FAST_READ = os.getenv('TICKET_FAST_READ', 'True') == 'True'
+
+# Per-view request, SQL, serializer and LLM histograms served at /api/metrics/.
+# METRICS_SLOW_REQUEST_MS > 0 logs slower requests with their slowest SQL.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_SLOW_REQUEST_MS = int(os.getenv('METRICS_SLOW_REQUEST_MS', 0))
+
+# Answer ticket list/detail/stats with ETag and Last-Modified, and 304 when
+# the client's copy is still current
+TICKET_CONDITIONAL_REQUESTS = os.getenv('TICKET_CONDITIONAL_REQUESTS', 'True') == 'True'
+
+# Cache ticket list/detail response bodies keyed by the normalized query and the
+# ticket version every committed write bumps in the database: "memory"
+# (per-process LRU), "django" (TICKET_RESPONSE_CACHE_ALIAS, shared between
+# processes) or "none". Concurrent misses on one key wait up to
+# TICKET_RESPONSE_CACHE_WAIT seconds for the first.
+TICKET_RESPONSE_CACHE_BACKEND = os.getenv('TICKET_RESPONSE_CACHE_BACKEND', 'memory')
+TICKET_RESPONSE_CACHE_ALIAS = os.getenv('TICKET_RESPONSE_CACHE_ALIAS', 'default')
+TICKET_RESPONSE_CACHE_TTL = int(os.getenv('TICKET_RESPONSE_CACHE_TTL', 30))
+TICKET_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('TICKET_RESPONSE_CACHE_MAX_ENTRIES', 1000))
+TICKET_RESPONSE_CACHE_WAIT = float(os.getenv('TICKET_RESPONSE_CACHE_WAIT', 5))
+
+# Server-Sent Events at /api/tickets/events/: how long a burst is collected
+# before one frame goes out, the most ticket events per frame before they are
+# collapsed into a bulk notice, frames buffered per slow client before it is
+# told to resync, and the keepalive interval in seconds
+TICKET_EVENTS_BROKER = os.getenv('TICKET_EVENTS_BROKER', 'local')
+TICKET_EVENTS_BATCH_WINDOW = float(os.getenv('TICKET_EVENTS_BATCH_WINDOW', 0.25))
+TICKET_EVENTS_MAX_BATCH = int(os.getenv('TICKET_EVENTS_MAX_BATCH', 200))
+TICKET_EVENTS_CLIENT_BUFFER = int(os.getenv('TICKET_EVENTS_CLIENT_BUFFER', 100))
+TICKET_EVENTS_HEARTBEAT = float(os.getenv('TICKET_EVENTS_HEARTBEAT', 15))
+
+# Bulk ticket import: rows per INSERT, and the most a single request may carry
+TICKET_BULK_BATCH_SIZE = int(os.getenv('TICKET_BULK_BATCH_SIZE', 1000))
+TICKET_BULK_MAX_ITEMS = int(os.getenv('TICKET_BULK_MAX_ITEMS', 100000))
+
+# Streaming export: rows fetched per server-side cursor round trip, and
+# whether to gzip for clients sending Accept-Encoding: gzip
+TICKET_EXPORT_CHUNK_SIZE = int(os.getenv('TICKET_EXPORT_CHUNK_SIZE', 2000))
+TICKET_EXPORT_GZIP = os.getenv('TICKET_EXPORT_GZIP', 'True') == 'True'
+
+# Agent work dispatch (POST /api/tickets/claim/): the lease an agent gets by
+# default, the longest one it may ask for (seconds), the most tickets a single
+# claim hands out, and how often a process returns expired leases to the pool
+TICKET_CLAIM_LEASE_SECONDS = int(os.getenv('TICKET_CLAIM_LEASE_SECONDS', 900))
+TICKET_CLAIM_MAX_LEASE_SECONDS = int(os.getenv('TICKET_CLAIM_MAX_LEASE_SECONDS', 14400))
+TICKET_CLAIM_MAX_BATCH = int(os.getenv('TICKET_CLAIM_MAX_BATCH', 50))
+TICKET_CLAIM_SWEEP_SECONDS = float(os.getenv('TICKET_CLAIM_SWEEP_SECONDS', 5))
+
+# Admission control: at most ADMISSION_MAX_CONCURRENCY limited or priority
+# requests run at once per process, ADMISSION_PRIORITY_RESERVED of those slots
+# kept for ADMISSION_PRIORITY_ACTIONS (ticket writes), which also go first in
+# the queue. ADMISSION_LIMITS caps single actions ("TicketViewSet.<action>" or
+# a URL name): concurrent requests, requests queued behind them, seconds one
+# may wait, and a per-client token bucket of "rate" requests per second up to
+# "burst". ADMISSION_LIMITS_JSON overrides or adds entries. Clients are told
+# to retry after ADMISSION_RETRY_AFTER seconds when shed, and are keyed on
+# ADMISSION_CLIENT_HEADER (e.g. X-Forwarded-For) or else the peer address.
+ADMISSION_CONTROL = os.getenv('ADMISSION_CONTROL', 'True') == 'True'
+ADMISSION_MAX_CONCURRENCY = int(os.getenv('ADMISSION_MAX_CONCURRENCY', 32))
+ADMISSION_PRIORITY_RESERVED = int(os.getenv('ADMISSION_PRIORITY_RESERVED', 4))
+ADMISSION_PRIORITY_ACTIONS = [
+    "TicketViewSet.create",
+    "TicketViewSet.update",
+    "TicketViewSet.partial_update",
+    "TicketViewSet.destroy",
+    "TicketViewSet.claim",
+    "TicketViewSet.lease",
+]
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 5))
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', 2))
+ADMISSION_CLIENT_HEADER = os.getenv('ADMISSION_CLIENT_HEADER', '')
+ADMISSION_LIMITS = {
+    "ticket-classify": {"concurrency": 8, "queue": 16, "timeout": 10, "rate": 5, "burst": 50},
+    "ticket-classify-batch": {"concurrency": 2, "queue": 4, "timeout": 10, "rate": 1, "burst": 10},
+    "TicketViewSet.stats": {"concurrency": 4, "queue": 16, "timeout": 5, "rate": 20, "burst": 100},
+    "TicketViewSet.trends": {"concurrency": 4, "queue": 16, "timeout": 5, "rate": 20, "burst": 100},
+    "TicketViewSet.list": {"concurrency": 16, "queue": 32, "timeout": 5, "rate": 50, "burst": 500},
+    "TicketViewSet.export": {"concurrency": 2, "queue": 2, "timeout": 5, "rate": 1, "burst": 10},
+    **json.loads(os.getenv('ADMISSION_LIMITS_JSON', '{}')),
 }
 
+# Delta sync (GET /api/tickets/changes/?since=<token>): change log entries
+# read per page, and how many days `compact_ticket_changes` keeps them;
+# clients whose token is older have to reload everything
+TICKET_CHANGES_PAGE_SIZE = int(os.getenv('TICKET_CHANGES_PAGE_SIZE', 500))
+TICKET_CHANGES_RETENTION_DAYS = int(os.getenv('TICKET_CHANGES_RETENTION_DAYS', 7))
+
+# Ticket partitions maintained by `manage.py partition_tickets`: monthly
+# partitions created this many months ahead, and closed/resolved tickets older
+# than TICKET_ARCHIVE_AFTER_DAYS moved to the archive partition (0 keeps them)
+TICKET_PARTITION_MONTHS_AHEAD = int(os.getenv('TICKET_PARTITION_MONTHS_AHEAD', 3))
+TICKET_ARCHIVE_AFTER_DAYS = int(os.getenv('TICKET_ARCHIVE_AFTER_DAYS', 365))
+
+# "fulltext" uses the tsvector column; "icontains" restores DRF's SearchFilter
+TICKET_SEARCH_BACKEND = os.getenv('TICKET_SEARCH_BACKEND', 'fulltext')
+TICKET_SEARCH_TRIGRAM_FALLBACK = os.getenv('TICKET_SEARCH_TRIGRAM_FALLBACK', 'True') == 'True'
+
 STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -85,4 +301,6 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
-]
\ No newline at end of file
+]
+# The frontend sends cookies, so the replica sticky cookie makes the round trip
+CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
@@ -25,8 +25,33 @@ if __name__ == "__main__":
     test_modules = [
         'tickets.tests.TicketModelTest',
         'tickets.tests.TicketAPITest', 
+        'tickets.tests.TicketPaginationTest',
+        'tickets.tests.TicketSearchTest',
+        'tickets.tests.TicketQueryPlanTest',
         'tickets.tests.TicketStatsTest',
-        'tickets.tests.TicketClassificationTest'
+        'tickets.tests.TicketRollupTest',
+        'tickets.tests.TicketClassificationTest',
+        'tickets.tests.TicketAsyncClassifierTest',
+        'tickets.tests.TicketClassificationCacheTest',
+        'tickets.tests.TicketBatchClassificationTest',
+        'tickets.tests.TicketClassificationQueueTest',
+        'tickets.tests.TicketClassificationWorkerTest',
+        'tickets.tests.TicketLocalClassifierTest',
+        'tickets.tests.TicketBulkTest',
+        'tickets.tests.TicketExportTest',
+        'tickets.tests.TicketFastReadTest',
+        'tickets.tests.TicketConditionalRequestTest',
+        'tickets.tests.TicketEventStreamTest',
+        'tickets.tests.TicketBenchmarkTest',
+        'tickets.tests.TicketMetricsTest',
+        'tickets.tests.TicketResponseCacheTest',
+        'tickets.tests.TicketClaimTest',
+        'tickets.tests.TicketClaimConcurrencyTest',
+        'tickets.tests.TicketPartitionTest',
+        'tickets.tests.TicketSimilarityTest',
+        'tickets.tests.TicketReplicaRoutingTest',
+        'tickets.tests.TicketAdmissionControlTest',
+        'tickets.tests.TicketChangesTest',
     ]
     
     for module in test_modules:
@@ -43,8 +68,33 @@ if __name__ == "__main__":
     print("🎯 Test Summary:")
     print("• TicketModelTest: Tests model creation and string representation")
     print("• TicketAPITest: Tests CRUD operations, filtering, and search")
+    print("• TicketPaginationTest: Tests cursor pagination of the ticket list")
+    print("• TicketSearchTest: Tests full-text and trigram ticket search")
+    print("• TicketQueryPlanTest: Tests list queries avoid sequential scans")
     print("• TicketStatsTest: Tests statistics endpoint calculations")
+    print("• TicketRollupTest: Tests daily rollup maintenance and trends")
     print("• TicketClassificationTest: Tests AI-powered ticket classification")
+    print("• TicketAsyncClassifierTest: Tests pooled, concurrent classification against a stub LLM")
+    print("• TicketClassificationCacheTest: Tests the content-addressed classification cache")
+    print("• TicketBatchClassificationTest: Tests batch classification and bulk reclassification")
+    print("• TicketClassificationQueueTest: Tests queued classification and worker write-back")
+    print("• TicketClassificationWorkerTest: Tests concurrent classify_worker processes")
+    print("• TicketLocalClassifierTest: Tests the local fallback classifier and circuit breaker")
+    print("• TicketBulkTest: Tests bulk ticket create, update and delete")
+    print("• TicketExportTest: Tests streaming NDJSON/CSV export")
+    print("• TicketFastReadTest: Tests the fast list/retrieve path and sparse fieldsets")
+    print("• TicketConditionalRequestTest: Tests ETag/Last-Modified and 304 responses")
+    print("• TicketEventStreamTest: Tests the batched Server-Sent Events stream")
+    print("• TicketBenchmarkTest: Tests the bench_api harness and regression gate")
+    print("• TicketMetricsTest: Tests request/SQL/LLM metrics and the Prometheus endpoint")
+    print("• TicketResponseCacheTest: Tests the versioned list/detail response cache")
+    print("• TicketClaimTest: Tests agents claiming open tickets under leases")
+    print("• TicketClaimConcurrencyTest: Tests parallel agents never share a claimed ticket")
+    print("• TicketPartitionTest: Tests monthly partitions, archival and include_archived")
+    print("• TicketSimilarityTest: Tests near-duplicate detection and label reuse in classify")
+    print("• TicketReplicaRoutingTest: Tests replica read routing and read-your-writes stickiness")
+    print("• TicketAdmissionControlTest: Tests rate limits, load shedding and priority lanes for writes")
+    print("• TicketChangesTest: Tests the delta-sync change log, paging and compaction")
     print("\n💡 To run tests manually:")
     print("  python manage.py test tickets.tests")
     print("  python manage.py test tickets.tests.TicketAPITest.test_create_ticket")
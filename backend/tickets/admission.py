@@ -0,0 +1,381 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import JsonResponse
+from django.urls import Resolver404, resolve
+
+from .metrics import ADMISSION_REJECTIONS, ADMISSION_WAIT
+
+# Most idle token buckets kept per process before full ones are dropped
+MAX_BUCKETS = 10000
+
+
+class TokenBucket:
+    """
+    ``rate`` tokens per second up to ``burst``; each request takes one.
+    """
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now):
+        """
+        Take a token and return 0, or return the seconds until one is due.
+        """
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class _Waiter:
+    """
+    A queued request: a thread waiting on an event, or a coroutine awaiting
+    a future on its loop.
+    """
+
+    def __init__(self, loop=None):
+        self.granted = False
+        if loop is None:
+            self.event = threading.Event()
+        else:
+            self.loop = loop
+            self.future = loop.create_future()
+            self.event = None
+
+    def grant(self):
+        self.granted = True
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class SlotPool:
+    """
+    ``limit`` concurrent slots with FIFO queues of at most ``max_queue``
+    waiters per lane. ``reserved`` slots are only handed to priority
+    requests, which also go ahead of every queued normal request. Usable
+    from threads and from coroutines alike.
+    """
+
+    def __init__(self, limit, max_queue, reserved=0):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.reserved = reserved
+        self.in_use = 0
+        self._queues = (deque(), deque())  # priority, normal
+        self._lock = threading.Lock()
+
+    def _free(self, priority):
+        return self.in_use < (self.limit if priority else self.limit - self.reserved)
+
+    def _enter(self, priority, loop):
+        """
+        Take a slot (returns True), or queue a waiter (returns it), or
+        return False when the queue is full.
+        """
+        queue = self._queues[0 if priority else 1]
+        with self._lock:
+            # Only waiters ahead in the same or a higher lane come first
+            ahead = queue if priority else self._queues[0] or queue
+            if not ahead and self._free(priority):
+                self.in_use += 1
+                return True
+            if len(queue) >= self.max_queue:
+                return False
+            waiter = _Waiter(loop)
+            queue.append(waiter)
+            return waiter
+
+    def _abandon(self, waiter, priority):
+        """
+        Leave the queue after a timeout. Returns True when the slot was
+        granted in the meantime after all.
+        """
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._queues[0 if priority else 1].remove(waiter)
+            return False
+
+    def acquire(self, priority=False, timeout=0):
+        entry = self._enter(priority, None)
+        if isinstance(entry, bool):
+            return entry
+        entry.event.wait(timeout)
+        return self._abandon(entry, priority)
+
+    async def aacquire(self, priority=False, timeout=0):
+        entry = self._enter(priority, asyncio.get_running_loop())
+        if isinstance(entry, bool):
+            return entry
+        try:
+            await asyncio.wait_for(asyncio.shield(entry.future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except BaseException:
+            # Cancelled, e.g. because the client went away: leave the queue
+            # and hand back a slot granted in the meantime
+            if self._abandon(entry, priority):
+                self.release()
+            raise
+        return self._abandon(entry, priority)
+
+    def release(self):
+        with self._lock:
+            self.in_use -= 1
+            for priority, queue in ((True, self._queues[0]), (False, self._queues[1])):
+                while queue and self._free(priority):
+                    self.in_use += 1
+                    queue.popleft().grant()
+
+
+class Rejected(Exception):
+    def __init__(self, status, reason, retry_after):
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Per-process admission decisions. Each action listed in
+    ``ADMISSION_LIMITS`` gets its own slot pool and per-client token
+    buckets, and every limited or priority action also needs a slot in the
+    shared pool, where ``ADMISSION_PRIORITY_ACTIONS`` have reserved slots
+    and go first.
+    """
+
+    def __init__(self):
+        self.limits = settings.ADMISSION_LIMITS
+        self.priority_actions = set(settings.ADMISSION_PRIORITY_ACTIONS)
+        self.shared = SlotPool(
+            settings.ADMISSION_MAX_CONCURRENCY,
+            settings.ADMISSION_MAX_CONCURRENCY,
+            settings.ADMISSION_PRIORITY_RESERVED,
+        )
+        self.pools = {
+            action: SlotPool(limit["concurrency"], limit.get("queue", 0))
+            for action, limit in self.limits.items()
+            if limit.get("concurrency")
+        }
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def governs(self, action):
+        return action in self.limits or action in self.priority_actions
+
+    def check_rate(self, action, client):
+        limit = self.limits.get(action) or {}
+        if not limit.get("rate"):
+            return
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get((action, client))
+            if bucket is None:
+                if len(self._buckets) >= MAX_BUCKETS:
+                    self._prune(now)
+                bucket = self._buckets[(action, client)] = TokenBucket(
+                    limit["rate"], limit.get("burst", limit["rate"]), now
+                )
+            wait = bucket.take(now)
+        if wait:
+            raise Rejected(429, "rate_limited", wait)
+
+    def _prune(self, now):
+        for key, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.burst:
+                del self._buckets[key]
+
+    def pools_for(self, action):
+        """
+        ``(pool, priority, timeout)`` for each pool ``action`` must get a slot in.
+        """
+        priority = action in self.priority_actions
+        timeout = (self.limits.get(action) or {}).get("timeout", settings.ADMISSION_QUEUE_TIMEOUT)
+        pools = []
+        if action in self.pools:
+            pools.append((self.pools[action], False, timeout))
+        pools.append((self.shared, priority, timeout))
+        return pools
+
+    def admit(self, action, client):
+        """
+        Take every slot ``action`` needs, waiting in line up to its timeout.
+        Returns the pools to release; raises `Rejected` when over capacity.
+        """
+        self.check_rate(action, client)
+        taken = []
+        started = time.monotonic()
+        try:
+            for pool, priority, timeout in self.pools_for(action):
+                if not pool.acquire(priority, max(0, timeout - (time.monotonic() - started))):
+                    raise Rejected(503, "over_capacity", settings.ADMISSION_RETRY_AFTER)
+                taken.append(pool)
+        except BaseException:
+            self._release(taken)
+            raise
+        if settings.METRICS_ENABLED:
+            ADMISSION_WAIT.observe(time.monotonic() - started, view=action)
+        return taken
+
+    async def aadmit(self, action, client):
+        self.check_rate(action, client)
+        taken = []
+        started = time.monotonic()
+        try:
+            for pool, priority, timeout in self.pools_for(action):
+                if not await pool.aacquire(priority, max(0, timeout - (time.monotonic() - started))):
+                    raise Rejected(503, "over_capacity", settings.ADMISSION_RETRY_AFTER)
+                taken.append(pool)
+        except BaseException:
+            # Rejected or cancelled part way: give back the slots already held
+            self._release(taken)
+            raise
+        if settings.METRICS_ENABLED:
+            ADMISSION_WAIT.observe(time.monotonic() - started, view=action)
+        return taken
+
+    @staticmethod
+    def _release(pools):
+        for pool in reversed(pools):
+            pool.release()
+
+
+def action_name(request):
+    """
+    The name admission limits are keyed on: ``TicketViewSet.<action>`` for
+    viewset routes and the URL name for plain views, or None when the path
+    does not resolve.
+    """
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return None
+    actions = getattr(match.func, "actions", None)
+    if actions:
+        action = actions.get(request.method.lower())
+        return f"{match.func.cls.__name__}.{action}" if action else None
+    return match.url_name
+
+
+def client_key(request):
+    header = settings.ADMISSION_CLIENT_HEADER
+    if header and request.headers.get(header):
+        return request.headers[header].split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def rejection_response(rejected, action):
+    if settings.METRICS_ENABLED:
+        ADMISSION_REJECTIONS.inc(view=action, reason=rejected.reason)
+    message = "Too many requests" if rejected.status == 429 else "Server is over capacity, retry later"
+    response = JsonResponse({"error": message}, status=rejected.status)
+    response["Retry-After"] = str(max(1, math.ceil(rejected.retry_after)))
+    return response
+
+
+def _hold_until_closed(response, controller, pools):
+    # A streamed body is still being produced after the view returns
+    if response.streaming:
+        response._resource_closers.append(lambda: controller._release(pools))
+    else:
+        controller._release(pools)
+
+
+class AdmissionControlMiddleware:
+    """
+    Rate-limit and cap the concurrency of the actions in
+    ``ADMISSION_LIMITS``, queueing requests briefly when a pool is full and
+    answering 429/503 with Retry-After once they cannot be served in time.
+    Removed from the stack when ``ADMISSION_CONTROL`` is off.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.ADMISSION_CONTROL:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        controller = get_admission_controller()
+        action = action_name(request)
+        if not controller.governs(action):
+            return self.get_response(request)
+        try:
+            pools = controller.admit(action, client_key(request))
+        except Rejected as rejected:
+            return rejection_response(rejected, action)
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            controller._release(pools)
+            raise
+        _hold_until_closed(response, controller, pools)
+        return response
+
+    async def __acall__(self, request):
+        controller = get_admission_controller()
+        action = action_name(request)
+        if not controller.governs(action):
+            return await self.get_response(request)
+        try:
+            pools = await controller.aadmit(action, client_key(request))
+        except Rejected as rejected:
+            return rejection_response(rejected, action)
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            controller._release(pools)
+            raise
+        _hold_until_closed(response, controller, pools)
+        return response
+
+
+_admission_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    global _admission_controller
+    if _admission_controller is None:
+        with _controller_lock:
+            if _admission_controller is None:
+                _admission_controller = AdmissionController()
+    return _admission_controller
+
+
+@receiver(setting_changed)
+def _reset_admission_controller(setting, **kwargs):
+    global _admission_controller
+    if setting.startswith("ADMISSION_"):
+        _admission_controller = None
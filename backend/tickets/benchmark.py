@@ -0,0 +1,191 @@
+import json
+import random
+import statistics
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .changes import reset_changes
+from .models import ClassificationJob, Ticket, TicketDailyRollup
+from .partitions import ensure_partitions
+from .rollup import rebuild_rollup
+
+# Skewed like a real support queue: mostly technical, mostly low/medium and
+# mostly already closed
+WEIGHTS = {
+    "category": {"technical": 45, "billing": 25, "account": 20, "general": 10},
+    "priority": {"low": 40, "medium": 35, "high": 18, "critical": 7},
+    "status": {"closed": 50, "resolved": 25, "open": 15, "in_progress": 10},
+}
+
+SUBJECTS = {
+    "technical": ["API returns 500", "App crashes on login", "Sync stuck at 90%", "Export times out",
+                  "Webhook not firing", "Dashboard loads slowly", "Upload fails with error"],
+    "billing": ["Charged twice", "Refund request", "Invoice missing VAT number", "Card declined on upgrade",
+                "Wrong plan on invoice", "Cancel subscription renewal"],
+    "account": ["Cannot reset password", "Two-factor code not arriving", "Change account email",
+                "Locked out after SSO change", "Add a team member", "Delete my account"],
+    "general": ["Feature request", "Question about pricing", "Where is the changelog",
+                "Feedback on the new editor", "Partnership enquiry"],
+}
+
+DETAILS = [
+    "This started after the latest update.", "It happens on both Chrome and Firefox.",
+    "Our whole team is affected.", "We are on the {plan} plan.", "Order number {number}.",
+    "I already tried clearing the cache.", "Please escalate, this blocks our release.",
+    "The error message says timeout while contacting the server.", "Screenshots are attached.",
+    "It worked fine last week.", "Customer reference {number}.", "Thanks for looking into it.",
+]
+
+PLANS = ["starter", "team", "business", "enterprise"]
+
+SEARCH_TERMS = ["login", "invoice", "refund", "password", "timeout", "webhook", "export", "crash", "sync"]
+
+
+def _pick(rng, field):
+    choices = WEIGHTS[field]
+    return rng.choices(list(choices), weights=list(choices.values()))[0]
+
+
+def sample_ticket(rng):
+    category = _pick(rng, "category")
+    details = rng.sample(DETAILS, rng.randint(2, 4))
+    description = " ".join(details).format(plan=rng.choice(PLANS), number=rng.randint(10000, 99999))
+    return Ticket(
+        title=rng.choice(SUBJECTS[category]),
+        description=description,
+        category=category,
+        priority=_pick(rng, "priority"),
+        status=_pick(rng, "status"),
+    )
+
+
+def seed_tickets(rows, seed=0, batch_size=5000, days=365):
+    """
+    Replace every ticket with ``rows`` generated ones, spread over the last
+    ``days`` days with more of them recent, then rebuild the rollup and
+    reset the change log.
+    Meant for a scratch database or a transaction that is rolled back.
+    """
+    rng = random.Random(seed)
+    tables = ", ".join(
+        connection.ops.quote_name(model._meta.db_table)
+        for model in (ClassificationJob, Ticket, TicketDailyRollup)
+    )
+    with transaction.atomic():
+        # Aged rows would otherwise pile up in the default partition
+        ensure_partitions(timezone.now() - timedelta(days=days))
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {tables}")
+        for start in range(0, rows, batch_size):
+            Ticket.objects.bulk_create([sample_ticket(rng) for _ in range(min(batch_size, rows - start))])
+
+        table = connection.ops.quote_name(Ticket._meta.db_table)
+        with connection.cursor() as cursor:
+            # auto_now_add fixes created_at on insert, so age the rows afterwards
+            cursor.execute("SELECT setseed(%s)", [rng.random() * 2 - 1])
+            cursor.execute(
+                f"UPDATE {table} SET created_at = now() - power(random(), 2) * %s * interval '1 day'",
+                [days],
+            )
+            cursor.execute(f"UPDATE {table} SET updated_at = created_at")
+        rebuild_rollup()
+        # Synced clients cannot replay a wholesale replacement
+        reset_changes()
+
+
+def ticket_id_range():
+    bounds = Ticket.objects.aggregate(low=Min("id"), high=Max("id"))
+    return bounds["low"], bounds["high"]
+
+
+def summarize(latencies, queries, errors):
+    """
+    Latency percentiles in milliseconds, sequential throughput and query
+    counts for one scenario.
+    """
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "throughput_rps": round(len(latencies) / sum(latencies), 1),
+        "queries_mean": round(statistics.fmean(queries), 2),
+        "queries_max": max(queries),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Return a message for every scenario that got slower than ``baseline``
+    by more than ``threshold`` (0.2 = 20%) at p95 or in throughput, or that
+    now runs more queries.
+    """
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] / (1 + threshold):
+            regressions.append(
+                f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s"
+            )
+        if current["queries_max"] > previous["queries_max"]:
+            regressions.append(f"{name}: queries {previous['queries_max']} -> {current['queries_max']}")
+    return regressions
+
+
+class StubLLM:
+    """
+    Local chat-completions endpoint that answers every classify call with a
+    fixed suggestion after ``delay`` seconds, so the classify benchmark
+    measures our side of the call.
+    """
+
+    def __init__(self, delay=0.0):
+        reply = json.dumps({
+            "choices": [{"message": {
+                "role": "assistant",
+                "content": '{"suggested_category": "technical", "suggested_priority": "medium"}',
+            }}]
+        }).encode()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without this the
+            # second one waits on a delayed ACK and adds ~40ms per call
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                time.sleep(delay)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,117 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .changes import change_log_cte
+from .models import ClassificationJob, Ticket
+from .partitions import ARCHIVE_STATUSES
+from .rollup import rollup_key
+from .signals import tickets_written
+
+BULK_SET_FIELDS = ("category", "priority", "status")
+
+
+def bulk_create_tickets(tickets, queued_fields=None):
+    """
+    Insert ``tickets`` with one multi-row INSERT and move their rollup
+    buckets in one upsert. ``queued_fields`` optionally maps a ticket's
+    position to the fields a classification job should fill in.
+    """
+    with transaction.atomic():
+        Ticket.objects.bulk_create(tickets)
+        if queued_fields:
+            ClassificationJob.objects.bulk_create([
+                ClassificationJob(
+                    ticket=tickets[position],
+                    fields=fields,
+                    expected_category=tickets[position].category,
+                    expected_priority=tickets[position].priority,
+                )
+                for position, fields in queued_fields.items()
+            ])
+        tickets_written(
+            created=tickets, deltas=Counter(rollup_key(ticket) for ticket in tickets), bulk=True
+        )
+    return tickets
+
+
+def bulk_update_tickets(queryset, values):
+    """
+    Set ``values`` on every ticket in ``queryset`` with a single UPDATE and
+    return how many rows changed.
+    """
+    table = connection.ops.quote_name(Ticket._meta.db_table)
+    changes = {**values, "updated_at": timezone.now()}
+    if "status" in values and values["status"] not in ARCHIVE_STATUSES:
+        # Reopened tickets move back to the live partitions
+        changes["archived"] = False
+    if "status" in values and values["status"] != "in_progress":
+        # Agents lose their claim once a ticket leaves in_progress
+        changes.update(claimed_by="", lease_expires_at=None)
+    assignments = ", ".join(f"{connection.ops.quote_name(field)} = %s" for field in changes)
+    statement = (
+        f"UPDATE {table} SET {assignments} FROM matched WHERE {table}.id = matched.id "
+        f"RETURNING matched.*"
+    )
+    with transaction.atomic():
+        buckets = _write_matched(queryset, statement, list(changes.values()), "updated")
+        deltas = Counter()
+        for (day, category, priority, status), count in buckets.items():
+            old = {"category": category, "priority": priority, "status": status}
+            new = {**old, **values}
+            deltas[(day, category, priority, status)] -= count
+            deltas[(day, new["category"], new["priority"], new["status"])] += count
+        tickets_written(updated=sum(buckets.values()), deltas=deltas)
+    return sum(buckets.values())
+
+
+def bulk_delete_tickets(queryset):
+    """
+    Delete every ticket in ``queryset`` (and its classification jobs) without
+    loading the rows, and return how many tickets went.
+    """
+    table = connection.ops.quote_name(Ticket._meta.db_table)
+    jobs = connection.ops.quote_name(ClassificationJob._meta.db_table)
+    statement = (
+        f"DELETE FROM {table} USING matched WHERE {table}.id = matched.id RETURNING matched.*"
+    )
+    with transaction.atomic():
+        # Jobs are removed first so the ticket foreign key never dangles
+        with connection.cursor() as cursor:
+            sql, params = _matched_sql(queryset)
+            cursor.execute(
+                f"DELETE FROM {jobs} WHERE ticket_id IN (SELECT id FROM ({sql}) AS matched)", params
+            )
+        buckets = _write_matched(queryset, statement, [], "deleted")
+        tickets_written(
+            deleted=sum(buckets.values()), deltas={key: -count for key, count in buckets.items()}
+        )
+    return sum(buckets.values())
+
+
+def _matched_sql(queryset):
+    return (
+        queryset.order_by()
+        .select_for_update()
+        .values("id", "created_at", "category", "priority", "status")
+        .query.sql_with_params()
+    )
+
+
+def _write_matched(queryset, statement, params, kind):
+    """
+    Lock the rows of ``queryset`` as ``matched``, run ``statement`` against
+    them and log a ``kind`` change for each row it returned in the same
+    round trip, and count those rows per rollup bucket.
+    """
+    sql, select_params = _matched_sql(queryset)
+    logged, log_params = change_log_cte("changed", kind)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH matched AS ({sql}), changed AS ({statement}), {logged} "
+            f"SELECT (created_at AT TIME ZONE %s)::date, category, priority, status, COUNT(*) "
+            f"FROM changed GROUP BY 1, 2, 3, 4",
+            [*select_params, *params, *log_params, timezone.get_current_timezone_name()],
+        )
+        return {tuple(row[:4]): row[4] for row in cursor.fetchall()}
@@ -0,0 +1,187 @@
+from django.db import connection, connections, router
+from django.utils import timezone
+
+from .models import TicketChange, TicketVersion
+
+# Position of an entry written by the current transaction
+TRANSACTION_ID_SQL = "pg_current_xact_id()::text::bigint"
+# Every transaction below this id has committed or rolled back, so no entry
+# can still appear below it
+HORIZON_SQL = "pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+CHANGE_TABLE = TicketChange._meta.db_table
+VERSION_TABLE = TicketVersion._meta.db_table
+
+
+class ChangesCompacted(Exception):
+    """
+    The entries after a sync token were compacted away; the client has to
+    reload in full.
+    """
+
+
+def parse_token(token):
+    """
+    ``(transaction_id, id)`` from a ``"<transaction>.<id>"`` sync token.
+    Raises ValueError for anything else.
+    """
+    transaction_id, _, entry_id = token.partition(".")
+    position = (int(transaction_id), int(entry_id))
+    if min(position) < 0:
+        raise ValueError(token)
+    return position
+
+
+def format_token(position):
+    return "{}.{}".format(*position)
+
+
+def record_changes(kind, ticket_ids):
+    """
+    Append a ``kind`` entry for each of ``ticket_ids`` to the change log.
+    Call it inside the transaction that writes the tickets.
+    """
+    ticket_ids = list(ticket_ids)
+    if not ticket_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {connection.ops.quote_name(CHANGE_TABLE)} (transaction_id, ticket_id, kind, changed_at) "
+            f"SELECT {TRANSACTION_ID_SQL}, ticket_id, %s, %s FROM unnest(%s::bigint[]) AS ticket_id",
+            [kind, timezone.now(), ticket_ids],
+        )
+
+
+def change_log_cte(source, kind):
+    """
+    A data-modifying CTE that logs a ``kind`` entry for every ``id`` in the
+    ``source`` CTE, for writes that run as one statement. Returns ``(sql,
+    params)``; the CTE's name is ``logged``.
+    """
+    return (
+        f"logged AS (INSERT INTO {connection.ops.quote_name(CHANGE_TABLE)} "
+        f"(transaction_id, ticket_id, kind, changed_at) "
+        f"SELECT {TRANSACTION_ID_SQL}, id, %s, %s FROM {source})",
+        [kind, timezone.now()],
+    )
+
+
+def read_changes(since, limit):
+    """
+    Return up to ``limit`` entries after the ``since`` position as
+    ``(position, ticket_id, kind)`` tuples, plus the position to resume
+    from and whether more entries are ready. Entries of transactions that
+    are still running stay back until they finish, so a transaction that
+    commits late is never skipped.
+    """
+    alias = router.db_for_read(TicketChange)
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f"SELECT {HORIZON_SQL}")
+        horizon = cursor.fetchone()[0]
+        cursor.execute(
+            f"SELECT transaction_id, id, ticket_id, kind FROM {connections[alias].ops.quote_name(CHANGE_TABLE)} "
+            f"WHERE (transaction_id, id) > (%s, %s) AND transaction_id < %s "
+            f"ORDER BY transaction_id, id LIMIT %s",
+            [*since, horizon, limit + 1],
+        )
+        rows = cursor.fetchall()
+    if rows and rows[0][3] == "compacted":
+        raise ChangesCompacted
+    entries = [((transaction_id, entry_id), ticket_id, kind) for transaction_id, entry_id, ticket_id, kind in rows[:limit]]
+    if len(rows) > limit:
+        return entries, entries[-1][0], True
+    return entries, max(since, (horizon, 0)), False
+
+
+def current_position():
+    """
+    The position a client that loads every ticket now should sync from.
+    """
+    with connections[router.db_for_read(TicketChange)].cursor() as cursor:
+        cursor.execute(f"SELECT {HORIZON_SQL}")
+        return (cursor.fetchone()[0], 0)
+
+
+def compact_changes(before):
+    """
+    Delete the entries logged before ``before`` and leave one ``compacted``
+    entry at the position of the last of them, so clients whose token
+    predates it are told to reload. Returns how many entries went.
+    """
+    table = connection.ops.quote_name(CHANGE_TABLE)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH gone AS (DELETE FROM {table} WHERE changed_at < %s RETURNING transaction_id, id, kind), "
+            f"marker AS (INSERT INTO {table} (transaction_id, id, ticket_id, kind, changed_at) "
+            f"SELECT transaction_id, id, NULL, 'compacted', %s FROM gone "
+            f"ORDER BY transaction_id DESC, id DESC LIMIT 1) "
+            f"SELECT count(*) FROM gone WHERE kind <> 'compacted'",
+            [before, timezone.now()],
+        )
+        return cursor.fetchone()[0]
+
+
+def reset_changes():
+    """
+    Empty the change log after the ticket table was replaced wholesale,
+    leaving a ``compacted`` entry so every existing token has to reload.
+    """
+    table = connection.ops.quote_name(CHANGE_TABLE)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(
+            f"INSERT INTO {table} (transaction_id, ticket_id, kind, changed_at) "
+            f"VALUES ({TRANSACTION_ID_SQL}, NULL, 'compacted', %s)",
+            [timezone.now()],
+        )
+
+
+def bump_version():
+    """
+    Move the ticket version. Call it inside the transaction that writes the
+    tickets, so the new version becomes visible exactly when the write does.
+    """
+    table = connection.ops.quote_name(VERSION_TABLE)
+    with connection.cursor() as cursor:
+        # Each connection bumps its own row, so writers never wait on each other
+        cursor.execute(
+            f"INSERT INTO {table} (slot, count, changed_at) VALUES (pg_backend_pid(), 1, %s) "
+            f"ON CONFLICT (slot) DO UPDATE SET count = {table}.count + 1, changed_at = EXCLUDED.changed_at",
+            [timezone.now()],
+        )
+
+
+def read_version():
+    """
+    ``(version, changed_at)`` of the tickets on the read alias: the sum of
+    the counters, and when the latest write bumped one (None before any
+    write). The time keeps a version from coming back after the table is
+    emptied.
+    """
+    alias = router.db_for_read(TicketVersion)
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            f"SELECT COALESCE(SUM(count), 0), MAX(changed_at) FROM {connections[alias].ops.quote_name(VERSION_TABLE)}"
+        )
+        count, changed_at = cursor.fetchone()
+    return f"{count}.{changed_at.timestamp() if changed_at else 0}", changed_at
+
+
+def fold_versions():
+    """
+    Add the counters of connections that have gone away into row 0, so the
+    version read stays a sum over a handful of rows. The version itself
+    does not change. Returns how many rows were folded.
+    """
+    table = connection.ops.quote_name(VERSION_TABLE)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH gone AS (DELETE FROM {table} WHERE slot <> 0 "
+            f"AND slot NOT IN (SELECT pid FROM pg_stat_activity) RETURNING count, changed_at), "
+            f"folded AS (INSERT INTO {table} (slot, count, changed_at) "
+            f"SELECT 0, SUM(count), MAX(changed_at) FROM gone HAVING COUNT(*) > 0 "
+            f"ON CONFLICT (slot) DO UPDATE SET count = {table}.count + EXCLUDED.count, "
+            f"changed_at = GREATEST({table}.changed_at, EXCLUDED.changed_at)) "
+            f"SELECT COUNT(*) FROM gone"
+        )
+        return cursor.fetchone()[0]
@@ -0,0 +1,208 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .metrics import CLASSIFY_CACHE_LOOKUPS
+
+# A trailing signature block: a line holding only a sign-off ("Thanks,",
+# "Best regards, Dana", "--", "Sent from my phone") followed by at most four
+# short lines up to the end. A "thanks" inside the body never matches.
+SIGNATURE_RE = re.compile(
+    r"^[ \t]*(?:--|(?:thanks|thank you|many thanks|regards|best regards|kind regards|cheers)[!.]?"
+    r"(?:,[ \t]*[\w .'-]{0,40})?|sent from my [^\n]{0,40})[ \t]*"
+    r"(?:\n[^\n]{0,60}){0,4}\s*\Z",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+class LRUBackend:
+    """
+    In-process LRU bounded to ``max_entries``; entries expire after ``ttl``
+    seconds.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value):
+        self.set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DjangoCacheBackend:
+    """
+    Store entries in one of the Django ``CACHES`` aliases so they are shared
+    between processes. Keys carry a namespace version, so `clear` orphans
+    this backend's entries without touching anything else in the alias.
+    """
+
+    key_prefix = "tickets:classify:"
+
+    def __init__(self, alias, ttl):
+        self.cache = caches[alias]
+        self.ttl = ttl
+
+    @property
+    def namespace_key(self):
+        return self.key_prefix + "namespace"
+
+    def _key(self, key):
+        namespace = self.cache.get(self.namespace_key)
+        if namespace is None:
+            # Seed from the clock so an evicted version never reuses old keys
+            self.cache.add(self.namespace_key, time.time_ns(), None)
+            namespace = self.cache.get(self.namespace_key)
+        return f"{self.key_prefix}{namespace}:{key}"
+
+    async def _akey(self, key):
+        namespace = await self.cache.aget(self.namespace_key)
+        if namespace is None:
+            await self.cache.aadd(self.namespace_key, time.time_ns(), None)
+            namespace = await self.cache.aget(self.namespace_key)
+        return f"{self.key_prefix}{namespace}:{key}"
+
+    def get(self, key):
+        return self.cache.get(self._key(key))
+
+    def set(self, key, value):
+        self.cache.set(self._key(key), value, self.ttl)
+
+    async def aget(self, key):
+        return await self.cache.aget(await self._akey(key))
+
+    async def aset(self, key, value):
+        await self.cache.aset(await self._akey(key), value, self.ttl)
+
+    def clear(self):
+        try:
+            self.cache.incr(self.namespace_key)
+        except ValueError:
+            self.cache.set(self.namespace_key, time.time_ns(), None)
+
+
+class ClassificationCache:
+    """
+    Content-addressed cache of classify results keyed by the normalized
+    description, model name and prompt version.
+    """
+
+    def __init__(self, backend, normalize=()):
+        self.backend = backend
+        self.normalize_steps = set(normalize)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def normalize(self, description):
+        text = description
+        if "signature" in self.normalize_steps:
+            match = SIGNATURE_RE.search(text)
+            if match and text[:match.start()].strip():
+                text = text[:match.start()]
+        if "whitespace" in self.normalize_steps:
+            text = " ".join(text.split())
+        if "case" in self.normalize_steps:
+            text = text.lower()
+        return text.strip()
+
+    def key(self, description, model, prompt_version):
+        material = "\0".join([prompt_version, model, self.normalize(description)])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        return self._count(self.backend.get(key))
+
+    def set(self, key, result):
+        self.backend.set(key, result)
+
+    async def aget(self, key):
+        return self._count(await self.backend.aget(key))
+
+    async def aset(self, key, result):
+        await self.backend.aset(key, result)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self.hits = self.misses = 0
+
+    def _count(self, value):
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if settings.METRICS_ENABLED:
+            CLASSIFY_CACHE_LOOKUPS.inc(result="miss" if value is None else "hit")
+        return value
+
+
+_classification_cache = None
+
+
+def get_classification_cache():
+    """
+    Return the process-wide cache configured by ``CLASSIFY_CACHE_*``, or None
+    when caching is disabled.
+    """
+    global _classification_cache
+    if _classification_cache is None and settings.CLASSIFY_CACHE_BACKEND != "none":
+        if settings.CLASSIFY_CACHE_BACKEND == "django":
+            backend = DjangoCacheBackend(settings.CLASSIFY_CACHE_ALIAS, settings.CLASSIFY_CACHE_TTL)
+        else:
+            backend = LRUBackend(settings.CLASSIFY_CACHE_MAX_ENTRIES, settings.CLASSIFY_CACHE_TTL)
+        _classification_cache = ClassificationCache(backend, settings.CLASSIFY_CACHE_NORMALIZE)
+    return _classification_cache
+
+
+@receiver(setting_changed)
+def _reset_classification_cache(setting, **kwargs):
+    global _classification_cache
+    if setting.startswith("CLASSIFY_CACHE_"):
+        _classification_cache = None
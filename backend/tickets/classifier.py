@@ -0,0 +1,524 @@
+import asyncio
+import atexit
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .classification_cache import get_classification_cache
+from .local_classifier import get_local_classifier
+from .metrics import record_llm_call
+from .similarity import similar_suggestion
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever PROMPT_TEMPLATE changes so cached results are not reused
+PROMPT_VERSION = "1"
+
+PROMPT_TEMPLATE = """
+You are a support ticket classifier.
+
+Return ONLY valid JSON:
+{{
+    "suggested_category": "billing|technical|account|general",
+    "suggested_priority": "low|medium|high|critical"
+}}
+
+Description:
+{description}
+"""
+
+BATCH_PROMPT_TEMPLATE = """
+You are a support ticket classifier.
+
+Classify every numbered description below. Return ONLY a valid JSON array
+with one object per description, in any order:
+[
+    {{
+        "index": <number of the description>,
+        "suggested_category": "billing|technical|account|general",
+        "suggested_priority": "low|medium|high|critical"
+    }}
+]
+
+Descriptions:
+{descriptions}
+"""
+
+# Rough characters-per-token ratio used to pack batch prompts
+CHARS_PER_TOKEN = 4
+BATCH_ITEM_OVERHEAD_TOKENS = 8
+
+CATEGORIES = {"billing", "technical", "account", "general"}
+PRIORITIES = {"low", "medium", "high", "critical"}
+
+RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+
+class LLMError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Stop calling the LLM once the error rate over the last
+    ``LLM_BREAKER_WINDOW`` calls reaches ``LLM_BREAKER_ERROR_RATE``. After
+    ``LLM_BREAKER_COOLDOWN`` seconds a single probe call is let through and
+    its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self):
+        self.outcomes = deque(maxlen=settings.LLM_BREAKER_WINDOW)
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < settings.LLM_BREAKER_COOLDOWN:
+            return "open"
+        return "half-open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record(self, success):
+        with self._lock:
+            if self.opened_at is not None:
+                # While open only the half-open probe decides what happens next
+                if self.probing:
+                    self.probing = False
+                    self.outcomes.clear()
+                    self.opened_at = None if success else time.monotonic()
+                return
+            self.outcomes.append(success)
+            failures = self.outcomes.count(False)
+            if (
+                len(self.outcomes) >= settings.LLM_BREAKER_MIN_CALLS
+                and failures / len(self.outcomes) >= settings.LLM_BREAKER_ERROR_RATE
+            ):
+                logger.warning("Opening LLM circuit breaker after %d of %d calls failed", failures, len(self.outcomes))
+                self.opened_at = time.monotonic()
+
+
+_breaker = None
+
+
+def get_circuit_breaker():
+    global _breaker
+    if _breaker is None:
+        _breaker = CircuitBreaker()
+    return _breaker
+
+
+@receiver(setting_changed)
+def _reset_circuit_breaker(setting, **kwargs):
+    global _breaker
+    if setting.startswith(("LLM_BREAKER_", "GROQ_")):
+        _breaker = None
+
+
+class _ClientLoop:
+    """
+    The process's pooled LLM client, and the semaphore capping its calls at
+    ``LLM_MAX_CONCURRENCY``, on an event loop of their own in a daemon
+    thread. Coroutines on any loop (the ASGI server's, or the short-lived one
+    of each async_to_sync call) send their requests through it, so they all
+    share one connection pool and one limit.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="llm-client", daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._open(), self.loop).result()
+
+    async def _open(self):
+        self.client = httpx.AsyncClient(
+            base_url=settings.GROQ_BASE_URL,
+            timeout=httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONCURRENCY,
+                max_keepalive_connections=settings.LLM_MAX_CONCURRENCY,
+            ),
+        )
+        self.semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+    async def _post(self, path, **kwargs):
+        async with self.semaphore:
+            return await self.client.post(path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        """
+        POST from the caller's loop; cancelling the caller cancels the request.
+        """
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(self._post(path, **kwargs), self.loop)
+        )
+
+    def close(self):
+        try:
+            asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result(settings.LLM_CONNECT_TIMEOUT)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+
+
+_client_loop = None
+_client_lock = threading.Lock()
+
+
+def get_client_loop():
+    global _client_loop
+    if _client_loop is None:
+        with _client_lock:
+            if _client_loop is None:
+                _client_loop = _ClientLoop()
+    return _client_loop
+
+
+@atexit.register
+def close_client_loop():
+    global _client_loop
+    with _client_lock:
+        client_loop, _client_loop = _client_loop, None
+    if client_loop is not None:
+        client_loop.close()
+
+
+@receiver(setting_changed)
+def _reset_client_loop(setting, **kwargs):
+    if setting.startswith(("LLM_", "GROQ_")):
+        close_client_loop()
+
+
+def build_prompt(description):
+    return PROMPT_TEMPLATE.format(description=description)
+
+
+def strip_code_fence(content):
+    if content.startswith('```'):
+        lines = content.split('\n')
+        # Remove first line (``` or ```json) and last line (```)
+        if len(lines) > 2:
+            return '\n'.join(lines[1:-1]).strip()
+        return content.replace('```', '').strip()
+    return content
+
+
+def parse_classification(content):
+    """
+    Turn the raw LLM reply into the classify response body.
+    """
+    content = strip_code_fence((content or "").strip())
+    if not content:
+        return {
+            "suggested_category": None,
+            "suggested_priority": None,
+            "llm_error": "Empty response from LLM"
+        }
+
+    try:
+        parsed = json.loads(content)
+        if not isinstance(parsed, dict):
+            raise ValueError("expected a JSON object")
+    except ValueError as e:
+        logger.warning("Invalid JSON from LLM: %s. Content: %s", e, content)
+        return {
+            "suggested_category": None,
+            "suggested_priority": None,
+            "llm_error": "Invalid JSON response from LLM"
+        }
+
+    return {
+        "suggested_category": parsed.get("suggested_category"),
+        "suggested_priority": parsed.get("suggested_priority")
+    }
+
+
+async def complete(prompt):
+    """
+    Send ``prompt`` to the chat completions API and return the reply text.
+
+    Calls share a pooled connection, are capped at ``LLM_MAX_CONCURRENCY`` in
+    flight, and transient failures are retried with jittered exponential
+    backoff. While the circuit breaker is open calls fail at once.
+    """
+    if not settings.GROQ_API_KEY:
+        raise LLMError("GROQ_API_KEY is not configured")
+
+    breaker = get_circuit_breaker()
+    if not breaker.allow():
+        raise LLMError("LLM circuit breaker is open")
+    started = time.perf_counter()
+    succeeded = False
+    try:
+        content, usage = await _complete(prompt)
+        succeeded = True
+    except LLMError:
+        record_llm_call(time.perf_counter() - started, "error")
+        raise
+    finally:
+        # Any other way out (cancellation, an unexpected error) counts as a
+        # failure too, so a half-open probe always reports back
+        breaker.record(succeeded)
+    record_llm_call(time.perf_counter() - started, "ok", usage)
+    return content
+
+
+async def _complete(prompt):
+    client_loop = get_client_loop()
+    payload = {
+        "model": settings.LLM_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0,
+    }
+    headers = {"Authorization": f"Bearer {settings.GROQ_API_KEY}"}
+
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        retry_after = None
+        try:
+            response = await client_loop.post("/chat/completions", json=payload, headers=headers)
+            if response.status_code not in RETRY_STATUS_CODES:
+                response.raise_for_status()
+                body = response.json()
+                return body["choices"][0]["message"]["content"], body.get("usage")
+            error = LLMError(f"LLM returned HTTP {response.status_code}")
+            retry_after = response.headers.get("Retry-After")
+        except httpx.TransportError as e:
+            error = e
+        except (httpx.HTTPStatusError, KeyError, IndexError, ValueError) as e:
+            raise LLMError(str(e)) from e
+
+        if attempt == settings.LLM_MAX_RETRIES:
+            raise LLMError(str(error)) from error
+        await asyncio.sleep(_backoff(attempt, retry_after))
+
+
+async def classify_description(description):
+    """
+    Classify ``description``, serving repeated inputs from the classification
+    cache and near-duplicates of labelled tickets from those tickets. The
+    result carries ``cached`` to say which path answered; answers from the
+    local model also carry ``source`` and ``confidence``, and reused labels
+    ``source``, ``similar_ticket`` and ``similarity``.
+    """
+    cache = get_classification_cache()
+    if cache is not None:
+        key = cache.key(description, settings.LLM_MODEL, PROMPT_VERSION)
+        result = await cache.aget(key)
+        if result is not None:
+            return {**result, "cached": True}
+
+    if settings.SIMILARITY_ENABLED and settings.SIMILARITY_CLASSIFY_THRESHOLD:
+        similar = await sync_to_async(similar_suggestion)(description)
+        if similar is not None:
+            return similar
+
+    local = local_suggestion(description, tiered=True)
+    if local is not None:
+        return local
+
+    try:
+        content = await complete(build_prompt(description))
+    except LLMError as e:
+        logger.error("LLM error: %s", e)
+        local = local_suggestion(description)
+        if local is not None:
+            return local
+        return {
+            "suggested_category": None,
+            "suggested_priority": None,
+            "llm_error": "LLM service unavailable",
+            "cached": False
+        }
+
+    result = parse_classification(content)
+    if cache is not None and "llm_error" not in result:
+        await cache.aset(key, result)
+    return {**result, "cached": False}
+
+
+def local_suggestion(description, tiered=False):
+    """
+    Answer from the local model, or None when it should not. With ``tiered``
+    it only answers in ``CLASSIFY_LOCAL_MODE = "tiered"`` and when at least
+    ``LOCAL_CLASSIFIER_MIN_CONFIDENCE`` sure.
+    """
+    if tiered and settings.CLASSIFY_LOCAL_MODE != "tiered":
+        return None
+    model = get_local_classifier()
+    if model is None:
+        return None
+    result = model.predict(description)
+    if tiered and result["confidence"] < settings.LOCAL_CLASSIFIER_MIN_CONFIDENCE:
+        return None
+    return {**result, "source": "local", "cached": False}
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def pack_batches(items):
+    """
+    Greedily split ``(index, description)`` pairs into prompt-sized chunks
+    bounded by ``LLM_BATCH_PROMPT_TOKENS`` and ``LLM_BATCH_ITEMS_PER_PROMPT``.
+    A description too large for the budget gets a chunk of its own.
+    """
+    budget = settings.LLM_BATCH_PROMPT_TOKENS - estimate_tokens(BATCH_PROMPT_TEMPLATE)
+    batches, current, used = [], [], 0
+    for index, description in items:
+        cost = estimate_tokens(description) + BATCH_ITEM_OVERHEAD_TOKENS
+        if current and (used + cost > budget or len(current) >= settings.LLM_BATCH_ITEMS_PER_PROMPT):
+            batches.append(current)
+            current, used = [], 0
+        current.append((index, description))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_prompt(batch):
+    descriptions = "\n\n".join(
+        f"[{index}]\n{description}" for index, description in batch
+    )
+    return BATCH_PROMPT_TEMPLATE.format(descriptions=descriptions)
+
+
+def parse_batch_classification(content, indexes):
+    """
+    Map each expected index to its valid suggestion. Items that are missing
+    or hold unknown labels are left out so the caller can retry them.
+    """
+    try:
+        parsed = json.loads(strip_code_fence((content or "").strip()))
+    except ValueError:
+        logger.warning("Invalid JSON array from LLM: %s", content)
+        return {}
+    if isinstance(parsed, dict):
+        parsed = parsed.get("results", [])
+    if not isinstance(parsed, list):
+        return {}
+
+    results = {}
+    for item in parsed:
+        if not isinstance(item, dict) or item.get("index") not in indexes:
+            continue
+        suggestion = {
+            "suggested_category": item.get("suggested_category"),
+            "suggested_priority": item.get("suggested_priority"),
+        }
+        if is_valid_classification(suggestion):
+            results[item["index"]] = suggestion
+    return results
+
+
+def is_valid_classification(result):
+    return (
+        result.get("suggested_category") in CATEGORIES
+        and result.get("suggested_priority") in PRIORITIES
+    )
+
+
+async def classify_batch(descriptions):
+    """
+    Classify many descriptions with as few LLM calls as the prompt budget
+    allows. Returns one entry per description, in order, each holding either
+    the suggestion or an ``error``.
+
+    Cached and confidently predicted descriptions skip the LLM and packed
+    prompts run concurrently. Items a batch reply leaves out or mislabels are
+    packed into a new batch and retried with backoff, up to
+    ``LLM_MAX_RETRIES`` times. The items of a call that fails, or that the
+    open circuit breaker turns away, fall back to the local model or come
+    back unclassified rather than being retried one by one.
+    """
+    cache = get_classification_cache()
+    results = [None] * len(descriptions)
+    keys = {}
+    pending = []
+
+    for index, description in enumerate(descriptions):
+        if cache is not None:
+            keys[index] = cache.key(description, settings.LLM_MODEL, PROMPT_VERSION)
+            cached = await cache.aget(keys[index])
+            if cached is not None:
+                results[index] = {**cached, "cached": True}
+                continue
+        local = local_suggestion(description, tiered=True)
+        if local is not None:
+            results[index] = local
+            continue
+        pending.append((index, description))
+
+    async def run(batch):
+        try:
+            content = await complete(build_batch_prompt(batch))
+        except LLMError as e:
+            logger.error("LLM batch error: %s", e)
+            return None
+        return parse_batch_classification(content, {index for index, _ in batch})
+
+    answered, failed, remaining = {}, [], pending
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        if not remaining:
+            break
+        if attempt:
+            await asyncio.sleep(_backoff(attempt - 1))
+        batches = pack_batches(remaining)
+        remaining = []
+        for batch, batch_results in zip(batches, await asyncio.gather(*[run(batch) for batch in batches])):
+            if batch_results is None:
+                # complete() has already retried the call itself
+                failed.extend(batch)
+                continue
+            answered.update(batch_results)
+            remaining.extend(item for item in batch if item[0] not in batch_results)
+
+    for index, description in failed:
+        results[index] = local_suggestion(description) or _batch_error("LLM service unavailable")
+    for index, _ in remaining:
+        results[index] = _batch_error("Invalid classification from LLM")
+
+    for index, suggestion in answered.items():
+        if cache is not None:
+            await cache.aset(keys[index], suggestion)
+        results[index] = {**suggestion, "cached": False}
+
+    return results
+
+
+def _batch_error(message):
+    return {"suggested_category": None, "suggested_priority": None, "error": message}
+
+
+def _backoff(attempt, retry_after=None):
+    delay = settings.LLM_RETRY_BACKOFF * (2 ** attempt)
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    delay = min(delay, settings.LLM_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
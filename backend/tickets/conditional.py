@@ -0,0 +1,67 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, quote_etag
+from django.utils.http import http_date
+
+from .changes import read_version
+
+
+def conditional(validators):
+    """
+    Viewset-method counterpart of Django's ``condition`` decorator.
+
+    ``validators(view, request, *args, **kwargs)`` returns ``(etag,
+    last_modified)`` from cheap lookups; when the client already holds that
+    version a 304 is returned without calling the wrapped method.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if not settings.TICKET_CONDITIONAL_REQUESTS:
+                return method(view, request, *args, **kwargs)
+
+            etag, last_modified = validators(view, request, *args, **kwargs)
+            etag = quote_etag(etag) if etag else None
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+
+            if response.status_code in (200, 304):
+                if etag:
+                    response.headers.setdefault("ETag", etag)
+                if timestamp:
+                    response.headers.setdefault("Last-Modified", http_date(timestamp))
+                # Let browsers keep the body but revalidate it on every use
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def tickets_version(request):
+    """
+    ``(version, changed_at)`` of the tickets ``request`` reads, from the
+    counters every write bumps inside its transaction (see
+    `tickets.changes.read_version`), so writes from any process show up.
+    Read once per request.
+    """
+    if not hasattr(request, "_tickets_version"):
+        request._tickets_version = read_version()
+    return request._tickets_version
+
+
+def response_etag(request, version):
+    """
+    ETag for a read response: the change marker plus everything in the
+    request that shapes the body (URL and query string, negotiated format).
+    """
+    material = "\0".join([
+        str(version) if version is not None else "",
+        request.build_absolute_uri(),
+        request.accepted_media_type or "",
+    ])
+    return hashlib.md5(material.encode("utf-8"), usedforsecurity=False).hexdigest()
@@ -0,0 +1,95 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+# Set on a response after a write so the same client reads from the primary
+# until the replicas have caught up
+STICKY_COOKIE = "tickets_primary"
+
+_read_alias = ContextVar("tickets_read_alias", default=None)
+
+# Replica alias -> monotonic time before which it is not tried again
+_down_until = {}
+
+
+class PrimaryReplicaRouter:
+    """
+    Send reads to the replica chosen for the current request (see
+    `read_from`) and everything else to the primary. Outside a routed block
+    reads go to the primary too, so writes and the reads they depend on
+    stay on one connection.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary through replication
+        return db not in settings.DATABASE_REPLICAS or None
+
+
+def read_alias():
+    """
+    The replica reads are routed to right now, or None for the primary.
+    """
+    return _read_alias.get()
+
+
+@contextmanager
+def read_from(alias):
+    """
+    Route reads inside the block to ``alias`` (None keeps the primary).
+    """
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def choose_replica():
+    """
+    Pick a reachable replica at random, or return None to read from the
+    primary. A replica that fails to connect is skipped for
+    ``DB_REPLICA_RETRY_SECONDS``.
+    """
+    now = time.monotonic()
+    candidates = [alias for alias in settings.DATABASE_REPLICAS if _down_until.get(alias, 0) <= now]
+    random.shuffle(candidates)
+    for alias in candidates:
+        try:
+            # Reuses the persistent connection when it is still open
+            connections[alias].ensure_connection()
+        except OperationalError as exc:
+            _down_until[alias] = now + settings.DB_REPLICA_RETRY_SECONDS
+            logger.warning("Replica %s unavailable, reading from the primary: %s", alias, exc)
+            continue
+        _down_until.pop(alias, None)
+        return alias
+    return None
+
+
+def pin_to_primary(response):
+    """
+    Keep the client that just wrote on the primary for
+    ``DB_REPLICA_STICKY_SECONDS`` so it reads its own writes.
+    """
+    if settings.DATABASE_REPLICAS and settings.DB_REPLICA_STICKY_SECONDS > 0:
+        response.set_cookie(
+            STICKY_COOKIE, "1", max_age=settings.DB_REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax"
+        )
+    return response
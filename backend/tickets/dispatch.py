@@ -0,0 +1,148 @@
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import CLAIM_PRIORITY_ORDER, Ticket
+from .signals import tickets_written
+
+# Same expression as the ticket_claim_idx index, so claims read it in order
+CLAIM_RANK_SQL = "CASE {} ELSE {} END".format(
+    " ".join(f"WHEN priority = '{priority}' THEN {rank}" for rank, priority in enumerate(CLAIM_PRIORITY_ORDER)),
+    len(CLAIM_PRIORITY_ORDER),
+)
+RETURNED_COLUMNS = [
+    field.column for field in Ticket._meta.concrete_fields if not field.generated
+]
+# Status a ticket is moved out of, keyed by the one it is moved into
+PREVIOUS_STATUS = {"in_progress": "open", "open": "in_progress"}
+
+# Monotonic time after which the next claim sweeps expired leases first
+_next_sweep = 0.0
+
+
+def claim_tickets(agent, count=1, lease_seconds=None, category=None):
+    """
+    Hand ``agent`` up to ``count`` open tickets, most urgent first and oldest
+    first within a priority, and move them to in_progress under a lease of
+    ``lease_seconds`` (default ``TICKET_CLAIM_LEASE_SECONDS``). Rows are
+    locked with ``SELECT ... FOR UPDATE SKIP LOCKED``, so concurrent agents
+    step over each other's picks instead of waiting on or sharing them.
+    """
+    global _next_sweep
+    if lease_seconds is None:
+        lease_seconds = settings.TICKET_CLAIM_LEASE_SECONDS
+    if time.monotonic() >= _next_sweep:
+        # Leases run for minutes, so sweeping every few seconds is plenty and
+        # spares most claims a statement
+        _next_sweep = time.monotonic() + settings.TICKET_CLAIM_SWEEP_SECONDS
+        release_expired_claims()
+
+    where, params = "status = 'open' AND NOT archived", []
+    if category:
+        where += " AND category = %s"
+        params.append(category)
+    now = timezone.now()
+    tickets = _move(
+        where, params, f"ORDER BY {CLAIM_RANK_SQL}, created_at, id LIMIT {int(count)}",
+        status="in_progress", claimed_by=agent,
+        lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now,
+    )
+    tickets.sort(key=lambda ticket: (CLAIM_PRIORITY_ORDER.index(ticket.priority), ticket.created_at, ticket.pk))
+    return tickets
+
+
+def renew_lease(ticket_id, agent, lease_seconds=None):
+    """
+    Push back the lease ``agent`` holds on a ticket. Returns the new expiry,
+    or None once the ticket is no longer claimed by ``agent``.
+    """
+    if lease_seconds is None:
+        lease_seconds = settings.TICKET_CLAIM_LEASE_SECONDS
+    with transaction.atomic():
+        ticket = (
+            Ticket.objects.select_for_update()
+            .filter(pk=ticket_id, status="in_progress", claimed_by=agent)
+            .first()
+        )
+        if ticket is None:
+            return None
+        ticket.lease_expires_at = timezone.now() + timedelta(seconds=lease_seconds)
+        ticket.save(update_fields=["lease_expires_at", "updated_at"])
+    return ticket.lease_expires_at
+
+
+def release_claim(ticket_id, agent):
+    """
+    Put a ticket ``agent`` holds back in the open pool. Returns the ticket,
+    or None once it is no longer claimed by ``agent``.
+    """
+    with transaction.atomic():
+        ticket = (
+            Ticket.objects.select_for_update()
+            .filter(pk=ticket_id, status="in_progress", claimed_by=agent)
+            .first()
+        )
+        if ticket is None:
+            return None
+        # Saving clears the claim and moves the stats like any status change
+        ticket.status = "open"
+        ticket.save()
+    return ticket
+
+
+def release_expired_claims():
+    """
+    Return in_progress tickets whose lease ran out to the open pool, and
+    return how many went back.
+    """
+    now = timezone.now()
+    return len(_move(
+        "status = 'in_progress' AND NOT archived AND lease_expires_at < %s", [now], "",
+        status="open", claimed_by="", lease_expires_at=None, updated_at=now,
+    ))
+
+
+def _move(where, params, order_limit, **changes):
+    """
+    Lock the tickets matching ``where`` (skipping rows other transactions
+    hold), apply ``changes`` to them and return them, all in one statement.
+    Their rollup buckets move and each ticket is announced.
+    """
+    qn = connection.ops.quote_name
+    table = qn(Ticket._meta.db_table)
+    assignments = ", ".join(f"{qn(field)} = %s" for field in changes)
+    columns = ", ".join(f"{table}.{qn(column)}" for column in RETURNED_COLUMNS)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH picked AS ("
+            f"SELECT id, created_at, archived FROM {table} WHERE {where} {order_limit} "
+            f"FOR UPDATE SKIP LOCKED) "
+            f"UPDATE {table} SET {assignments} FROM picked "
+            f"WHERE {table}.id = picked.id AND {table}.created_at = picked.created_at "
+            f"AND {table}.archived = picked.archived "
+            f"RETURNING {columns}",
+            [*params, *changes.values()],
+        )
+        tickets = [Ticket.from_db(connection.alias, RETURNED_COLUMNS, row) for row in cursor.fetchall()]
+        if not tickets:
+            return tickets
+        deltas = Counter()
+        for ticket in tickets:
+            # ``where`` pins the status the tickets left
+            deltas[(*ticket._rollup_key[:3], PREVIOUS_STATUS[changes["status"]])] -= 1
+            deltas[ticket._rollup_key] += 1
+        tickets_written(updated=tickets, deltas=deltas)
+    return tickets
+
+
+@receiver(setting_changed)
+def _reset_sweep(setting, **kwargs):
+    global _next_sweep
+    if setting == "TICKET_CLAIM_SWEEP_SECONDS":
+        _next_sweep = 0.0
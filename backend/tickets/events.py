@@ -0,0 +1,270 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+TICKET_EVENT_FIELDS = ("id", "title", "category", "priority", "status", "created_at", "updated_at")
+
+# Sent on connect and after a client overflows: refetch list and stats
+READY_FRAME = b"retry: 5000\nevent: ready\ndata: {}\n\n"
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+class LocalBroker:
+    """
+    In-process stand-in for a cross-node broker such as Redis pub/sub: a
+    published message reaches this process's subscribers only. A networked
+    broker keeps the same ``publish``/``subscribe`` pair and sets ``local``
+    to False so nodes publish even while none of their own clients listen.
+    """
+
+    local = True
+
+    def __init__(self):
+        self._subscribers = []
+
+    def publish(self, message):
+        for callback in list(self._subscribers):
+            callback(message)
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+
+BROKERS = {"local": LocalBroker}
+
+
+class EventClient:
+    """
+    One connected dashboard. Frames are queued on the client's own event
+    loop; a client that falls ``buffer`` frames behind loses its backlog and
+    is told to resync instead of holding memory for it.
+    """
+
+    def __init__(self, loop, buffer):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=buffer)
+        self.dropped = 0
+
+    def offer(self, frame):
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC_FRAME)
+
+    async def frames(self, heartbeat):
+        while True:
+            try:
+                yield await asyncio.wait_for(self.queue.get(), heartbeat)
+            except TimeoutError:
+                yield KEEPALIVE_FRAME
+
+
+class EventHub:
+    """
+    Collects ticket events and stats deltas from any thread, flushes them
+    once per ``TICKET_EVENTS_BATCH_WINDOW`` through the broker, and fans each
+    batch out to every connected client as one pre-encoded SSE frame.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.broker.subscribe(self.deliver)
+        self._clients = {}
+        self._events = []
+        self._stats = Counter()
+        self._ready = threading.Condition()
+        self._flusher = None
+
+    @property
+    def listening(self):
+        return not self.broker.local or bool(self._clients)
+
+    @property
+    def client_count(self):
+        return sum(len(clients) for clients in self._clients.values())
+
+    def connect(self):
+        loop = asyncio.get_running_loop()
+        client = EventClient(loop, settings.TICKET_EVENTS_CLIENT_BUFFER)
+        with self._ready:
+            self._clients.setdefault(loop, set()).add(client)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name="ticket-events", daemon=True)
+                self._flusher.start()
+        return client
+
+    def disconnect(self, client):
+        with self._ready:
+            clients = self._clients.get(client.loop, set())
+            clients.discard(client)
+            if not clients:
+                self._clients.pop(client.loop, None)
+
+    def publish(self, event=None, stats=None):
+        """
+        Queue a ticket ``event`` and/or rollup ``stats`` deltas for the next
+        batch. Cheap no-op while nobody is listening.
+        """
+        if not self.listening:
+            return
+        with self._ready:
+            if event is not None:
+                self._events.append(event)
+            if stats:
+                for (day, *bucket), count in stats.items():
+                    self._stats[tuple(bucket)] += count
+            self._ready.notify()
+
+    def flush(self):
+        with self._ready:
+            events, self._events = self._events, []
+            stats, self._stats = self._stats, Counter()
+        message = encode_batch(events, stats)
+        if message is not None:
+            self.broker.publish(message)
+
+    def deliver(self, message):
+        """
+        Broker callback: build the SSE frame once and hand the same bytes to
+        every client, with one hop per event loop rather than per client.
+        """
+        batch = json.loads(message)
+        frame = b"".join(
+            f"event: {name}\ndata: {json.dumps(batch[name], separators=(',', ':'))}\n\n".encode("utf-8")
+            for name in ("tickets", "stats")
+            if name in batch
+        )
+        with self._ready:
+            targets = [(loop, list(clients)) for loop, clients in self._clients.items()]
+        for loop, clients in targets:
+            try:
+                loop.call_soon_threadsafe(_fan_out, clients, frame)
+            except RuntimeError:
+                # The loop has closed under its clients
+                with self._ready:
+                    self._clients.pop(loop, None)
+
+    def _run(self):
+        while True:
+            with self._ready:
+                while not (self._events or self._stats):
+                    self._ready.wait()
+            # Let the rest of a burst land before sending anything
+            time.sleep(settings.TICKET_EVENTS_BATCH_WINDOW)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to publish ticket events")
+
+
+def _fan_out(clients, frame):
+    for client in clients:
+        client.offer(frame)
+
+
+def encode_batch(events, stats):
+    """
+    Serialize one batch for the broker, or None when it carries nothing. A
+    burst above ``TICKET_EVENTS_MAX_BATCH`` events is collapsed into a single
+    ``tickets.bulk`` notice so clients refetch once instead.
+    """
+    batch = {}
+    if len(events) > settings.TICKET_EVENTS_MAX_BATCH:
+        count = sum(event.get("count", 1) for event in events)
+        events = [{"type": "tickets.bulk", "action": "changed", "count": count}]
+    if events:
+        batch["tickets"] = events
+    delta = stats_delta(stats)
+    if delta:
+        batch["stats"] = delta
+    return json.dumps(batch, default=str) if batch else None
+
+
+def stats_delta(buckets):
+    """
+    Turn ``{(category, priority, status): delta}`` into the changes to apply
+    to a ``/api/tickets/stats/`` payload, leaving out anything that netted
+    to zero.
+    """
+    totals = Counter()
+    priorities = Counter()
+    categories = Counter()
+    for (category, priority, status), count in buckets.items():
+        totals["total_tickets"] += count
+        if status == "open":
+            totals["open_tickets"] += count
+        priorities[priority] += count
+        categories[category] += count
+
+    delta = {name: value for name, value in totals.items() if value}
+    for name, counter in [("priority_breakdown", priorities), ("category_breakdown", categories)]:
+        changed = {key: value for key, value in counter.items() if value}
+        if changed:
+            delta[name] = changed
+    return delta
+
+
+_event_hub = None
+
+
+def get_event_hub():
+    global _event_hub
+    if _event_hub is None:
+        _event_hub = EventHub(BROKERS[settings.TICKET_EVENTS_BROKER]())
+    return _event_hub
+
+
+@receiver(setting_changed)
+def _reset_event_hub(setting, **kwargs):
+    global _event_hub
+    if setting == "TICKET_EVENTS_BROKER":
+        _event_hub = None
+
+
+def publish_on_commit(event=None, stats=None):
+    """
+    Publish once the surrounding transaction commits, so rolled-back writes
+    are never announced.
+    """
+    hub = get_event_hub()
+    if hub.listening:
+        stats = dict(stats) if stats else None
+        transaction.on_commit(lambda: hub.publish(event, stats))
+
+
+def ticket_event(kind, ticket):
+    """
+    Publish ``ticket.<kind>`` for a single ticket.
+    """
+    if not get_event_hub().listening:
+        return
+    if kind == "deleted":
+        payload = {"id": ticket.pk}
+    else:
+        from .serializers import TicketRowEncoder
+
+        fields = list(TICKET_EVENT_FIELDS)
+        payload = TicketRowEncoder(fields).encode({name: getattr(ticket, name) for name in fields})
+    publish_on_commit({"type": f"ticket.{kind}", "ticket": payload})
+
+
+def tickets_bulk_event(action, count):
+    """
+    Publish one notice for a bulk write instead of an event per row.
+    """
+    if count:
+        publish_on_commit({"type": "tickets.bulk", "action": action, "count": count})
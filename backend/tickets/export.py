@@ -0,0 +1,69 @@
+import csv
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from rest_framework import serializers
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+_datetime = serializers.DateTimeField()
+
+
+class _Lines:
+    """
+    File-like sink that hands back what ``csv.writer`` just wrote.
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_chunks(queryset, fields, export_format, chunk_size):
+    """
+    Yield the rows of ``queryset`` as NDJSON or CSV text, one block per
+    ``chunk_size`` rows. Rows come from a server-side cursor as plain tuples,
+    so memory use does not grow with the size of the export.
+    """
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    writer = csv.writer(_Lines())
+    if export_format == "csv":
+        yield writer.writerow(fields)
+
+    block = []
+    for row in rows:
+        row = [_datetime.to_representation(value) if hasattr(value, "tzinfo") else value for value in row]
+        if export_format == "csv":
+            block.append(writer.writerow(row))
+        else:
+            block.append(json.dumps(dict(zip(fields, row))) + "\n")
+        if len(block) >= chunk_size:
+            yield "".join(block)
+            block = []
+    if block:
+        yield "".join(block)
+
+
+def gzip_chunks(chunks):
+    """
+    Compress a stream of text blocks into a gzip stream as it goes.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def async_chunks(chunks):
+    """
+    Drive a synchronous generator from an ASGI response, one block per hop to
+    the sync thread, so it is streamed rather than collected into a list.
+    """
+    step = sync_to_async(next)
+    while (chunk := await step(chunks, None)) is not None:
+        yield chunk
@@ -0,0 +1,58 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from rest_framework.filters import SearchFilter
+
+from .models import SEARCH_CONFIG
+
+SEARCH_RANK = "search_rank"
+
+
+class TicketSearchFilter(SearchFilter):
+    """
+    Drop-in replacement for `SearchFilter` backed by the ``search_vector``
+    tsvector column.
+
+    Every term is prefix matched (``login`` finds "logins") and results are
+    ordered by rank unless the client asks for another ordering. When
+    nothing matches, titles are searched by trigram similarity so typos still
+    find something. ``TICKET_SEARCH_BACKEND = "icontains"`` restores the
+    stock behaviour.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if settings.TICKET_SEARCH_BACKEND == "icontains":
+            return super().filter_queryset(request, queryset, view)
+
+        terms = self.get_search_terms(request)
+        words = [word for term in terms for word in re.findall(r"\w+", term)]
+        if not words:
+            return queryset
+
+        query = SearchQuery(
+            " & ".join(f"{word}:*" for word in words),
+            search_type="raw",
+            config=SEARCH_CONFIG,
+        )
+        matches = queryset.filter(search_vector=query)
+
+        if settings.TICKET_SEARCH_TRIGRAM_FALLBACK and not matches.exists():
+            text = " ".join(words)
+            return (
+                queryset.filter(title__trigram_similar=text)
+                .annotate(**{SEARCH_RANK: _exact(TrigramSimilarity("title", text))})
+                .order_by(f"-{SEARCH_RANK}", "-id")
+            )
+
+        return (
+            matches.annotate(**{SEARCH_RANK: _exact(SearchRank(F("search_vector"), query))})
+            .order_by(f"-{SEARCH_RANK}", "-id")
+        )
+
+
+def _exact(score):
+    # Scores are float4; widen them so a cursor round-trips the exact value
+    return Cast(score, FloatField())
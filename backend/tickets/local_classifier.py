@@ -0,0 +1,188 @@
+import os
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+TARGETS = ("category", "priority")
+
+
+def tokenize(text):
+    """
+    Lowercased words plus adjacent word pairs, so "not working" weighs
+    differently from "working".
+    """
+    words = TOKEN_RE.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class LocalClassifier:
+    """
+    TF-IDF features feeding one softmax-regression model per target field,
+    trained with NumPy from labelled tickets and stored as a single ``.npz``.
+    """
+
+    def __init__(self, vocabulary, idf, models):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        # target -> (labels, weights[n_features, n_labels], bias[n_labels])
+        self.models = models
+
+    @classmethod
+    def train(cls, descriptions, labels, max_features=20000, epochs=200, learning_rate=2.0, l2=1e-4):
+        """
+        Fit on ``descriptions`` and ``labels``, a dict of target field to a
+        list of labels aligned with the descriptions.
+        """
+        documents = [Counter(tokenize(description)) for description in descriptions]
+        frequency = Counter(term for document in documents for term in document)
+        terms = sorted(frequency, key=lambda term: (-frequency[term], term))[:max_features]
+        vocabulary = {term: index for index, term in enumerate(terms)}
+        idf = np.log((1 + len(documents)) / (1 + np.array([frequency[t] for t in terms], dtype=np.float32))) + 1
+
+        classifier = cls(vocabulary, idf.astype(np.float32), {})
+        rows = [classifier._vectorize(document) for document in documents]
+        keep = [i for i, (indices, _) in enumerate(rows) if len(indices)]
+        matrix = _SparseRows([rows[i] for i in keep], len(terms))
+
+        for target in TARGETS:
+            target_labels = sorted(set(labels[target]))
+            lookup = {label: i for i, label in enumerate(target_labels)}
+            y = np.array([lookup[labels[target][i]] for i in keep])
+            weights, bias = _fit_softmax(matrix, y, len(target_labels), epochs, learning_rate, l2)
+            classifier.models[target] = (target_labels, weights, bias)
+        return classifier
+
+    def predict(self, description):
+        """
+        Return the most likely label of each target and the lower of the two
+        probabilities as ``confidence``.
+        """
+        indices, values = self._vectorize(Counter(tokenize(description)))
+        result = {}
+        confidence = 1.0
+        for target, (target_labels, weights, bias) in self.models.items():
+            probabilities = _softmax(values @ weights[indices] + bias)
+            best = int(probabilities.argmax())
+            result[f"suggested_{target}"] = target_labels[best]
+            confidence = min(confidence, float(probabilities[best]))
+        result["confidence"] = round(confidence, 4)
+        return result
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {
+            "vocabulary": np.array(sorted(self.vocabulary, key=self.vocabulary.get)),
+            "idf": self.idf,
+        }
+        for target, (target_labels, weights, bias) in self.models.items():
+            arrays[f"{target}_labels"] = np.array(target_labels)
+            arrays[f"{target}_weights"] = weights
+            arrays[f"{target}_bias"] = bias
+        # Write next to the target and rename so a loading worker never sees half a file
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            vocabulary = {str(term): index for index, term in enumerate(data["vocabulary"])}
+            models = {
+                target: (
+                    [str(label) for label in data[f"{target}_labels"]],
+                    data[f"{target}_weights"],
+                    data[f"{target}_bias"],
+                )
+                for target in TARGETS
+            }
+            return cls(vocabulary, data["idf"], models)
+
+    def _vectorize(self, counts):
+        pairs = sorted(
+            (self.vocabulary[term], count) for term, count in counts.items() if term in self.vocabulary
+        )
+        indices = np.array([index for index, _ in pairs], dtype=np.int64)
+        values = np.array([count for _, count in pairs], dtype=np.float32) * self.idf[indices]
+        norm = np.linalg.norm(values)
+        return indices, values / norm if norm else values
+
+
+class _SparseRows:
+    """
+    Minimal CSR matrix: just the two products gradient descent needs.
+    """
+
+    def __init__(self, rows, n_features):
+        self.n_features = n_features
+        self.indices = np.concatenate([indices for indices, _ in rows]) if rows else np.zeros(0, np.int64)
+        self.values = np.concatenate([values for _, values in rows]) if rows else np.zeros(0, np.float32)
+        lengths = [len(indices) for indices, _ in rows]
+        self.starts = np.cumsum([0] + lengths[:-1]).astype(np.int64)
+        self.row_of = np.repeat(np.arange(len(rows)), lengths)
+        self.n_rows = len(rows)
+
+    def dot(self, weights):
+        return np.add.reduceat(self.values[:, None] * weights[self.indices], self.starts)
+
+    def transpose_dot(self, gradient):
+        result = np.zeros((self.n_features, gradient.shape[1]), dtype=np.float32)
+        np.add.at(result, self.indices, self.values[:, None] * gradient[self.row_of])
+        return result
+
+
+def _fit_softmax(matrix, y, n_labels, epochs, learning_rate, l2):
+    weights = np.zeros((matrix.n_features, n_labels), dtype=np.float32)
+    bias = np.zeros(n_labels, dtype=np.float32)
+    if not matrix.n_rows:
+        return weights, bias
+    onehot = np.eye(n_labels, dtype=np.float32)[y]
+    for _ in range(epochs):
+        gradient = (_softmax(matrix.dot(weights) + bias) - onehot) / matrix.n_rows
+        weights -= learning_rate * (matrix.transpose_dot(gradient) + l2 * weights)
+        bias -= learning_rate * gradient.sum(axis=0)
+    return weights, bias
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=-1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+_local_classifier = None
+_local_classifier_mtime = None
+_lock = threading.Lock()
+
+
+def get_local_classifier():
+    """
+    Return the model stored at ``LOCAL_CLASSIFIER_PATH``, loading it on first
+    use and again whenever the file is retrained; None when there is none.
+    """
+    global _local_classifier, _local_classifier_mtime
+    if settings.CLASSIFY_LOCAL_MODE == "off":
+        return None
+    try:
+        mtime = os.stat(settings.LOCAL_CLASSIFIER_PATH).st_mtime
+    except OSError:
+        return None
+    if mtime != _local_classifier_mtime:
+        with _lock:
+            if mtime != _local_classifier_mtime:
+                _local_classifier = LocalClassifier.load(settings.LOCAL_CLASSIFIER_PATH)
+                _local_classifier_mtime = mtime
+    return _local_classifier
+
+
+@receiver(setting_changed)
+def _reset_local_classifier(setting, **kwargs):
+    global _local_classifier, _local_classifier_mtime
+    if setting in ("LOCAL_CLASSIFIER_PATH", "CLASSIFY_LOCAL_MODE"):
+        _local_classifier = _local_classifier_mtime = None
@@ -0,0 +1,193 @@
+import json
+import random
+import time
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import AsyncClient, Client, override_settings
+from django.utils import timezone
+
+from tickets.benchmark import (
+    SEARCH_TERMS, WEIGHTS, StubLLM, compare, sample_ticket, seed_tickets, summarize, ticket_id_range,
+)
+from tickets.changes import bump_version
+from tickets.models import Ticket
+
+SCENARIOS = ["list", "list_filtered", "search", "detail", "create", "stats", "classify"]
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed tickets and measure latency percentiles, throughput and query counts of the "
+        "tickets API. Run it against a scratch database: seeding truncates the ticket tables, "
+        "though everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="Tickets to seed, e.g. 10000, 100000 or 1000000")
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+        parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per scenario")
+        parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--no-seed", action="store_true", help="Benchmark the tickets already in the database")
+        parser.add_argument("--llm-delay", type=float, default=0.0, help="Seconds the stub LLM waits per call")
+        parser.add_argument("--output", help="Where to write the JSON results (default: var/benchmarks/)")
+        parser.add_argument("--baseline", help="Earlier results to compare against")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Fail when p95 or throughput is this much worse than the baseline (0.2 = 20%%)",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = json.loads(Path(options["baseline"]).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline: {exc}")
+
+        self.rng = random.Random(options["seed"])
+        results = {
+            "meta": {
+                "started_at": timezone.now().isoformat(),
+                "rows": None,
+                "requests": options["requests"],
+                "seed": options["seed"],
+                "llm_delay": options["llm_delay"],
+                "settings": {
+                    name: getattr(settings, name)
+                    for name in ("TICKET_FAST_READ", "TICKET_CONDITIONAL_REQUESTS", "TICKET_SEARCH_BACKEND")
+                },
+            },
+            "scenarios": {},
+        }
+
+        try:
+            # Replicas cannot see the seeded rows of this uncommitted transaction,
+            # and reads measure the queries themselves rather than cached bodies
+            with transaction.atomic(), override_settings(DATABASE_REPLICAS=[], TICKET_RESPONSE_CACHE_BACKEND="none"):
+                if not options["no_seed"]:
+                    started = time.perf_counter()
+                    seed_tickets(options["rows"], seed=options["seed"])
+                    self.stdout.write(f"Seeded {options['rows']} tickets in {time.perf_counter() - started:.1f}s")
+                    # Fresh planner statistics, as autovacuum would have by now
+                    with connection.cursor() as cursor:
+                        cursor.execute("ANALYZE")
+                self.ids = ticket_id_range()
+                if self.ids[0] is None:
+                    raise CommandError("No tickets to benchmark; drop --no-seed")
+                results["meta"]["rows"] = Ticket.objects.count()
+
+                for name in options["scenarios"]:
+                    summary = self.run(name, options)
+                    results["scenarios"][name] = summary
+                    self.stdout.write(
+                        f"{name:>14}: p50 {summary['p50_ms']:8.2f}ms  p95 {summary['p95_ms']:8.2f}ms  "
+                        f"p99 {summary['p99_ms']:8.2f}ms  {summary['throughput_rps']:8.1f} req/s  "
+                        f"{summary['queries_mean']:5.1f} queries"
+                        + (f"  {summary['errors']} errors" if summary["errors"] else "")
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        output = Path(options["output"] or Path(settings.BASE_DIR) / "var" / "benchmarks" / (
+            f"bench-{timezone.now():%Y%m%dT%H%M%S}.json"
+        ))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"Results written to {output}")
+
+        if baseline is not None:
+            regressions = compare(results, baseline, options["threshold"])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS(f"No regressions beyond {options['threshold']:.0%}"))
+
+    def run(self, name, options):
+        if name == "classify":
+            with StubLLM(options["llm_delay"]) as stub, override_settings(
+                GROQ_API_KEY="bench",
+                GROQ_BASE_URL=stub.url,
+                CLASSIFY_CACHE_BACKEND="none",
+                CLASSIFY_LOCAL_MODE="off",
+            ):
+                return async_to_sync(self.run_async)(options)
+
+        client = Client()
+        request = getattr(self, f"request_{name}")
+        for _ in range(options["warmup"]):
+            request(client)
+
+        latencies, queries, errors = [], [], 0
+
+        def count(execute, *args):
+            queries[-1] += 1
+            return execute(*args)
+
+        # Counted with a wrapper: CaptureQueriesContext reads a bounded log
+        # and reports 0 once that has filled up
+        with connection.execute_wrapper(count):
+            for _ in range(options["requests"]):
+                queries.append(0)
+                started = time.perf_counter()
+                response = request(client)
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code >= 400
+        return summarize(latencies, queries, errors)
+
+    async def run_async(self, options):
+        # One event loop for the whole run, as under the ASGI server
+        client = AsyncClient()
+        for _ in range(options["warmup"]):
+            await self.request_classify(client)
+
+        latencies, errors = [], 0
+        for _ in range(options["requests"]):
+            started = time.perf_counter()
+            response = await self.request_classify(client)
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code >= 400 or "llm_error" in response.json()
+        return summarize(latencies, [0] * len(latencies), errors)
+
+    def request_list(self, client):
+        return client.get("/api/tickets/?page_size=50")
+
+    def request_list_filtered(self, client):
+        params = {field: self.rng.choice(list(WEIGHTS[field])) for field in ("category", "priority")}
+        return client.get("/api/tickets/", {**params, "status": "open", "page_size": 50})
+
+    def request_search(self, client):
+        return client.get("/api/tickets/", {"search": self.rng.choice(SEARCH_TERMS), "page_size": 50})
+
+    def request_detail(self, client):
+        return client.get(f"/api/tickets/{self.rng.randint(*self.ids)}/")
+
+    def request_create(self, client):
+        ticket = sample_ticket(self.rng)
+        return client.post("/api/tickets/", {
+            "title": ticket.title,
+            "description": ticket.description,
+            "category": ticket.category,
+            "priority": ticket.priority,
+        }, content_type="application/json")
+
+    def request_stats(self, client):
+        # Measure the aggregate itself rather than the cached copy
+        bump_version()
+        return client.get("/api/tickets/stats/")
+
+    async def request_classify(self, client):
+        ticket = sample_ticket(self.rng)
+        return await client.post(
+            "/api/tickets/classify/", {"description": ticket.description}, content_type="application/json"
+        )
@@ -0,0 +1,80 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from tickets.views import TicketViewSet
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare ticket import throughput of the per-item API against the bulk endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+        parser.add_argument(
+            "--per-item-limit",
+            type=int,
+            default=100000,
+            help="Skip the per-item run for larger row counts",
+        )
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        create = TicketViewSet.as_view({"post": "create"})
+        bulk_create = TicketViewSet.as_view({"post": "bulk_create"}, **TicketViewSet.bulk_create.kwargs)
+
+        for rows in options["rows"]:
+            items = [
+                {
+                    "title": f"Benchmark ticket {i}",
+                    "description": f"Imported from the email gateway, message {i}",
+                    "category": ("billing", "technical", "account", "general")[i % 4],
+                    "priority": ("low", "medium", "high", "critical")[i % 4],
+                }
+                for i in range(rows)
+            ]
+
+            if rows <= options["per_item_limit"]:
+                def per_item():
+                    for item in items:
+                        self.expect_created(create(factory.post("/api/tickets/", item, format="json")))
+                self.report("per-item", rows, self.timed(per_item))
+
+            # JSON arrays are read into memory whole, so Django caps their size
+            if len(json.dumps(items)) <= settings.DATA_UPLOAD_MAX_MEMORY_SIZE:
+                def bulk_json():
+                    self.expect_created(bulk_create(factory.post("/api/tickets/bulk/", items, format="json")))
+                self.report("bulk JSON", rows, self.timed(bulk_json))
+            else:
+                self.stdout.write(f"{'bulk JSON':>12} {rows:>7} rows: skipped, body exceeds DATA_UPLOAD_MAX_MEMORY_SIZE")
+
+            body = "\n".join(json.dumps(item) for item in items)
+
+            def bulk_ndjson():
+                self.expect_created(bulk_create(factory.post("/api/tickets/bulk/", body, content_type="application/x-ndjson")))
+            self.report("bulk NDJSON", rows, self.timed(bulk_ndjson))
+
+    def timed(self, run):
+        # Every run is rolled back so each one starts from the same table
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                run()
+                raise _Rollback
+        except _Rollback:
+            pass
+        return time.perf_counter() - started
+
+    def expect_created(self, response):
+        if response.status_code != 201:
+            raise CommandError(f"Import failed with HTTP {response.status_code}: {response.data}")
+
+    def report(self, label, rows, elapsed):
+        self.stdout.write(f"{label:>12} {rows:>7} rows: {elapsed:8.2f}s  {rows / elapsed:10.0f} rows/s")
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from tickets.bulk import bulk_create_tickets
+from tickets.models import Ticket
+from tickets.renderers import FastJSONRenderer
+from tickets.serializers import TicketRowEncoder, TicketSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare the stock TicketSerializer list path against the values()-based fast path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+        parser.add_argument("--repeat", type=int, default=5, help="Best of this many runs is reported")
+
+    def handle(self, *args, **options):
+        # Sample rows are inserted in a transaction that is rolled back afterwards
+        try:
+            with transaction.atomic():
+                for rows in options["rows"]:
+                    self.bench(rows, options["repeat"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def bench(self, rows, repeat):
+        Ticket.objects.all().delete()
+        bulk_create_tickets([
+            Ticket(title=f"Ticket {i}", description=f"Description {i}", category="billing", priority="low")
+            for i in range(rows)
+        ])
+        queryset = Ticket.objects.order_by("-created_at", "-id")[:rows]
+        fields = list(TicketSerializer().fields)
+        encoder = TicketRowEncoder(fields)
+        sparse = TicketRowEncoder(["id", "title", "status"])
+
+        def stock():
+            return JSONRenderer().render(TicketSerializer(queryset, many=True).data)
+
+        def fast():
+            return FastJSONRenderer().render(encoder.encode_many(queryset.values(*fields)))
+
+        def fast_sparse():
+            return FastJSONRenderer().render(sparse.encode_many(queryset.values("id", "title", "status")))
+
+        baseline = None
+        for label, run in [("serializer", stock), ("fast", fast), ("fast ?fields=", fast_sparse)]:
+            best = min(self.timed(run) for _ in range(repeat))
+            baseline = baseline or best
+            self.stdout.write(
+                f"{label:>14} {rows:>6} rows: {best * 1000:8.1f} ms  {baseline / best:5.1f}x"
+            )
+
+    def timed(self, run):
+        started = time.perf_counter()
+        run()
+        return time.perf_counter() - started
@@ -0,0 +1,78 @@
+import multiprocessing
+import signal
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from tickets.queue import queue_depth, requeue_dead, run_worker
+
+
+def _worker(stop_event, batch_size, poll_interval, drain, results):
+    try:
+        results.append(run_worker(stop_event, batch_size, poll_interval, drain))
+    finally:
+        connection.close()
+
+
+def _process_worker(stop_event, batch_size, poll_interval, drain):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker(stop_event, batch_size, poll_interval, drain, [])
+
+
+class Command(BaseCommand):
+    help = "Run a pool of workers that classify queued tickets and write the suggestions back"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=settings.CLASSIFY_WORKERS)
+        parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+        parser.add_argument("--batch-size", type=int, default=settings.LLM_BATCH_ITEMS_PER_PROMPT)
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+        parser.add_argument("--drain", action="store_true", help="Exit once no job is due")
+        parser.add_argument("--requeue-dead", action="store_true", help="Move dead-lettered jobs back to pending first")
+
+    def handle(self, *args, **options):
+        if options["requeue_dead"]:
+            self.stdout.write(f"Requeued {requeue_dead()} dead jobs")
+
+        depth = queue_depth()
+        self.stdout.write(
+            f"Queue depth: {depth['pending']} pending, {depth['running']} running, {depth['dead']} dead"
+        )
+
+        worker_args = (options["batch_size"], options["poll_interval"], options["drain"])
+        if options["mode"] == "process":
+            # Forked children must open their own database connections
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            stop_event = context.Event()
+            workers = [
+                context.Process(target=_process_worker, args=(stop_event, *worker_args))
+                for _ in range(options["workers"])
+            ]
+            results = None
+        else:
+            stop_event = threading.Event()
+            results = []
+            workers = [
+                threading.Thread(target=_worker, args=(stop_event, *worker_args, results))
+                for _ in range(options["workers"])
+            ]
+
+        for worker in workers:
+            worker.start()
+
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop_event.set()
+            for worker in workers:
+                worker.join()
+
+        totals = sum(results or [], Counter())
+        summary = ", ".join(f"{count} {status}" for status, count in sorted(totals.items())) or "done"
+        self.stdout.write(self.style.SUCCESS(f"Workers stopped ({summary})"))
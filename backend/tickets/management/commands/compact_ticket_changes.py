@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tickets.changes import compact_changes, fold_versions
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete ticket change log entries older than the retention period; clients syncing from "
+        "before it are told to reload. Also folds the version counters of closed connections. "
+        "Run it daily, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.TICKET_CHANGES_RETENTION_DAYS,
+            help="Keep entries from this many past days",
+        )
+
+    def handle(self, *args, **options):
+        removed = compact_changes(timezone.now() - timedelta(days=options["days"]))
+        self.stdout.write(f"Removed {removed} change log entries")
+        self.stdout.write(f"Folded {fold_versions()} ticket version counters")
@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tickets.partitions import (
+    archive_tickets, drop_empty_partitions, ensure_partitions, month_start, oldest_unpartitioned,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain the monthly ticket partitions: create upcoming months, move rows out of the "
+        "default partition, archive old closed/resolved tickets and drop emptied months. "
+        "Run it daily, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=settings.TICKET_PARTITION_MONTHS_AHEAD,
+            help="Months to create past the current one",
+        )
+        parser.add_argument(
+            "--archive-after",
+            type=int,
+            default=settings.TICKET_ARCHIVE_AFTER_DAYS,
+            help="Archive closed/resolved tickets created more than this many days ago (0 skips archiving)",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000, help="Tickets archived per transaction")
+        parser.add_argument("--drop-empty", action="store_true", help="Drop past monthly partitions left empty")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        created = ensure_partitions(oldest_unpartitioned() or now, options["months_ahead"])
+        self.stdout.write(f"Created {len(created)} partitions" + (f": {', '.join(created)}" if created else ""))
+
+        if options["archive_after"]:
+            moved = archive_tickets(now - timedelta(days=options["archive_after"]), options["batch_size"])
+            self.stdout.write(f"Archived {moved} tickets")
+
+        if options["drop_empty"]:
+            dropped = drop_empty_partitions(month_start(now))
+            self.stdout.write(f"Dropped {len(dropped)} empty partitions" + (f": {', '.join(dropped)}" if dropped else ""))
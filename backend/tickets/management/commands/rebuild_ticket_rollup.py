@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from tickets.rollup import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily ticket rollup table from the ticket table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        buckets = rebuild_rollup(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} rollup buckets"))
@@ -0,0 +1,98 @@
+import json
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from tickets.classifier import classify_batch
+from tickets.models import Ticket
+from tickets.rollup import bucket_of, locked_rollup_values, move_deltas, rollup_key
+from tickets.signals import tickets_written
+
+
+class Command(BaseCommand):
+    help = "Reclassify every ticket with the LLM in streamed, batched chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=100)
+        parser.add_argument(
+            "--state-file",
+            default="reclassify_progress.json",
+            help="Where the last processed ticket id is checkpointed",
+        )
+        parser.add_argument("--restart", action="store_true", help="Ignore saved progress")
+        parser.add_argument("--dry-run", action="store_true", help="Classify without writing back")
+
+    def handle(self, *args, **options):
+        state_file = Path(options["state_file"])
+        last_id = 0
+        if state_file.exists() and not options["restart"]:
+            last_id = json.loads(state_file.read_text())["last_id"]
+            self.stdout.write(f"Resuming after ticket {last_id}")
+
+        classify = async_to_sync(classify_batch)
+        totals = Counter()
+
+        while True:
+            chunk = list(
+                Ticket.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .only("id", "description", "category", "priority", "status", "created_at")
+                [:options["chunk_size"]]
+            )
+            if not chunk:
+                break
+
+            results = classify([ticket.description for ticket in chunk])
+            changed = self.apply(chunk, results, totals, options["dry_run"])
+            totals["changed"] += changed
+
+            last_id = chunk[-1].id
+            state_file.write_text(json.dumps({"last_id": last_id}))
+            self.stdout.write(
+                f"Processed up to ticket {last_id}: "
+                f"{totals['classified']} classified, {totals['changed']} changed, {totals['failed']} failed"
+            )
+
+        state_file.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"Reclassified {totals['classified']} tickets "
+            f"({totals['changed']} changed, {totals['failed']} failed)"
+        ))
+
+    def apply(self, chunk, results, totals, dry_run):
+        updated = []
+        for ticket, result in zip(chunk, results):
+            if "error" in result:
+                totals["failed"] += 1
+                continue
+            totals["classified"] += 1
+
+            old_key = rollup_key(ticket)
+            ticket.category = result["suggested_category"]
+            ticket.priority = result["suggested_priority"]
+            if rollup_key(ticket) != old_key:
+                updated.append(ticket)
+
+        if updated and not dry_run:
+            now = timezone.now()
+            for ticket in updated:
+                ticket.updated_at = now
+            with transaction.atomic():
+                # Move the buckets the rows are in now; the chunk was read
+                # before the LLM calls and may have been edited since
+                persisted = locked_rollup_values([ticket.pk for ticket in updated])
+                updated = [ticket for ticket in updated if ticket.pk in persisted]
+                deltas = Counter()
+                for ticket in updated:
+                    values = persisted[ticket.pk]
+                    deltas.update(move_deltas(
+                        bucket_of(values),
+                        bucket_of({**values, "category": ticket.category, "priority": ticket.priority}),
+                    ))
+                Ticket.objects.bulk_update(updated, ["category", "priority", "updated_at"])
+                tickets_written(updated=updated, deltas=deltas, bulk=True)
+        return len(updated)
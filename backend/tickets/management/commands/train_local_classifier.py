@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.local_classifier import TARGETS, LocalClassifier
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Train the local fallback classifier from labelled tickets"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=settings.LOCAL_CLASSIFIER_PATH)
+        parser.add_argument("--max-features", type=int, default=20000)
+        parser.add_argument("--epochs", type=int, default=200)
+        parser.add_argument(
+            "--holdout",
+            type=int,
+            default=10,
+            help="Evaluate on every Nth ticket (0 trains on everything)",
+        )
+
+    def handle(self, *args, **options):
+        # Tickets still waiting on the queue only carry placeholder labels
+        rows = list(
+            Ticket.objects.exclude(classification_jobs__status__in=["pending", "running", "dead"])
+            .order_by("id")
+            .values_list("description", *TARGETS)
+        )
+        if not rows:
+            raise CommandError("No labelled tickets to train on")
+
+        holdout = options["holdout"]
+        train = [row for i, row in enumerate(rows) if not holdout or i % holdout]
+        test = [row for i, row in enumerate(rows) if holdout and not i % holdout]
+
+        started = time.perf_counter()
+        model = LocalClassifier.train(
+            [row[0] for row in train],
+            {target: [row[i + 1] for row in train] for i, target in enumerate(TARGETS)},
+            max_features=options["max_features"],
+            epochs=options["epochs"],
+        )
+        self.stdout.write(f"Trained on {len(train)} tickets in {time.perf_counter() - started:.1f}s")
+
+        if test:
+            started = time.perf_counter()
+            predictions = [model.predict(row[0]) for row in test]
+            per_item = (time.perf_counter() - started) / len(test) * 1000
+            for i, target in enumerate(TARGETS):
+                correct = sum(p[f"suggested_{target}"] == row[i + 1] for p, row in zip(predictions, test))
+                self.stdout.write(f"{target} accuracy: {correct / len(test):.1%} on {len(test)} held-out tickets")
+            self.stdout.write(f"Prediction latency: {per_item:.3f} ms")
+
+        model.save(options["path"])
+        self.stdout.write(self.style.SUCCESS(f"Saved model to {options['path']}"))
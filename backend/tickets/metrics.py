@@ -0,0 +1,312 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_request = ContextVar("tickets_request_metrics", default=None)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key, **extra):
+        pairs = list(zip(self.labelnames, key)) + list(extra.items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(self._key(labels), 0)
+
+    def _render_series(self, key, value):
+        return [f"{self.name}_total{self._labels(key)} {value}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames, buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (made cumulative on render), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def _render_series(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket in zip(self.buckets + ("+Inf",), counts):
+            cumulative += bucket
+            lines.append(f"{self.name}_bucket{self._labels(key, le=_format(bound))} {cumulative}")
+        lines.append(f"{self.name}_sum{self._labels(key)} {_format(total)}")
+        lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value):
+    return value if isinstance(value, str) else repr(float(value))
+
+
+REGISTRY = []
+
+REQUEST_DURATION = Histogram(
+    "tickets_http_request_duration_seconds", "Wall time per request.", ["view", "method"]
+)
+REQUESTS = Counter(
+    "tickets_http_requests", "Requests served.", ["view", "method", "status"]
+)
+DB_QUERIES = Histogram(
+    "tickets_db_queries_per_request", "SQL statements run per request.", ["view"], COUNT_BUCKETS
+)
+DB_DURATION = Histogram(
+    "tickets_db_duration_seconds", "Time spent in SQL per request.", ["view"]
+)
+SERIALIZER_DURATION = Histogram(
+    "tickets_serializer_duration_seconds", "Time spent serializing and rendering per request.", ["view"]
+)
+LLM_DURATION = Histogram(
+    "tickets_llm_request_duration_seconds", "LLM call latency, retries included.", ["view", "outcome"]
+)
+LLM_TOKENS = Counter(
+    "tickets_llm_tokens", "Tokens reported by the LLM API.", ["view", "type"]
+)
+CLASSIFY_CACHE_LOOKUPS = Counter(
+    "tickets_classify_cache_lookups", "Classification cache lookups by result.", ["result"]
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "tickets_response_cache_lookups", "Ticket response cache lookups by result.", ["action", "result"]
+)
+ADMISSION_REJECTIONS = Counter(
+    "tickets_admission_rejections", "Requests shed by admission control.", ["view", "reason"]
+)
+ADMISSION_WAIT = Histogram(
+    "tickets_admission_wait_seconds", "Time admitted requests spent queued for a slot.", ["view"]
+)
+
+
+def render_metrics():
+    """
+    Every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    for metric in REGISTRY:
+        metric.clear()
+
+
+class RequestMetrics:
+    """
+    What one request spent, filled in by the SQL wrapper and
+    `serializer_timer` blocks while the request runs.
+    """
+
+    def __init__(self, collect_sql):
+        self.view = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.statements = [] if collect_sql else None
+
+
+def _view_label(request_metrics):
+    return request_metrics.view if request_metrics and request_metrics.view else "-"
+
+
+@contextmanager
+def serializer_timer():
+    """
+    Add the time spent in the block to the current request's serializer
+    time. Does nothing outside a measured request.
+    """
+    current = _request.get()
+    if current is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        current.serializer_time += time.perf_counter() - started
+
+
+def record_llm_call(elapsed, outcome, usage=None):
+    """
+    Record one LLM call against the view that made it ("-" for workers and
+    commands).
+    """
+    if not settings.METRICS_ENABLED:
+        return
+    view = _view_label(_request.get())
+    LLM_DURATION.observe(elapsed, view=view, outcome=outcome)
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage and usage.get(kind):
+            LLM_TOKENS.inc(usage[kind], view=view, type=kind.removesuffix("_tokens"))
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    current = _request.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        current.queries += 1
+        current.sql_time += elapsed
+        if current.statements is not None:
+            current.statements.append((elapsed, sql))
+
+
+@receiver(connection_created)
+def _install_sql_wrapper(sender, connection, **kwargs):
+    # Installed on every connection so queries run from async views'
+    # sync_to_async threads are counted too. Inserted first, because
+    # execute_wrapper() blocks pop the last entry when they exit.
+    if settings.METRICS_ENABLED and _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _sql_wrapper)
+
+
+class MetricsMiddleware:
+    """
+    Record wall time, SQL count and time, and serializer time per view and
+    action. Removed from the stack entirely when ``METRICS_ENABLED`` is off.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        current, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request.reset(token)
+        self.finish(request, response, current, started)
+        return response
+
+    async def __acall__(self, request):
+        current, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request.reset(token)
+        self.finish(request, response, current, started)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current = _request.get()
+        if current is None:
+            return None
+        actions = getattr(view_func, "actions", None)
+        if actions:
+            # DRF viewset: name the action the method maps to
+            action = actions.get(request.method.lower(), request.method.lower())
+            current.view = f"{view_func.cls.__name__}.{action}"
+        else:
+            current.view = request.resolver_match.view_name or view_func.__name__
+        return None
+
+    def start(self):
+        current = RequestMetrics(collect_sql=settings.METRICS_SLOW_REQUEST_MS > 0)
+        return current, _request.set(current), time.perf_counter()
+
+    def finish(self, request, response, current, started):
+        elapsed = time.perf_counter() - started
+        view = current.view or "unmatched"
+        REQUEST_DURATION.observe(elapsed, view=view, method=request.method)
+        REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        DB_QUERIES.observe(current.queries, view=view)
+        DB_DURATION.observe(current.sql_time, view=view)
+        SERIALIZER_DURATION.observe(current.serializer_time, view=view)
+
+        slow_ms = settings.METRICS_SLOW_REQUEST_MS
+        if slow_ms and elapsed * 1000 >= slow_ms:
+            slowest = sorted(current.statements, key=lambda item: item[0], reverse=True)[:5]
+            logger.warning(
+                "Slow request %s %s (%s): %.1fms, %d queries in %.1fms, serializer %.1fms%s",
+                request.method,
+                request.get_full_path(),
+                view,
+                elapsed * 1000,
+                current.queries,
+                current.sql_time * 1000,
+                current.serializer_time * 1000,
+                "".join(f"\n  {seconds * 1000:.1f}ms {sql}" for seconds, sql in slowest),
+            )
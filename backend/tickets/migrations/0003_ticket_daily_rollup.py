@@ -0,0 +1,45 @@
+# Generated by Django 6.0.2 on 2026-10-17 20:31
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollup(apps, schema_editor):
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TicketDailyRollup = apps.get_model('tickets', 'TicketDailyRollup')
+    buckets = (
+        Ticket.objects.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'category', 'priority', 'status')
+        .annotate(count=Count('id'))
+    )
+    TicketDailyRollup.objects.bulk_create(
+        (TicketDailyRollup(**bucket) for bucket in buckets.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_ticket_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('category', models.CharField(choices=[('billing', 'Billing'), ('technical', 'Technical'), ('account', 'Account'), ('general', 'General')], max_length=20)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')], max_length=20)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('resolved', 'Resolved'), ('closed', 'Closed')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'category', 'priority', 'status'), name='ticket_rollup_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
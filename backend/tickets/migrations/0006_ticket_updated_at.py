@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-17 21:09
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0005_classification_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='ticketdailyrollup',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunSQL(
+            "UPDATE tickets_ticket SET updated_at = created_at",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['-updated_at'], name='ticket_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketdailyrollup',
+            index=models.Index(fields=['-updated_at'], name='rollup_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 6.0.2 on 2026-10-17 21:42
+
+from datetime import datetime, timedelta, timezone
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Partitions created up front past the current month; `partition_tickets`
+# keeps extending them
+MONTHS_AHEAD = 3
+
+
+def _month_start(moment):
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(month):
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def _rebuild_ticket_table(apps, schema_editor, partitioned):
+    """
+    Recreate tickets_ticket as a partitioned table (or back as a plain one)
+    and copy the rows over. The primary key of a partitioned table has to
+    include its partition columns, and the id default becomes a plain
+    sequence because partitions do not inherit identity columns before
+    Postgres 17.
+    """
+    Ticket = apps.get_model("tickets", "Ticket")
+    columns = ", ".join(
+        schema_editor.quote_name(field.column)
+        for field in Ticket._meta.concrete_fields
+        if not field.generated
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = 'tickets_ticket'"
+        )
+        # Recreated once the rows are in, which beats maintaining them row by row
+        index_defs = [
+            definition.replace(" ON ONLY ", " ON ")
+            for name, definition in cursor.fetchall()
+            if name != "tickets_ticket_pkey"
+        ]
+        cursor.execute("SELECT pg_get_serial_sequence('tickets_ticket', 'id')")
+        old_sequence = cursor.fetchone()[0]
+        cursor.execute(f"SELECT last_value, is_called FROM {old_sequence}")
+        last_value, is_called = cursor.fetchone()
+        cursor.execute("SELECT min(created_at), now() FROM tickets_ticket")
+        first, now = cursor.fetchone()
+
+    execute = schema_editor.execute
+    execute("ALTER TABLE tickets_ticket RENAME TO tickets_ticket_old")
+    execute("ALTER TABLE tickets_ticket_old DROP CONSTRAINT tickets_ticket_pkey")
+    if partitioned:
+        execute(
+            "CREATE TABLE tickets_ticket (LIKE tickets_ticket_old INCLUDING DEFAULTS INCLUDING GENERATED, "
+            "CONSTRAINT tickets_ticket_pkey PRIMARY KEY (id, created_at, archived)) PARTITION BY LIST (archived)"
+        )
+        execute(
+            "CREATE TABLE tickets_ticket_live PARTITION OF tickets_ticket FOR VALUES IN (false) "
+            "PARTITION BY RANGE (created_at)"
+        )
+        execute("CREATE TABLE tickets_ticket_live_default PARTITION OF tickets_ticket_live DEFAULT")
+        execute("CREATE TABLE tickets_ticket_archive PARTITION OF tickets_ticket FOR VALUES IN (true)")
+        month = _month_start(first or now)
+        last = _month_start(now)
+        for _ in range(MONTHS_AHEAD):
+            last = _next_month(last)
+        while month <= last:
+            upper = _next_month(month)
+            execute(
+                f"CREATE TABLE tickets_ticket_{month:%Y_%m} PARTITION OF tickets_ticket_live "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+            month = upper
+    else:
+        execute(
+            "CREATE TABLE tickets_ticket (LIKE tickets_ticket_old INCLUDING DEFAULTS INCLUDING GENERATED, "
+            "CONSTRAINT tickets_ticket_pkey PRIMARY KEY (id))"
+        )
+
+    execute("CREATE SEQUENCE tickets_ticket_id_new_seq OWNED BY tickets_ticket.id")
+    execute("ALTER TABLE tickets_ticket ALTER COLUMN id SET DEFAULT nextval('tickets_ticket_id_new_seq')")
+    execute("SELECT setval('tickets_ticket_id_new_seq', %s, %s)", [last_value, is_called])
+    execute(f"INSERT INTO tickets_ticket ({columns}) SELECT {columns} FROM tickets_ticket_old")
+    execute("DROP TABLE tickets_ticket_old")
+    execute("ALTER SEQUENCE tickets_ticket_id_new_seq RENAME TO tickets_ticket_id_seq")
+    for definition in index_defs:
+        execute(definition)
+
+
+def partition_ticket_table(apps, schema_editor):
+    _rebuild_ticket_table(apps, schema_editor, partitioned=True)
+
+
+def unpartition_ticket_table(apps, schema_editor):
+    _rebuild_ticket_table(apps, schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0006_ticket_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='archived',
+            field=models.BooleanField(default=False),
+        ),
+        # The jobs' foreign key cannot point at a partitioned table
+        migrations.AlterField(
+            model_name='classificationjob',
+            name='ticket',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='classification_jobs', to='tickets.ticket'),
+        ),
+        migrations.RunPython(partition_ticket_table, unpartition_ticket_table),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-17 21:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0007_ticket_partitioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='claimed_by',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(models.Case(models.When(priority='critical', then=models.Value(0)), models.When(priority='high', then=models.Value(1)), models.When(priority='medium', then=models.Value(2)), models.When(priority='low', then=models.Value(3)), default=models.Value(4)), models.F('created_at'), models.F('id'), condition=models.Q(('status', 'open')), name='ticket_claim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('status', 'in_progress')), fields=['lease_expires_at'], name='ticket_lease_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-17 22:19
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0008_ticket_claims'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.BigIntegerField()),
+                ('ticket_id', models.BigIntegerField(null=True)),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted'), ('compacted', 'Compacted')], max_length=10)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['transaction_id', 'id'], name='ticket_change_position_idx'), models.Index(fields=['changed_at'], name='ticket_change_changed_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-17 22:49
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_ticket_changes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='ticket_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ticketdailyrollup',
+            name='rollup_updated_idx',
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.2 on 2026-10-17 23:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0010_drop_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketVersion',
+            fields=[
+                ('slot', models.IntegerField(primary_key=True, serialize=False)),
+                ('count', models.BigIntegerField(default=0)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -1,4 +1,17 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import models, router, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+SEARCH_CONFIG = "english"
+
+# Order in which `tickets.dispatch.claim_tickets` hands out open tickets
+CLAIM_PRIORITY_ORDER = ("critical", "high", "medium", "low")
+CLAIM_PRIORITY_RANK = Case(
+    *(When(priority=priority, then=Value(rank)) for rank, priority in enumerate(CLAIM_PRIORITY_ORDER)),
+    default=Value(len(CLAIM_PRIORITY_ORDER)),
+)
 
 class Ticket(models.Model):
     CATEGORY_CHOICES = [
@@ -28,6 +41,164 @@ class Ticket(models.Model):
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="open")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set by `partition_tickets` on old closed/resolved tickets, which moves
+    # them to the archive partition (see migration 0007)
+    archived = models.BooleanField(default=False)
+    # Agent holding an in_progress ticket handed out by the claim endpoint,
+    # and when the ticket returns to the open pool unless renewed
+    claimed_by = models.CharField(max_length=100, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("title", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="ticket_created_idx"),
+            models.Index(fields=["status", "-created_at", "-id"], name="ticket_status_created_idx"),
+            models.Index(fields=["category", "-created_at", "-id"], name="ticket_category_created_idx"),
+            models.Index(fields=["priority", "-created_at", "-id"], name="ticket_priority_created_idx"),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="ticket_open_created_idx",
+                condition=models.Q(status="open"),
+            ),
+            models.Index(
+                CLAIM_PRIORITY_RANK, F("created_at"), F("id"),
+                name="ticket_claim_idx",
+                condition=models.Q(status="open"),
+            ),
+            models.Index(
+                fields=["lease_expires_at"],
+                name="ticket_lease_idx",
+                condition=models.Q(status="in_progress"),
+            ),
+            GinIndex(fields=["search_vector"], name="ticket_search_vector_idx"),
+            GinIndex(fields=["title"], name="ticket_title_trgm_idx", opclasses=["gin_trgm_ops"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The row, its rollup bucket and its change log entry commit together
+        with transaction.atomic(using=kwargs.get("using") or router.db_for_write(Ticket, instance=self)):
+            super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.title
+
+class TicketDailyRollup(models.Model):
+    day = models.DateField()
+    category = models.CharField(max_length=20, choices=Ticket.CATEGORY_CHOICES)
+    priority = models.CharField(max_length=20, choices=Ticket.PRIORITY_CHOICES)
+    status = models.CharField(max_length=20, choices=Ticket.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "category", "priority", "status"],
+                name="ticket_rollup_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.category}/{self.priority}/{self.status}: {self.count}"
+
+
+class ClassificationJob(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("skipped", "Skipped"),
+        ("dead", "Dead"),
+    ]
+
+    # No database constraint: a foreign key cannot reference the partitioned
+    # ticket table, whose primary key includes the partition columns
+    ticket = models.ForeignKey(
+        Ticket, on_delete=models.CASCADE, related_name="classification_jobs", db_constraint=False
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    # Ticket fields the suggestion may overwrite, and their values at enqueue time
+    fields = models.JSONField(default=list)
+    expected_category = models.CharField(max_length=20)
+    expected_priority = models.CharField(max_length=20)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["available_at", "id"],
+                name="job_pending_idx",
+                condition=models.Q(status="pending"),
+            ),
+            models.Index(
+                fields=["locked_at"],
+                name="job_running_idx",
+                condition=models.Q(status="running"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} for ticket {self.ticket_id} ({self.status})"
+
+
+class TicketChange(models.Model):
+    """
+    Append-only log of ticket writes behind the delta-sync endpoint. Entries
+    are read in ``(transaction_id, id)`` order: the writing transaction's
+    id, then insertion order. A ``compacted`` entry stands in for the
+    entries `tickets.changes.compact_changes` removed before it.
+    """
+
+    KIND_CHOICES = [
+        ("created", "Created"),
+        ("updated", "Updated"),
+        ("deleted", "Deleted"),
+        ("compacted", "Compacted"),
+    ]
+
+    transaction_id = models.BigIntegerField()
+    # Not a foreign key: deleted tickets keep their entries
+    ticket_id = models.BigIntegerField(null=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["transaction_id", "id"], name="ticket_change_position_idx"),
+            models.Index(fields=["changed_at"], name="ticket_change_changed_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} ticket {self.ticket_id} in transaction {self.transaction_id}"
+
+
+class TicketVersion(models.Model):
+    """
+    Counters every ticket write bumps inside its transaction (see
+    `tickets.changes.bump_version`). Their sum moves when a write commits,
+    whichever order writes commit in, so it marks what the list and stats
+    validators were built from. Each database connection bumps the row of
+    its backend pid, so writers never queue on one row lock; row 0 holds
+    the folded counts of connections that have gone away.
+    """
+
+    slot = models.IntegerField(primary_key=True)
+    count = models.BigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"Slot {self.slot}: {self.count}"
@@ -0,0 +1,218 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class TicketCursorPagination(BasePagination):
+    """
+    Keyset pagination over the active ordering with ``id`` as tie-breaker.
+
+    The cursor stores the ordering values of the boundary row, so every page
+    is a ``WHERE (created_at, id) < (...) ORDER BY ... LIMIT n`` query and
+    page N costs the same as page 1.
+    """
+
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.fields = {
+            term: self._field(queryset, term.lstrip('-')) for term in self.ordering
+        }
+        self.nullable = {term.lstrip('-'): field.null for term, field in self.fields.items()}
+
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            values, reverse = None, False
+        else:
+            values, reverse = cursor
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._invert(term) for term in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(ordering, values))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_previous = has_more
+            self.has_next = True
+        else:
+            self.has_previous = values is not None
+            self.has_next = has_more
+
+        return self.page
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Use the ordering requested through `OrderingFilter`, falling back to
+        the queryset's own ordering (e.g. search rank), and always finish
+        with ``id`` so the key is unique.
+        """
+        ordering = None
+        for filter_cls in getattr(view, 'filter_backends', []):
+            if issubclass(filter_cls, OrderingFilter):
+                ordering = filter_cls().get_ordering(request, queryset, view)
+                break
+
+        if not ordering:
+            ordering = queryset.query.order_by or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+
+        ordering = ['id' if term.lstrip('-') == 'pk' else term for term in ordering]
+        if not any(term.lstrip('-') == 'id' for term in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            raw_values = payload['v']
+            reverse = bool(payload.get('r'))
+            if len(raw_values) != len(self.ordering):
+                raise ValueError
+            values = [
+                self.fields[term].to_python(value)
+                for term, value in zip(self.ordering, raw_values)
+            ]
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError,
+                binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return values, reverse
+
+    def encode_cursor(self, instance, reverse):
+        values = []
+        for term in self.ordering:
+            name = term.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps({'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _after(self, ordering, values):
+        """
+        Build ``(a, b, c) > (x, y, z)`` for a mixed-direction ordering as
+        ``a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)``.
+
+        NULLs in nullable columns count as larger than any value, matching
+        Postgres' default NULLS LAST ascending and NULLS FIRST descending.
+        """
+        condition = Q()
+        equal = Q()
+        for term, value in zip(ordering, values):
+            name = term.lstrip('-')
+            descending = term.startswith('-')
+            if value is None:
+                # Only non-NULL rows follow a NULL, and only when descending
+                beyond = Q(**{f'{name}__isnull': False}) if descending else None
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                beyond = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+                if not descending and self.nullable[name]:
+                    beyond |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            if beyond is not None:
+                condition |= equal & beyond
+            equal &= same
+        return condition
+
+    @staticmethod
+    def _field(queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    @staticmethod
+    def _invert(term):
+        return term[1:] if term.startswith('-') else '-' + term
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
@@ -0,0 +1,26 @@
+import json
+
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON lazily, one object per line, so large
+    imports never hold the whole body as Python objects. Lines that are not
+    JSON are passed through as strings for the serializer to reject.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return self._lines(stream) if stream is not None else iter(())
+
+    def _lines(self, stream):
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield line.decode("utf-8", "replace")
@@ -0,0 +1,170 @@
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .changes import change_log_cte
+from .models import Ticket
+
+# tickets_ticket is LIST-partitioned on ``archived``: live tickets go to a
+# sub-table RANGE-partitioned by month of ``created_at`` (plus a default
+# partition for months nobody created yet), archived ones to a single archive
+# partition that list, search and export queries never touch
+TICKET_TABLE = Ticket._meta.db_table
+LIVE_TABLE = f"{TICKET_TABLE}_live"
+LIVE_DEFAULT = f"{TICKET_TABLE}_live_default"
+ARCHIVE_TABLE = f"{TICKET_TABLE}_archive"
+
+ARCHIVE_STATUSES = ("closed", "resolved")
+
+MONTH_RE = re.compile(rf"^{TICKET_TABLE}_(\d{{4}})_(\d{{2}})$")
+
+
+def month_start(moment):
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_month(month):
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def partition_name(month):
+    return f"{TICKET_TABLE}_{month:%Y_%m}"
+
+
+def month_partitions():
+    """
+    ``{month: table}`` for every monthly partition of the live tier.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [LIVE_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = MONTH_RE.match(name)
+        if match:
+            partitions[datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)] = name
+    return partitions
+
+
+def oldest_unpartitioned():
+    """
+    ``created_at`` of the oldest ticket sitting in the default partition, or
+    None when it is empty.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT min(created_at) FROM {connection.ops.quote_name(LIVE_DEFAULT)}")
+        return cursor.fetchone()[0]
+
+
+def ensure_partitions(start, months_ahead=None):
+    """
+    Create the missing monthly partitions from ``start``'s month through
+    ``months_ahead`` (default ``TICKET_PARTITION_MONTHS_AHEAD``) months past
+    the current one, and return their names.
+    """
+    if months_ahead is None:
+        months_ahead = settings.TICKET_PARTITION_MONTHS_AHEAD
+    last = month_start(timezone.now())
+    for _ in range(months_ahead):
+        last = next_month(last)
+    existing = month_partitions()
+    created = []
+    month = month_start(start)
+    while month <= last:
+        if month not in existing:
+            create_month_partition(month)
+            created.append(partition_name(month))
+        month = next_month(month)
+    return created
+
+
+def create_month_partition(month):
+    """
+    Add the partition for ``month``. Rows that already landed in the default
+    partition for that month are moved into it, as Postgres refuses to
+    attach a range the default partition still holds rows for.
+    """
+    upper = next_month(month)
+    qn = connection.ops.quote_name
+    name, live, default = qn(partition_name(month)), qn(LIVE_TABLE), qn(LIVE_DEFAULT)
+    in_month = "created_at >= %s AND created_at < %s"
+    # Bounds are our own datetimes; DDL does not take bound parameters
+    bounds = f"FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+    columns = ", ".join(qn(field.column) for field in Ticket._meta.concrete_fields if not field.generated)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_month})", [month, upper])
+        if not cursor.fetchone()[0]:
+            cursor.execute(f"CREATE TABLE {name} PARTITION OF {live} FOR VALUES {bounds}")
+            return
+        cursor.execute(f"ALTER TABLE {live} DETACH PARTITION {default}")
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {live} FOR VALUES {bounds}")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {default} WHERE {in_month} RETURNING *) "
+            f"INSERT INTO {name} ({columns}) SELECT {columns} FROM moved",
+            [month, upper],
+        )
+        cursor.execute(f"ALTER TABLE {live} ATTACH PARTITION {default} DEFAULT")
+
+
+def drop_empty_partitions(before):
+    """
+    Drop monthly partitions that ended before ``before`` and hold no rows,
+    typically once archiving has emptied them. Returns their names.
+    """
+    qn = connection.ops.quote_name
+    dropped = []
+    for month, name in sorted(month_partitions().items()):
+        if next_month(month) > before:
+            continue
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Lock first so no row can arrive between the check and the drop
+            cursor.execute(f"LOCK TABLE {qn(name)} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {qn(name)})")
+            if cursor.fetchone()[0]:
+                continue
+            cursor.execute(f"DROP TABLE {qn(name)}")
+        dropped.append(name)
+    return dropped
+
+
+def archive_tickets(before, batch_size=5000):
+    """
+    Move closed and resolved tickets created before ``before`` to the archive
+    partition, ``batch_size`` per transaction, and return how many moved.
+    ``updated_at`` is bumped so clients' copies of ticket lists revalidate;
+    the stats rollup counts both tiers and needs no change.
+    """
+    # Imported here because the signal handlers import this module
+    from .signals import tickets_written
+
+    table = connection.ops.quote_name(TICKET_TABLE)
+    moved = 0
+    while True:
+        # Synced clients see archived tickets as updates with archived set
+        logged, log_params = change_log_cte("moved", "updated")
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH batch AS ("
+                f"SELECT id, created_at FROM {table} "
+                f"WHERE NOT archived AND status = ANY(%s) AND created_at < %s "
+                f"ORDER BY created_at LIMIT %s FOR UPDATE SKIP LOCKED), "
+                f"moved AS (UPDATE {table} SET archived = true, updated_at = %s FROM batch "
+                f"WHERE {table}.id = batch.id AND {table}.created_at = batch.created_at AND NOT {table}.archived "
+                f"RETURNING {table}.id), {logged} "
+                f"SELECT count(*) FROM moved",
+                [list(ARCHIVE_STATUSES), before, batch_size, timezone.now(), *log_params],
+            )
+            count = cursor.fetchone()[0]
+            tickets_written(updated=count)
+        moved += count
+        if count < batch_size:
+            return moved
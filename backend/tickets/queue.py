@@ -0,0 +1,173 @@
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .classifier import classify_batch
+from .models import ClassificationJob, Ticket
+from .rollup import move_deltas, rollup_key
+from .signals import tickets_written
+
+logger = logging.getLogger(__name__)
+
+# Values given to fields the client left for the classifier to fill in
+PLACEHOLDERS = {"category": "general", "priority": "medium"}
+
+
+def enqueue(ticket, fields):
+    """
+    Queue ``ticket`` so a worker writes the suggested values of ``fields``
+    back, unless someone edits the ticket first.
+    """
+    return ClassificationJob.objects.create(
+        ticket=ticket,
+        fields=list(fields),
+        expected_category=ticket.category,
+        expected_priority=ticket.priority,
+    )
+
+
+def claim_jobs(batch_size):
+    """
+    Lock up to ``batch_size`` due jobs with ``SELECT ... FOR UPDATE SKIP
+    LOCKED`` and mark them running, so concurrent workers never share a job.
+    Running jobs whose worker went quiet past the visibility timeout are
+    claimed again.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.CLASSIFY_QUEUE_VISIBILITY_TIMEOUT)
+    with transaction.atomic():
+        jobs = list(
+            ClassificationJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status="pending", available_at__lte=now)
+                | Q(status="running", locked_at__lt=stale)
+            )
+            .order_by("available_at", "id")[:batch_size]
+        )
+        if not jobs:
+            return []
+        ClassificationJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status="running", locked_at=now
+        )
+    return list(
+        ClassificationJob.objects.filter(pk__in=[job.pk for job in jobs])
+        .select_related("ticket")
+        .order_by("id")
+    )
+
+
+def process_jobs(jobs):
+    """
+    Classify the descriptions of ``jobs`` in one batch and settle each job.
+    Returns a count of outcomes keyed by final status.
+    """
+    outcomes = Counter()
+    results = async_to_sync(classify_batch)([job.ticket.description for job in jobs])
+    for job, result in zip(jobs, results):
+        if "error" in result:
+            outcomes[fail(job, result["error"])] += 1
+        else:
+            outcomes[write_back(job, result)] += 1
+    return outcomes
+
+
+def write_back(job, result):
+    """
+    Apply the suggestion with a compare-and-set on the values recorded at
+    enqueue time; a ticket edited in the meantime is left alone.
+    """
+    ticket = job.ticket
+    updates = {field: result[f"suggested_{field}"] for field in job.fields}
+    updates["updated_at"] = timezone.now()
+
+    with transaction.atomic():
+        applied = Ticket.objects.filter(
+            pk=ticket.pk,
+            category=job.expected_category,
+            priority=job.expected_priority,
+            status=ticket.status,
+        ).update(**updates)
+
+        if applied:
+            # The compare-and-set pinned the values the row moved out of
+            ticket.category, ticket.priority = job.expected_category, job.expected_priority
+            old_key = rollup_key(ticket)
+            for field, value in updates.items():
+                setattr(ticket, field, value)
+            tickets_written(updated=[ticket], deltas=move_deltas(old_key, rollup_key(ticket)))
+            finish(job, "done")
+        else:
+            finish(job, "skipped", "Ticket changed since it was queued")
+    return job.status
+
+
+def fail(job, error):
+    """
+    Schedule a retry with exponential backoff, or dead-letter the job once
+    it has used ``CLASSIFY_QUEUE_MAX_ATTEMPTS``.
+    """
+    job.attempts += 1
+    job.last_error = error
+    job.locked_at = None
+    if job.attempts >= settings.CLASSIFY_QUEUE_MAX_ATTEMPTS:
+        job.status = "dead"
+    else:
+        job.status = "pending"
+        delay = settings.CLASSIFY_QUEUE_RETRY_DELAY * (2 ** (job.attempts - 1))
+        job.available_at = timezone.now() + timedelta(seconds=delay)
+    job.save(update_fields=["attempts", "last_error", "locked_at", "status", "available_at", "updated_at"])
+    return job.status
+
+
+def finish(job, status, error=""):
+    job.attempts += 1
+    job.status = status
+    job.last_error = error
+    job.locked_at = None
+    job.save(update_fields=["attempts", "status", "last_error", "locked_at", "updated_at"])
+
+
+def requeue_dead():
+    return ClassificationJob.objects.filter(status="dead").update(
+        status="pending", attempts=0, available_at=timezone.now(), locked_at=None
+    )
+
+
+def queue_depth():
+    """
+    Return the number of jobs in each status.
+    """
+    counts = dict(
+        ClassificationJob.objects.order_by()
+        .values_list("status")
+        .annotate(count=Count("id"))
+    )
+    return {status: counts.get(status, 0) for status, _ in ClassificationJob.STATUS_CHOICES}
+
+
+def run_worker(stop_event, batch_size, poll_interval, drain=False):
+    """
+    Claim and process jobs until ``stop_event`` is set. With ``drain`` the
+    loop also ends as soon as no job is due.
+    """
+    processed = Counter()
+    while not stop_event.is_set():
+        jobs = claim_jobs(batch_size)
+        if jobs:
+            try:
+                processed.update(process_jobs(jobs))
+            except Exception:
+                logger.exception("Classification batch failed")
+                for job in jobs:
+                    fail(job, "Worker error")
+        elif drain:
+            break
+        else:
+            stop_event.wait(poll_interval)
+    return processed
@@ -0,0 +1,170 @@
+import hashlib
+import threading
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.response import Response
+
+from .classification_cache import DjangoCacheBackend, LRUBackend
+from .conditional import tickets_version
+from .db_router import read_alias
+from .metrics import RESPONSE_CACHE_LOOKUPS
+
+class SharedResponseBackend(DjangoCacheBackend):
+    key_prefix = "tickets:responses:"
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+class ResponseCache:
+    """
+    Ticket read responses keyed by path, normalized query string and the
+    ticket version (see `tickets.changes.read_version`). Every committed
+    ticket write, from whichever process, moves the version, which orphans
+    all entries at once; the backend ages them out. Concurrent
+    misses on one key wait for the first one's result instead of all
+    running the query.
+    """
+
+    def __init__(self, backend, wait_timeout):
+        self.backend = backend
+        self.wait_timeout = wait_timeout
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def key(self, request):
+        # Blank filters are ignored by the view, and parameter order never matters
+        params = sorted(
+            (name, value) for name, values in request.query_params.lists() for value in values if value
+        )
+        material = "\0".join([
+            tickets_version(request)[0],
+            # A lagging replica's answer is kept apart from the primary's
+            read_alias() or "",
+            request.scheme,
+            request.get_host(),
+            request.path,
+            urlencode(params),
+        ])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get_or_compute(self, key, compute, action):
+        """
+        Return the cached value for ``key``, or call ``compute`` once for all
+        concurrent callers and cache what it returns unless that is None.
+        """
+        value = self.backend.get(key)
+        if value is not None:
+            self._count("hit", action)
+            return value
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait(self.wait_timeout)
+            if flight.value is not None:
+                self._count("coalesced", action)
+                return flight.value
+            # The first caller failed or is taking too long; go it alone
+            self._count("miss", action)
+            return compute()
+
+        self._count("miss", action)
+        try:
+            flight.value = compute()
+            if flight.value is not None:
+                self.backend.set(key, flight.value)
+            return flight.value
+        finally:
+            flight.done.set()
+            with self._lock:
+                del self._flights[key]
+
+    def stats(self):
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.coalesced) / total, 4) if total else 0.0,
+        }
+
+    def clear(self):
+        self.backend.clear()
+        with self._lock:
+            self.hits = self.misses = self.coalesced = 0
+
+    def _count(self, result, action):
+        with self._lock:
+            if result == "hit":
+                self.hits += 1
+            elif result == "coalesced":
+                self.coalesced += 1
+            else:
+                self.misses += 1
+        if settings.METRICS_ENABLED:
+            RESPONSE_CACHE_LOOKUPS.inc(action=action, result=result)
+
+
+def cached_response(method):
+    """
+    Serve a viewset read from the response cache. Only 200 responses are
+    stored; the response data is cached before rendering, so every format
+    shares one entry.
+    """
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        response_cache = get_response_cache()
+        if response_cache is None:
+            return method(view, request, *args, **kwargs)
+
+        computed = []
+
+        def compute():
+            response = method(view, request, *args, **kwargs)
+            computed.append(response)
+            return response.data if response.status_code == 200 else None
+
+        data = response_cache.get_or_compute(response_cache.key(request), compute, view.action)
+        return computed[0] if computed else Response(data)
+    return wrapper
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    """
+    Return the process-wide cache configured by ``TICKET_RESPONSE_CACHE_*``,
+    or None when it is disabled.
+    """
+    global _response_cache
+    if _response_cache is None and settings.TICKET_RESPONSE_CACHE_BACKEND != "none":
+        if settings.TICKET_RESPONSE_CACHE_BACKEND == "django":
+            backend = SharedResponseBackend(
+                settings.TICKET_RESPONSE_CACHE_ALIAS, settings.TICKET_RESPONSE_CACHE_TTL
+            )
+        else:
+            backend = LRUBackend(settings.TICKET_RESPONSE_CACHE_MAX_ENTRIES, settings.TICKET_RESPONSE_CACHE_TTL)
+        _response_cache = ResponseCache(backend, settings.TICKET_RESPONSE_CACHE_WAIT)
+    return _response_cache
+
+
+@receiver(setting_changed)
+def _reset_response_cache(setting, **kwargs):
+    # Any setting may shape the responses (search backend, fast read path...)
+    global _response_cache
+    _response_cache = None
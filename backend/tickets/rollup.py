@@ -0,0 +1,109 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .changes import bump_version
+from .events import publish_on_commit
+from .models import Ticket, TicketDailyRollup
+
+ROLLUP_KEY_FIELDS = ("created_at", "category", "priority", "status")
+
+
+def rollup_key(ticket):
+    """
+    Return the ``(day, category, priority, status)`` bucket of ``ticket``, or
+    None when any of those fields was not loaded.
+    """
+    return bucket_of(ticket.__dict__)
+
+
+def bucket_of(values):
+    """
+    The rollup bucket of a mapping of `ROLLUP_KEY_FIELDS` values, or None
+    when any is missing.
+    """
+    if any(values.get(field) is None for field in ROLLUP_KEY_FIELDS):
+        return None
+    created_at = values["created_at"]
+    if timezone.is_aware(created_at):
+        created_at = timezone.localtime(created_at)
+    return (created_at.date(), values["category"], values["priority"], values["status"])
+
+
+def apply_rollup_deltas(deltas):
+    """
+    Add each ``{key: delta}`` to its rollup bucket in a single upsert, stamp
+    the touched buckets with the current time and announce the deltas to
+    connected dashboards.
+    """
+    # Sorted so concurrent writers lock shared buckets in the same order and
+    # cannot deadlock
+    rows = sorted((key, delta) for key, delta in deltas.items() if delta)
+    if not rows:
+        return
+
+    table = connection.ops.quote_name(TicketDailyRollup._meta.db_table)
+    placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(rows))
+    now = timezone.now()
+    params = []
+    for (day, category, priority, status), delta in rows:
+        params.extend([day, category, priority, status, delta, now])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (day, category, priority, status, count, updated_at) "
+            f"VALUES {placeholders} "
+            f"ON CONFLICT (day, category, priority, status) "
+            f"DO UPDATE SET count = {table}.count + EXCLUDED.count, updated_at = EXCLUDED.updated_at",
+            params,
+        )
+    publish_on_commit(stats=dict(rows))
+
+
+def rebuild_rollup(batch_size=1000):
+    """
+    Recompute every rollup bucket from the ticket table. Returns the number
+    of buckets written.
+    """
+    buckets = (
+        Ticket.objects.order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values("day", "category", "priority", "status")
+        .annotate(count=Count("id"))
+    )
+    with transaction.atomic():
+        TicketDailyRollup.objects.all().delete()
+        created = TicketDailyRollup.objects.bulk_create(
+            (TicketDailyRollup(**bucket) for bucket in buckets.iterator()),
+            batch_size=batch_size,
+        )
+        bump_version()
+    return len(created)
+
+
+def locked_rollup_values(ticket_ids):
+    """
+    Lock the rows of ``ticket_ids`` and return their `ROLLUP_KEY_FIELDS`
+    values by id, as committed now rather than as some copy was loaded: a
+    concurrent write may have moved a ticket to another bucket since. Call it
+    inside the transaction that writes them.
+    """
+    rows = Ticket.objects.select_for_update().filter(pk__in=ticket_ids).values("id", *ROLLUP_KEY_FIELDS)
+    return {row.pop("id"): row for row in rows}
+
+
+def move_deltas(old_key, new_key):
+    """
+    Rollup deltas for a ticket moving from bucket ``old_key`` to ``new_key``;
+    None stands for no bucket (created, deleted or not loaded).
+    """
+    deltas = Counter()
+    if old_key != new_key:
+        if old_key is not None:
+            deltas[old_key] -= 1
+        if new_key is not None:
+            deltas[new_key] += 1
+    return deltas
@@ -1,7 +1,165 @@
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from .bulk import BULK_SET_FIELDS, bulk_create_tickets
+from .metrics import serializer_timer
 from .models import Ticket
 
+
+class BulkTicketListSerializer(serializers.ListSerializer):
+    """
+    Validates every item on its own so one bad row does not sink the batch:
+    valid items become ``validated_data`` and the rest are kept in
+    ``item_errors`` by position. Saving issues a single multi-row INSERT.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+        self.item_errors = {}
+        self.valid_indexes = []
+        validated = []
+        for index, item in enumerate(data):
+            try:
+                validated.append(self.run_child_validation(item))
+            except serializers.ValidationError as exc:
+                self.item_errors[index] = exc.detail
+            else:
+                self.valid_indexes.append(index)
+        return validated
+
+    def create(self, validated_data):
+        # ``queued_fields`` is keyed by input position; map it onto the valid items
+        queued = self.context.get("queued_fields") or {}
+        queued_fields = {
+            position: queued[index]
+            for position, index in enumerate(self.valid_indexes)
+            if index in queued
+        }
+        return bulk_create_tickets([Ticket(**item) for item in validated_data], queued_fields)
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
 class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
-        fields = "__all__"
\ No newline at end of file
+        exclude = ["search_vector"]
+        read_only_fields = ["archived", "claimed_by", "lease_expires_at"]
+        list_serializer_class = BulkTicketListSerializer
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class TicketRowEncoder:
+    """
+    Turns ``values()`` rows into the dicts `TicketSerializer` would return.
+    The per-field converters are looked up once, and fields whose database
+    value is already its JSON value are copied as is.
+    """
+
+    passthrough = (serializers.CharField, serializers.ChoiceField, serializers.IntegerField)
+
+    def __init__(self, fields):
+        serializer_fields = TicketSerializer().fields
+        self.fields = fields
+        self.converters = [
+            (name, self.converter(serializer_fields[name]))
+            for name in fields
+            if not isinstance(serializer_fields[name], self.passthrough)
+        ]
+
+    @staticmethod
+    def converter(field):
+        """
+        Return a function rendering one value of ``field``. ISO 8601
+        datetimes get a specialised version with the timezone resolved once.
+        """
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        if not isinstance(field, serializers.DateTimeField) or output_format is None \
+                or output_format.lower() != "iso-8601":
+            return field.to_representation
+        field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+        if field_timezone is None:
+            return field.to_representation
+
+        def convert(value):
+            value = value.astimezone(field_timezone).isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+        return convert
+
+    def encode(self, row):
+        data = {name: row[name] for name in self.fields}
+        for name, convert in self.converters:
+            if data[name] is not None:
+                data[name] = convert(data[name])
+        return data
+
+    def encode_many(self, rows):
+        with serializer_timer():
+            return [self.encode(row) for row in rows]
+
+
+class TicketBulkFilterSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    category = serializers.ChoiceField(choices=Ticket.CATEGORY_CHOICES, required=False)
+    priority = serializers.ChoiceField(choices=Ticket.PRIORITY_CHOICES, required=False)
+    status = serializers.ChoiceField(choices=Ticket.STATUS_CHOICES, required=False)
+    created_before = serializers.DateTimeField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("At least one filter is required")
+        return attrs
+
+
+class TicketBulkSetSerializer(serializers.Serializer):
+    category = serializers.ChoiceField(choices=Ticket.CATEGORY_CHOICES, required=False)
+    priority = serializers.ChoiceField(choices=Ticket.PRIORITY_CHOICES, required=False)
+    status = serializers.ChoiceField(choices=Ticket.STATUS_CHOICES, required=False)
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict) and set(data) - set(BULK_SET_FIELDS):
+            raise serializers.ValidationError(f"Only {', '.join(BULK_SET_FIELDS)} can be set in bulk")
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Nothing to set")
+        return attrs
+
+
+class TicketBulkUpdateSerializer(serializers.Serializer):
+    filter = TicketBulkFilterSerializer()
+    set = TicketBulkSetSerializer()
+
+
+class TicketLeaseSerializer(serializers.Serializer):
+    agent = serializers.CharField(max_length=100)
+    lease_seconds = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_lease_seconds(self, value):
+        if value > settings.TICKET_CLAIM_MAX_LEASE_SECONDS:
+            raise serializers.ValidationError(
+                f"Ensure this value is less than or equal to {settings.TICKET_CLAIM_MAX_LEASE_SECONDS}."
+            )
+        return value
+
+
+class TicketClaimSerializer(TicketLeaseSerializer):
+    count = serializers.IntegerField(min_value=1, default=1)
+    category = serializers.ChoiceField(choices=Ticket.CATEGORY_CHOICES, required=False)
+
+    def validate_count(self, value):
+        if value > settings.TICKET_CLAIM_MAX_BATCH:
+            raise serializers.ValidationError(
+                f"Ensure this value is less than or equal to {settings.TICKET_CLAIM_MAX_BATCH}."
+            )
+        return value
@@ -0,0 +1,104 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .changes import bump_version, record_changes
+from .events import ticket_event, tickets_bulk_event
+from .models import Ticket
+from .partitions import ARCHIVE_STATUSES
+from .rollup import (
+    ROLLUP_KEY_FIELDS, apply_rollup_deltas, bucket_of, locked_rollup_values, move_deltas, rollup_key,
+)
+from .similarity import index_tickets, unindex_ticket
+
+
+def tickets_written(created=(), updated=(), deleted=(), deltas=None, bulk=False):
+    """
+    Fan a write to the ticket table out to everything derived from it: the
+    rollup buckets (``deltas``), the change log, the event stream, the
+    similarity index and the ticket version that cached stats and responses
+    are keyed by. Call it inside the transaction that wrote the tickets.
+
+    ``created``, ``updated`` and ``deleted`` hold the tickets written, or a
+    count for set-based statements that did not load the rows and logged
+    their changes with `change_log_cte`. ``bulk`` announces loaded tickets
+    with one notice per kind instead of an event each.
+    """
+    if deltas:
+        apply_rollup_deltas(deltas)
+    for kind, tickets in (("created", created), ("updated", updated), ("deleted", deleted)):
+        if isinstance(tickets, int):
+            tickets_bulk_event(kind, tickets)
+            continue
+        if not tickets:
+            continue
+        record_changes(kind, [ticket.pk for ticket in tickets])
+        if bulk:
+            tickets_bulk_event(kind, len(tickets))
+        else:
+            for ticket in tickets:
+                ticket_event(kind, ticket)
+        if kind == "deleted":
+            for ticket in tickets:
+                unindex_ticket(ticket.pk)
+            continue
+        # Only new text needs re-embedding; a status change leaves it be
+        changed = [ticket for ticket in tickets if kind == "created" or _text(ticket) != ticket._indexed_text]
+        index_tickets(changed)
+        for ticket in tickets:
+            ticket._rollup_key = rollup_key(ticket)
+            ticket._indexed_text = _text(ticket)
+    bump_version()
+
+
+def _text(ticket):
+    values = ticket.__dict__
+    return values.get("title"), values.get("description")
+
+
+@receiver(post_init, sender=Ticket)
+def ticket_loaded(sender, instance, **kwargs):
+    # Remember the persisted bucket and text so a later save can tell what
+    # moved
+    instance._rollup_key = rollup_key(instance) if instance.pk else None
+    instance._indexed_text = _text(instance)
+
+
+@receiver(pre_save, sender=Ticket)
+def ticket_saving(sender, instance, update_fields=None, **kwargs):
+    # A reopened ticket leaves the archive partition
+    if instance.archived and instance.status not in ARCHIVE_STATUSES:
+        instance.archived = False
+    # and an agent's claim ends once the ticket leaves in_progress
+    if instance.status != "in_progress":
+        instance.claimed_by = ""
+        instance.lease_expires_at = None
+
+    # The bucket move, taken from the row as committed rather than as this
+    # copy was loaded, so concurrent saves never both take the same ticket
+    # out of one bucket
+    instance._rollup_move = None
+    fields = [field for field in ROLLUP_KEY_FIELDS if update_fields is None or field in update_fields]
+    if not instance._state.adding and fields:
+        persisted = locked_rollup_values([instance.pk]).get(instance.pk)
+        if persisted is not None:
+            saved = {field: getattr(instance, field) for field in fields}
+            instance._rollup_move = (bucket_of(persisted), bucket_of({**persisted, **saved}))
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, **kwargs):
+    if created:
+        tickets_written(created=[instance], deltas=move_deltas(None, rollup_key(instance)))
+    else:
+        tickets_written(updated=[instance], deltas=move_deltas(*(instance._rollup_move or (None, None))))
+
+
+@receiver(pre_delete, sender=Ticket)
+def ticket_deleting(sender, instance, **kwargs):
+    persisted = locked_rollup_values([instance.pk]).get(instance.pk)
+    instance._rollup_key = bucket_of(persisted) if persisted is not None else None
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    tickets_written(deleted=[instance], deltas=move_deltas(instance._rollup_key, None))
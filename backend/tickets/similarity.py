@@ -0,0 +1,366 @@
+import os
+import re
+import threading
+import zlib
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .changes import ChangesCompacted, current_position, read_changes
+from .models import Ticket
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+SHINGLE_WORDS = 2
+# 20 bands of 3 rows: a pair at Jaccard 0.6 shares a band 99% of the time,
+# one at 0.2 only 15% of the time
+BANDS = 20
+ROWS = 3
+NUM_PERM = BANDS * ROWS
+FORMAT_VERSION = 2
+# Most entries read from one band's bucket per lookup
+MAX_BUCKET_SCAN = 1000
+# Change log entries read per query while catching up
+CATCH_UP_BATCH = 1000
+
+SIMILAR_FIELDS = ("id", "title", "category", "priority", "status", "created_at")
+
+# Fixed seed: band keys in a saved index must match the ones computed later
+_rng = np.random.default_rng(0x7E7C)
+_MULTIPLIERS = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_OFFSETS = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_BAND_MIX = _rng.integers(1, 2**63, ROWS, dtype=np.uint64) | np.uint64(1)
+
+
+def shingles(*texts):
+    """
+    The set of adjacent word pairs in ``texts``; a text shorter than that is
+    one shingle of its own.
+    """
+    words = WORD_RE.findall(" ".join(texts).lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def band_keys(shingle_sets):
+    """
+    MinHash every set with ``NUM_PERM`` multiply-shift hashes and fold each
+    band of ``ROWS`` minimums into one uint32 key. Returns ``[len, BANDS]``.
+    """
+    lengths = [len(shingle_set) for shingle_set in shingle_sets]
+    hashes = np.fromiter(
+        (zlib.crc32(shingle.encode()) for shingle_set in shingle_sets for shingle in shingle_set),
+        dtype=np.uint64,
+        count=sum(lengths),
+    )
+    # uint64 arithmetic wraps, which is what multiply-shift hashing wants
+    permuted = (_MULTIPLIERS[:, None] * hashes[None, :] + _OFFSETS[:, None]) >> np.uint64(32)
+    starts = np.cumsum([0] + lengths[:-1])
+    signatures = np.minimum.reduceat(permuted, starts, axis=1).T
+    bands = signatures.reshape(len(shingle_sets), BANDS, ROWS)
+    return ((bands * _BAND_MIX).sum(axis=2) >> np.uint64(32)).astype(np.uint32)
+
+
+class SimilarityIndex:
+    """
+    MinHash/LSH index over ticket titles and descriptions. The bulk-built
+    part is a handful of flat arrays, sorted per band so a lookup is one
+    binary search per band; tickets saved since the build live in small
+    per-band dicts next to it.
+
+    ``position`` is the change log position the index is current up to and
+    ``synced_at`` when it got there; both are None until the first catch-up
+    of an index that was never built.
+    """
+
+    def __init__(self, ids, keys, rows, built_through, position=None, synced_at=None):
+        self.ids = ids  # int64 [n]
+        self.keys = keys  # uint32 [BANDS, n], sorted within each band
+        self.rows = rows  # int32 [BANDS, n], position in ids of each key
+        self.built_through = built_through
+        self.position = position
+        self.synced_at = synced_at
+        self._added = {}
+        self._buckets = [defaultdict(set) for _ in range(BANDS)]
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            np.zeros(0, np.int64), np.zeros((BANDS, 0), np.uint32), np.zeros((BANDS, 0), np.int32), 0
+        )
+
+    @classmethod
+    def build(cls, rows, batch_size=2000):
+        """
+        Index ``rows`` of ``(id, title, description)``, hashing ``batch_size``
+        tickets per NumPy pass.
+        """
+        rows = iter(rows)
+        id_parts, key_parts = [], []
+        while batch := list(islice(rows, batch_size)):
+            id_parts.append(np.array([row[0] for row in batch], dtype=np.int64))
+            key_parts.append(band_keys([shingles(title, description) for _, title, description in batch]))
+        if not id_parts:
+            return cls.empty()
+        ids = np.concatenate(id_parts)
+        keys = np.concatenate(key_parts).T
+        order = np.argsort(keys, axis=1, kind="stable").astype(np.int32)
+        return cls(ids, np.take_along_axis(keys, order, axis=1), order, int(ids.max()))
+
+    def __len__(self):
+        return len(self.ids) + sum(ticket_id > self.built_through for ticket_id in self._added)
+
+    @property
+    def nbytes(self):
+        return self.ids.nbytes + self.keys.nbytes + self.rows.nbytes
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Hashes do not compress, so the arrays are stored as they are
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            version=FORMAT_VERSION,
+            ids=self.ids,
+            keys=self.keys,
+            rows=self.rows,
+            built_through=self.built_through,
+            position=np.array(self.position, dtype=np.int64),
+            synced_at=self.synced_at.timestamp(),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["version"]) != FORMAT_VERSION:
+                raise ValueError(f"{path} was built by another version; rebuild it")
+            return cls(
+                data["ids"],
+                data["keys"],
+                data["rows"],
+                int(data["built_through"]),
+                tuple(data["position"].tolist()),
+                datetime.fromtimestamp(float(data["synced_at"]), dt_timezone.utc),
+            )
+
+    def add(self, ticket_id, title, description):
+        self.add_many([(ticket_id, title, description)])
+
+    def add_many(self, rows):
+        """
+        Index (or re-index after an edit) ``(id, title, description)`` rows.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        keys = band_keys([shingles(title, description) for _, title, description in rows])
+        with self._lock:
+            for (ticket_id, _, _), ticket_keys in zip(rows, keys):
+                self._discard(ticket_id)
+                self._added[ticket_id] = ticket_keys
+                for band, key in enumerate(ticket_keys):
+                    self._buckets[band][key].add(ticket_id)
+
+    def remove(self, ticket_id):
+        # Bulk-built entries stay until the next build; lookups check the
+        # database for every candidate anyway
+        with self._lock:
+            self._discard(ticket_id)
+
+    def _discard(self, ticket_id):
+        previous = self._added.pop(ticket_id, None)
+        if previous is not None:
+            for band, key in enumerate(previous):
+                bucket = self._buckets[band][key]
+                bucket.discard(ticket_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def carry_over(self, previous):
+        """
+        Keep the tickets ``previous`` picked up that this build has not seen.
+        """
+        with previous._lock:
+            added = [
+                (ticket_id, keys) for ticket_id, keys in previous._added.items() if ticket_id > self.built_through
+            ]
+        with self._lock:
+            for ticket_id, keys in added:
+                self._added[ticket_id] = keys
+                for band, key in enumerate(keys):
+                    self._buckets[band][key].add(ticket_id)
+
+    def candidates(self, keys, limit, exclude=None):
+        """
+        Ids sharing at least one band with ``keys``, those sharing the most
+        bands first.
+        """
+        matched = []
+        for band, key in enumerate(keys):
+            band_keys_sorted = self.keys[band]
+            low = np.searchsorted(band_keys_sorted, key, side="left")
+            high = np.searchsorted(band_keys_sorted, key, side="right")
+            if high > low:
+                # Templated tickets can pile thousands into one bucket; the
+                # newest are the likeliest duplicates worth surfacing
+                matched.append(self.ids[self.rows[band, max(low, high - MAX_BUCKET_SCAN):high]])
+        with self._lock:
+            added = [
+                ticket_id for band, key in enumerate(keys) for ticket_id in self._buckets[band].get(key, ())
+            ]
+        if added:
+            matched.append(np.array(added, dtype=np.int64))
+        if not matched:
+            return []
+        ids, counts = np.unique(np.concatenate(matched), return_counts=True)
+        if exclude is not None:
+            keep = ids != exclude
+            ids, counts = ids[keep], counts[keep]
+        best = np.argsort(-counts, kind="stable")[:limit]
+        return ids[best].tolist()
+
+
+def catch_up(index):
+    """
+    Index the tickets created or edited since ``index`` was last current,
+    read from the change log, so writes made by other processes are found
+    too. When those entries were compacted away every ticket updated since
+    is indexed again instead.
+    """
+    with index._sync_lock:
+        if index.position is None:
+            index.position, index.synced_at = current_position(), timezone.now()
+            return
+        synced_at = timezone.now()
+        position, changed, deleted, more = index.position, set(), set(), True
+        try:
+            while more:
+                entries, position, more = read_changes(position, CATCH_UP_BATCH)
+                for _, ticket_id, kind in entries:
+                    (deleted if kind == "deleted" else changed).add(ticket_id)
+            tickets = Ticket.objects.filter(pk__in=changed - deleted)
+        except ChangesCompacted:
+            position, deleted = current_position(), ()
+            tickets = Ticket.objects.filter(updated_at__gte=index.synced_at)
+        index.add_many(tickets.values_list("id", "title", "description").iterator(chunk_size=CATCH_UP_BATCH))
+        for ticket_id in deleted:
+            index.remove(ticket_id)
+        index.position, index.synced_at = position, synced_at
+
+
+def find_similar(title, description, limit=10, threshold=None, exclude=None, queryset=None):
+    """
+    Tickets whose shingles overlap those of ``title`` + ``description`` by
+    at least ``threshold`` (Jaccard), most similar first. LSH candidates are
+    checked against the current rows, so edited or deleted tickets never
+    match on stale text. Without a ``title`` candidates are compared on
+    their description alone.
+    """
+    index = get_similarity_index()
+    if index is None:
+        return []
+    catch_up(index)
+    if threshold is None:
+        threshold = settings.SIMILARITY_THRESHOLD
+    query = shingles(title, description)
+    candidate_ids = index.candidates(band_keys([query])[0], settings.SIMILARITY_MAX_CANDIDATES, exclude)
+    if not candidate_ids:
+        return []
+
+    queryset = Ticket.objects.all() if queryset is None else queryset
+    matches = []
+    for row in queryset.filter(pk__in=candidate_ids).values(*SIMILAR_FIELDS, "description"):
+        description_text = row.pop("description")
+        similarity = jaccard(query, shingles(row["title"] if title else "", description_text))
+        if similarity >= threshold:
+            matches.append({**row, "similarity": round(similarity, 3)})
+    matches.sort(key=lambda match: (-match["similarity"], -match["id"]))
+    return matches[:limit]
+
+
+def similar_suggestion(description):
+    """
+    The labels of an existing ticket at least ``SIMILARITY_CLASSIFY_THRESHOLD``
+    similar to ``description``, or None.
+    """
+    if not settings.SIMILARITY_CLASSIFY_THRESHOLD:
+        return None
+    # Tickets still waiting on the queue only carry placeholder labels
+    labelled = Ticket.objects.exclude(classification_jobs__status__in=["pending", "running", "dead"])
+    matches = find_similar(
+        "", description, limit=1, threshold=settings.SIMILARITY_CLASSIFY_THRESHOLD, queryset=labelled
+    )
+    if not matches:
+        return None
+    return {
+        "suggested_category": matches[0]["category"],
+        "suggested_priority": matches[0]["priority"],
+        "source": "similar",
+        "similar_ticket": matches[0]["id"],
+        "similarity": matches[0]["similarity"],
+        "cached": False,
+    }
+
+
+def index_tickets(tickets):
+    index = get_similarity_index()
+    if index is not None:
+        index.add_many((ticket.pk, ticket.title, ticket.description) for ticket in tickets)
+
+
+def unindex_ticket(ticket_id):
+    index = get_similarity_index()
+    if index is not None:
+        index.remove(ticket_id)
+
+
+_similarity_index = None
+_similarity_index_mtime = None
+_lock = threading.Lock()
+
+
+def get_similarity_index():
+    """
+    Return the index stored at ``SIMILARITY_INDEX_PATH`` (empty until
+    ``build_similarity_index`` has run), reloading it whenever the file is
+    rebuilt; None when ``SIMILARITY_ENABLED`` is off.
+    """
+    global _similarity_index, _similarity_index_mtime
+    if not settings.SIMILARITY_ENABLED:
+        return None
+    try:
+        mtime = os.stat(settings.SIMILARITY_INDEX_PATH).st_mtime
+    except OSError:
+        mtime = None
+    if _similarity_index is None or mtime != _similarity_index_mtime:
+        with _lock:
+            if _similarity_index is None or mtime != _similarity_index_mtime:
+                if mtime is None:
+                    index = SimilarityIndex.empty()
+                else:
+                    index = SimilarityIndex.load(settings.SIMILARITY_INDEX_PATH)
+                if _similarity_index is not None:
+                    index.carry_over(_similarity_index)
+                _similarity_index, _similarity_index_mtime = index, mtime
+    return _similarity_index
+
+
+@receiver(setting_changed)
+def _reset_similarity_index(setting, **kwargs):
+    global _similarity_index, _similarity_index_mtime
+    if setting in ("SIMILARITY_INDEX_PATH", "SIMILARITY_ENABLED"):
+        _similarity_index = _similarity_index_mtime = None
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Q, Sum
+
+from .models import Ticket
+
+STATS_FILTER_FIELDS = ("category", "priority", "status")
+
+
+def compute_stats(queryset):
+    """
+    Compute every dashboard figure from a `TicketDailyRollup` queryset in a
+    single conditional-aggregation query, so the cost is O(days) rather than
+    O(tickets).
+    """
+    aggregates = {
+        "total": Sum("count"),
+        "open": Sum("count", filter=Q(status="open")),
+        "days": Count("day", distinct=True, filter=Q(count__gt=0)),
+    }
+    for value, _ in Ticket.PRIORITY_CHOICES:
+        aggregates[f"priority_{value}"] = Sum("count", filter=Q(priority=value))
+    for value, _ in Ticket.CATEGORY_CHOICES:
+        aggregates[f"category_{value}"] = Sum("count", filter=Q(category=value))
+
+    row = {
+        name: value or 0
+        for name, value in queryset.order_by().aggregate(**aggregates).items()
+    }
+
+    priority_breakdown = {
+        value: row[f"priority_{value}"]
+        for value, _ in Ticket.PRIORITY_CHOICES
+        if row[f"priority_{value}"]
+    }
+    category_breakdown = {
+        value: row[f"category_{value}"]
+        for value, _ in Ticket.CATEGORY_CHOICES
+        if row[f"category_{value}"]
+    }
+    avg_per_day = row["total"] / row["days"] if row["days"] else 0
+
+    return {
+        "total_tickets": row["total"],
+        "open_tickets": row["open"],
+        "avg_tickets_per_day": round(avg_per_day, 2),
+        "priority_breakdown": priority_breakdown,
+        "category_breakdown": category_breakdown,
+    }
+
+
+def compute_trends(queryset, start, end, group_by=None):
+    """
+    Return one entry per day between ``start`` and ``end`` (inclusive) from a
+    `TicketDailyRollup` queryset, optionally split by ``group_by``.
+    """
+    fields = ["day"] + ([group_by] if group_by else [])
+    rows = (
+        queryset.filter(day__gte=start, day__lte=end, count__gt=0)
+        .order_by()
+        .values(*fields)
+        .annotate(total=Sum("count"))
+    )
+
+    series = {}
+    day = start
+    while day <= end:
+        series[day] = {"day": day, "count": 0}
+        if group_by:
+            series[day]["breakdown"] = {}
+        day += timedelta(days=1)
+
+    for row in rows:
+        entry = series[row["day"]]
+        entry["count"] += row["total"]
+        if group_by:
+            entry["breakdown"][row[group_by]] = row["total"]
+
+    return list(series.values())
+
+
+def get_stats(queryset, params, version):
+    """
+    Return stats for ``queryset`` from the cache, computing them on a miss.
+
+    ``params`` are the list filters applied to ``queryset`` and ``version``
+    the ticket version (see `tickets.changes.read_version`); both become
+    part of the cache key, so each filtered dashboard gets its own entry and
+    any committed write, from whichever process, moves on to new ones.
+    """
+    key = stats_cache_key(params, version)
+    stats = _cache().get(key)
+    if stats is None:
+        stats = compute_stats(queryset)
+        _cache().set(key, stats, settings.STATS_CACHE_TTL)
+    return stats
+
+
+def stats_cache_key(params, version):
+    filters = sorted(
+        (field, params[field])
+        for field in STATS_FILTER_FIELDS
+        if params.get(field)
+    )
+    return f"tickets:stats:{version}:{urlencode(filters)}"
+
+
+def _cache():
+    return caches[settings.STATS_CACHE_ALIAS]
@@ -1,8 +1,48 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import json
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.core.cache import cache
+from django.utils import timezone
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, F, Sum
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import Ticket
+from .admission import SlotPool, get_admission_controller
+from .benchmark import seed_tickets
+from .bulk import bulk_create_tickets, bulk_delete_tickets, bulk_update_tickets
+from .changes import bump_version, compact_changes, read_version
+from .classification_cache import DjangoCacheBackend, LRUBackend, get_classification_cache
+from .classifier import classify_description, complete, get_circuit_breaker, get_client_loop
+from .dispatch import claim_tickets, renew_lease
+from . import db_router
+from .events import get_event_hub
+from .local_classifier import get_local_classifier
+from . import metrics
+from . import renderers
+from .renderers import FastJSONRenderer
+from .partitions import archive_tickets, month_partitions
+from .similarity import SimilarityIndex, band_keys, get_similarity_index, shingles
+from .models import ClassificationJob, Ticket, TicketChange, TicketDailyRollup, TicketVersion
+from .queue import run_worker
+from .response_cache import ResponseCache, get_response_cache
+from .stats import STATS_FILTER_FIELDS
 
 User = get_user_model()
 
@@ -60,7 +100,7 @@ class TicketAPITest(APITestCase):
         
         response = self.client.get('/api/tickets/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
     
     def test_get_ticket_detail(self):
         """Test retrieving a single ticket"""
@@ -120,8 +160,8 @@ class TicketAPITest(APITestCase):
         
         response = self.client.get('/api/tickets/?status=open')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['status'], 'open')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['status'], 'open')
     
     def test_filter_tickets_by_category(self):
         """Test filtering tickets by category"""
@@ -130,8 +170,8 @@ class TicketAPITest(APITestCase):
         
         response = self.client.get('/api/tickets/?category=technical')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['category'], 'technical')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['category'], 'technical')
     
     def test_search_tickets(self):
         """Test searching tickets by title or description"""
@@ -140,8 +180,231 @@ class TicketAPITest(APITestCase):
         
         response = self.client.get('/api/tickets/?search=login')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['title'], "Login Issue")
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['title'], "Login Issue")
+
+class TicketPaginationTest(APITestCase):
+    """Test cursor pagination on the ticket list endpoint"""
+
+    def setUp(self):
+        for i in range(7):
+            Ticket.objects.create(
+                title=f"Ticket {i}",
+                description=f"Description {i}",
+                category="technical" if i % 2 else "billing",
+                priority="low",
+                status="open"
+            )
+        # Same timestamp for every row so the id tie-breaker is exercised
+        Ticket.objects.update(created_at=Ticket.objects.first().created_at)
+
+    def walk(self, url):
+        titles = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles.extend(t['title'] for t in response.data['results'])
+            url = response.data['next']
+        return titles
+
+    def test_pages_cover_every_ticket_once(self):
+        """Test following next links returns each ticket exactly once in order"""
+        titles = self.walk('/api/tickets/?page_size=3')
+        self.assertEqual(titles, [f"Ticket {i}" for i in reversed(range(7))])
+
+    def test_previous_link_returns_prior_page(self):
+        """Test the previous cursor walks back to the page before"""
+        first = self.client.get('/api/tickets/?page_size=3')
+        self.assertIsNone(first.data['previous'])
+
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_pagination_with_filter_and_ordering(self):
+        """Test cursors honour filters and a client-chosen ordering"""
+        titles = self.walk('/api/tickets/?category=technical&ordering=title&page_size=2')
+        self.assertEqual(titles, ["Ticket 1", "Ticket 3", "Ticket 5"])
+
+    def test_nullable_ordering_field(self):
+        """Test cursors walk past NULLs in a nullable ordering column both ways"""
+        now = timezone.now()
+        for i in (1, 4, 5):
+            Ticket.objects.filter(title=f"Ticket {i}").update(lease_expires_at=now + timedelta(minutes=i))
+        ascending = ["Ticket 1", "Ticket 4", "Ticket 5", "Ticket 0", "Ticket 2", "Ticket 3", "Ticket 6"]
+        self.assertEqual(self.walk('/api/tickets/?ordering=lease_expires_at&page_size=2'), ascending)
+        descending = ["Ticket 6", "Ticket 3", "Ticket 2", "Ticket 0", "Ticket 5", "Ticket 4", "Ticket 1"]
+        self.assertEqual(self.walk('/api/tickets/?ordering=-lease_expires_at&page_size=2'), descending)
+
+        # Previous links cross the NULL boundary too
+        first = self.client.get('/api/tickets/?ordering=lease_expires_at&page_size=2')
+        second = self.client.get(first.data['next'])
+        third = self.client.get(second.data['next'])
+        self.assertEqual(self.client.get(third.data['previous']).data['results'], second.data['results'])
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        response = self.client.get('/api/tickets/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_does_not_use_offset(self):
+        """Test a deep page is fetched with a keyset predicate, not OFFSET"""
+        first = self.client.get('/api/tickets/?page_size=3')
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(first.data['next'])
+        # The version lookup behind the ETag, then the page
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertNotIn('OFFSET', ctx.captured_queries[1]['sql'])
+
+class TicketSearchTest(APITestCase):
+    """Test full-text search against the icontains behaviour"""
+
+    def setUp(self):
+        Ticket.objects.create(title="Login Issue", description="Cannot login to system", category="technical", priority="high", status="open")
+        Ticket.objects.create(title="Payment Problem", description="Payment not processing", category="billing", priority="medium", status="open")
+        Ticket.objects.create(title="Refund request", description="Charged twice for the login plan", category="billing", priority="low", status="open")
+
+    def search(self, term, **params):
+        query = "&".join(f"{key}={value}" for key, value in {"search": term, **params}.items())
+        response = self.client.get(f'/api/tickets/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [ticket['title'] for ticket in response.data['results']]
+
+    def test_results_agree_with_icontains(self):
+        """Test full-text and icontains search return the same tickets"""
+        for term in ["login", "payment", "process", "refund", "login system", "charged"]:
+            with self.subTest(term=term):
+                fulltext = self.search(term)
+                with self.settings(TICKET_SEARCH_BACKEND="icontains"):
+                    icontains = self.search(term)
+                self.assertCountEqual(fulltext, icontains)
+
+    def test_prefix_matching(self):
+        """Test partial words match as prefixes"""
+        self.assertEqual(self.search("paym"), ["Payment Problem"])
+
+    def test_results_ranked(self):
+        """Test title matches rank above description-only matches"""
+        self.assertEqual(self.search("login"), ["Login Issue", "Refund request"])
+
+    def test_explicit_ordering_overrides_rank(self):
+        """Test an ordering parameter replaces rank ordering"""
+        self.assertEqual(self.search("login", ordering="-title"), ["Refund request", "Login Issue"])
+
+    def test_ranked_results_paginate(self):
+        """Test cursors page through rank-ordered results"""
+        response = self.client.get('/api/tickets/?search=login&page_size=1')
+        self.assertEqual(response.data['results'][0]['title'], "Login Issue")
+        response = self.client.get(response.data['next'])
+        self.assertEqual([t['title'] for t in response.data['results']], ["Refund request"])
+        self.assertIsNone(response.data['next'])
+
+    def test_trigram_fallback(self):
+        """Test a misspelt title still finds the ticket"""
+        self.assertEqual(self.search("Paymnt Problem"), ["Payment Problem"])
+        with self.settings(TICKET_SEARCH_TRIGRAM_FALLBACK=False):
+            self.assertEqual(self.search("Paymnt Problem"), [])
+
+class TicketQueryPlanTest(APITestCase):
+    """Test that list query shapes use an index on a large table and stats read the rollup"""
+
+    SEED_ROWS = 20000
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(42)
+        Ticket.objects.bulk_create(
+            [
+                Ticket(
+                    title=f"Seed {i}",
+                    description="Seeded ticket",
+                    category=rng.choices(["technical", "billing", "account", "general"], [50, 30, 15, 5])[0],
+                    priority=rng.choices(["low", "medium", "high", "critical"], [40, 35, 20, 5])[0],
+                    status=rng.choices(["open", "in_progress", "resolved", "closed"], [5, 10, 25, 60])[0],
+                )
+                for i in range(cls.SEED_ROWS)
+            ],
+            batch_size=5000,
+        )
+        # bulk_create skips the signals that keep the rollup in step
+        call_command('rebuild_ticket_rollup', stdout=StringIO())
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE tickets_ticket")
+            cursor.execute("ANALYZE tickets_ticketdailyrollup")
+            cursor.execute("SELECT DISTINCT tableoid::regclass::text FROM tickets_ticket")
+            cls.populated = {row[0] for row in cursor.fetchall()}
+
+    def plan_for(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                cursor.execute("EXPLAIN " + query['sql'])
+                plans.append("\n".join(row[0] for row in cursor.fetchall()))
+        return response, plans
+
+    def assertNoSeqScan(self, url):
+        response, plans = self.plan_for(url)
+        for plan in plans:
+            # Empty partitions (months ahead, the default one) cost nothing to scan
+            scanned = set(re.findall(r"Seq Scan on (\w+)", plan))
+            self.assertFalse(scanned & (self.populated | {"tickets_ticket"}), f"{url}\n{plan}")
+        return response
+
+    def assertSkipsTickets(self, url):
+        response, plans = self.plan_for(url)
+        for plan in plans:
+            self.assertEqual(re.findall(r" on (tickets_ticket(?:_\w+)?)\b", plan), [], f"{url}\n{plan}")
+        return response
+
+    def test_stats_and_group_by_read_the_rollup(self):
+        """Test stats and the per-category/priority breakdowns never read the ticket table"""
+        response = self.assertSkipsTickets('/api/tickets/stats/')
+        self.assertEqual(response.data['total_tickets'], self.SEED_ROWS)
+        for query in ['category=account', 'priority=critical&status=open', 'status=closed']:
+            with self.subTest(query=query):
+                self.assertSkipsTickets(f'/api/tickets/stats/?{query}')
+        for group_by in STATS_FILTER_FIELDS:
+            with self.subTest(group_by=group_by):
+                response = self.assertSkipsTickets(f'/api/tickets/trends/?group_by={group_by}')
+                self.assertEqual(sum(day['count'] for day in response.data['series']), self.SEED_ROWS)
+
+    def test_default_list(self):
+        """Test the unfiltered list page uses the created_at index"""
+        response = self.assertNoSeqScan('/api/tickets/')
+        self.assertNoSeqScan(response.data['next'])
+
+    def test_filtered_lists(self):
+        """Test each filterable field is served by its composite index"""
+        for query in [
+            'status=open',
+            'status=in_progress',
+            'category=account',
+            'priority=critical',
+            'category=general&status=open',
+        ]:
+            with self.subTest(query=query):
+                response = self.assertNoSeqScan(f'/api/tickets/?{query}')
+                if response.data['next']:
+                    self.assertNoSeqScan(response.data['next'])
+
+    def test_claim_query(self):
+        """Test claiming the next ticket reads the claim index instead of sorting every open ticket"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/tickets/claim/', {"agent": "a1"}, format='json')
+        self.assertEqual(len(response.data["results"]), 1)
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                if "SKIP LOCKED" not in query['sql']:
+                    continue
+                cursor.execute("EXPLAIN " + query['sql'])
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                scanned = set(re.findall(r"Seq Scan on (\w+)", plan))
+                self.assertFalse(scanned & (self.populated | {"tickets_ticket"}), plan)
+                # Merge Append keeps the partitions' index order; no Sort node
+                self.assertNotIn("Sort  (", plan)
 
 class TicketStatsTest(APITestCase):
     """Test the ticket statistics endpoint"""
@@ -181,6 +444,155 @@ class TicketStatsTest(APITestCase):
         self.assertEqual(category_breakdown['technical'], 2)
         self.assertEqual(category_breakdown['billing'], 1)
 
+    def test_avg_tickets_per_day(self):
+        """Test the daily average divides by the number of active days"""
+        ticket = Ticket.objects.get(title="Open Bill")
+        Ticket.objects.filter(pk=ticket.pk).update(created_at=ticket.created_at - timedelta(days=3))
+        call_command('rebuild_ticket_rollup', stdout=StringIO())
+
+        response = self.client.get('/api/tickets/stats/')
+        self.assertEqual(response.data['avg_tickets_per_day'], 1.5)
+
+    def test_filtered_stats(self):
+        """Test stats accept the same filters as the list endpoint"""
+        response = self.client.get('/api/tickets/stats/?category=technical')
+        self.assertEqual(response.data['total_tickets'], 2)
+        self.assertEqual(response.data['open_tickets'], 1)
+        self.assertEqual(response.data['category_breakdown'], {'technical': 2})
+
+        response = self.client.get('/api/tickets/stats/?status=open&priority=high')
+        self.assertEqual(response.data['total_tickets'], 1)
+
+    def test_stats_single_query_then_cached(self):
+        """Test stats are computed in one query and then served from cache after the version lookup"""
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/tickets/stats/')
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/tickets/stats/')
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_stats_invalidated_on_write(self):
+        """Test creating, updating and deleting tickets refreshes cached stats"""
+        self.assertEqual(self.client.get('/api/tickets/stats/').data['open_tickets'], 2)
+
+        ticket = Ticket.objects.create(title="New", description="New", category="account", priority="low", status="open")
+        self.assertEqual(self.client.get('/api/tickets/stats/').data['open_tickets'], 3)
+
+        self.client.patch(f'/api/tickets/{ticket.id}/', {"status": "closed"}, format='json')
+        self.assertEqual(self.client.get('/api/tickets/stats/').data['open_tickets'], 2)
+
+        self.client.delete(f'/api/tickets/{ticket.id}/')
+        self.assertEqual(self.client.get('/api/tickets/stats/').data['total_tickets'], 3)
+
+    def test_other_process_writes_refresh_stats(self):
+        """Test a write that never touched this process's caches still refreshes its stats and ETag"""
+        response = self.client.get('/api/tickets/stats/')
+        self.assertEqual(response.data['total_tickets'], 3)
+        # What another process's write leaves behind: rows and a version bump
+        TicketDailyRollup.objects.filter(category="billing").update(count=F("count") + 2)
+        bump_version()
+
+        response = self.client.get('/api/tickets/stats/', HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_tickets'], 5)
+
+class TicketRollupTest(APITestCase):
+    """Test the daily rollup table and the trends endpoint"""
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.ticket = Ticket.objects.create(title="Rollup", description="Rollup", category="billing", priority="high", status="open")
+        Ticket.objects.create(title="Other", description="Other", category="technical", priority="low", status="closed")
+
+    def bucket(self, status_value, category="billing", priority="high"):
+        row = TicketDailyRollup.objects.filter(
+            day=self.today, category=category, priority=priority, status=status_value
+        ).first()
+        return row.count if row else 0
+
+    def snapshot(self):
+        return {
+            (row.day, row.category, row.priority, row.status): row.count
+            for row in TicketDailyRollup.objects.filter(count__gt=0)
+        }
+
+    def test_create_increments_bucket(self):
+        """Test creating a ticket counts it in its day bucket"""
+        self.assertEqual(self.bucket("open"), 1)
+        self.assertEqual(self.bucket("closed", "technical", "low"), 1)
+
+    def test_status_transition_moves_count(self):
+        """Test a status change moves the ticket between buckets"""
+        self.client.patch(f'/api/tickets/{self.ticket.id}/', {"status": "resolved"}, format='json')
+        self.assertEqual(self.bucket("open"), 0)
+        self.assertEqual(self.bucket("resolved"), 1)
+
+    def test_delete_decrements_bucket(self):
+        """Test deleting a ticket removes it from its bucket"""
+        self.client.delete(f'/api/tickets/{self.ticket.id}/')
+        self.assertEqual(self.bucket("open"), 0)
+
+    def test_rebuild_matches_incremental(self):
+        """Test the rebuild command reproduces the incrementally kept rollup"""
+        self.ticket.priority = "critical"
+        self.ticket.save()
+        incremental = self.snapshot()
+
+        call_command('rebuild_ticket_rollup', stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_stale_copies_move_the_committed_bucket(self):
+        """Test saves and deletes of copies loaded before another write move the bucket the row is really in"""
+        first, second, third = (Ticket.objects.get(pk=self.ticket.pk) for _ in range(3))
+        first.status = "closed"
+        first.save()
+        second.status = "resolved"
+        second.save()
+        self.assertEqual((self.bucket("open"), self.bucket("closed"), self.bucket("resolved")), (0, 0, 1))
+
+        # A claim sweep racing an edit: the copy still thinks the ticket is open
+        reopened = Ticket.objects.get(pk=self.ticket.pk)
+        reopened.status = "open"
+        reopened.save()
+        editing = Ticket.objects.get(pk=self.ticket.pk)
+        claim_tickets("a1", count=2)
+        editing.priority = "low"
+        editing.save(update_fields=["priority", "updated_at"])
+        self.assertEqual(self.bucket("in_progress", priority="low"), 1)
+
+        third.delete()
+        incremental = self.snapshot()
+        call_command('rebuild_ticket_rollup', stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_trends_series(self):
+        """Test trends return one entry per day with zero-filled gaps"""
+        start = self.today - timedelta(days=2)
+        response = self.client.get(f'/api/tickets/trends/?start={start}&end={self.today}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        series = response.data['series']
+        self.assertEqual([entry['day'] for entry in series], [start + timedelta(days=i) for i in range(3)])
+        self.assertEqual([entry['count'] for entry in series], [0, 0, 2])
+
+    def test_trends_filter_and_group_by(self):
+        """Test trends accept list filters and a breakdown dimension"""
+        response = self.client.get('/api/tickets/trends/?category=billing&group_by=status')
+        today = response.data['series'][-1]
+        self.assertEqual(today['day'], self.today)
+        self.assertEqual(today['count'], 1)
+        self.assertEqual(today['breakdown'], {'open': 1})
+
+    def test_trends_invalid_range(self):
+        """Test invalid date ranges are rejected"""
+        for query in ['start=2026-02-10&end=2026-02-01', 'start=not-a-date', 'group_by=title']:
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/tickets/trends/?{query}')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('error', response.data)
+
 class TicketClassificationTest(APITestCase):
     """Test the ticket classification endpoint"""
     
@@ -198,11 +610,2252 @@ class TicketClassificationTest(APITestCase):
         self.assertIn(response.status_code, [status.HTTP_200_OK, status.HTTP_500_INTERNAL_SERVER_ERROR])
         
         if response.status_code == status.HTTP_200_OK:
-            self.assertIn('suggested_category', response.data)
-            self.assertIn('suggested_priority', response.data)
+            self.assertIn('suggested_category', response.json())
+            self.assertIn('suggested_priority', response.json())
     
     def test_classify_ticket_no_description(self):
         """Test classification with no description"""
         response = self.client.post('/api/tickets/classify/', {}, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn('error', response.data)
+        self.assertIn('error', response.json())
+
+class StubLLMServer:
+    """Local chat-completions server that answers after a fixed delay"""
+
+    def __init__(self, delay=0.0, content='{"suggested_category": "account", "suggested_priority": "high"}'):
+        self.delay = delay
+        self.content = content
+        self.failures = []
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with stub.lock:
+                    stub.requests.append(body)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    failure = stub.failures.pop(0) if stub.failures else None
+                time.sleep(stub.delay)
+                with stub.lock:
+                    stub.in_flight -= 1
+
+                if failure:
+                    payload, code = b'{}', failure
+                else:
+                    payload, code = json.dumps({
+                        "choices": [{"message": {"role": "assistant", "content": stub.reply(body)}}],
+                        "usage": {"prompt_tokens": 120, "completion_tokens": 20},
+                    }).encode(), 200
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def reply(self, body):
+        return self.content
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def settings(self, **overrides):
+        return override_settings(GROQ_API_KEY="test-key", GROQ_BASE_URL=self.url, LLM_RETRY_BACKOFF=0.01, **overrides)
+
+@override_settings(CLASSIFY_CACHE_BACKEND="none")
+class TicketAsyncClassifierTest(TestCase):
+    """Test the async, pooled classifier against a local stub LLM"""
+
+    async def classify_many(self, count):
+        client = AsyncClient()
+        return await asyncio.gather(*[
+            client.post('/api/tickets/classify/', {"description": f"Ticket {i}"}, content_type='application/json')
+            for i in range(count)
+        ])
+
+    async def test_concurrent_requests_do_not_serialize(self):
+        """Test N concurrent classify calls overlap instead of queueing"""
+        with StubLLMServer(delay=0.3) as stub, stub.settings():
+            started = time.monotonic()
+            responses = await self.classify_many(8)
+            elapsed = time.monotonic() - started
+
+        self.assertTrue(all(r.status_code == 200 for r in responses))
+        self.assertEqual(responses[0].json(), {"suggested_category": "account", "suggested_priority": "high", "cached": False})
+        self.assertEqual(stub.max_in_flight, 8)
+        self.assertLess(elapsed, 0.3 * 8 / 2)
+
+    async def test_concurrency_is_bounded(self):
+        """Test the semaphore caps in-flight LLM calls"""
+        with StubLLMServer(delay=0.1) as stub, stub.settings(LLM_MAX_CONCURRENCY=2):
+            await self.classify_many(6)
+        self.assertEqual(stub.max_in_flight, 2)
+
+    def test_event_loops_share_one_client(self):
+        """Test calls from separate async_to_sync loops share the client and the concurrency cap"""
+        with StubLLMServer(delay=0.1) as stub, stub.settings(LLM_MAX_CONCURRENCY=2):
+            client_loop = get_client_loop()
+            threads = [
+                threading.Thread(target=async_to_sync(classify_description), args=(f"Ticket {i}",))
+                for i in range(6)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertIs(get_client_loop(), client_loop)
+        self.assertEqual(len(stub.requests), 6)
+        self.assertEqual(stub.max_in_flight, 2)
+        # Leaving the settings override closed the client and its loop
+        self.assertTrue(client_loop.client.is_closed)
+        self.assertTrue(client_loop.loop.is_closed())
+
+    async def test_transient_errors_are_retried(self):
+        """Test 503s are retried with backoff before succeeding"""
+        with StubLLMServer() as stub, stub.settings(LLM_MAX_RETRIES=2):
+            stub.failures = [503, 503]
+            responses = await self.classify_many(1)
+        self.assertEqual(responses[0].json()["suggested_category"], "account")
+        self.assertEqual(len(stub.requests), 3)
+
+    async def test_retries_exhausted(self):
+        """Test the endpoint reports the LLM as unavailable after retries"""
+        with StubLLMServer() as stub, stub.settings(LLM_MAX_RETRIES=1):
+            stub.failures = [503, 503]
+            responses = await self.classify_many(1)
+        self.assertEqual(responses[0].json()["llm_error"], "LLM service unavailable")
+
+    async def test_code_fenced_reply(self):
+        """Test markdown code fences around the JSON are stripped"""
+        content = '```json\n{"suggested_category": "billing", "suggested_priority": "low"}\n```'
+        with StubLLMServer(content=content) as stub, stub.settings():
+            responses = await self.classify_many(1)
+        self.assertEqual(responses[0].json(), {"suggested_category": "billing", "suggested_priority": "low", "cached": False})
+
+class TicketClassificationCacheTest(APITestCase):
+    """Test the content-addressed classification cache"""
+
+    def setUp(self):
+        self.stub = StubLLMServer().__enter__()
+        self.addCleanup(self.stub.__exit__)
+        overrides = self.stub.settings(CLASSIFY_CACHE_BACKEND="memory")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def classify(self, description):
+        response = self.client.post('/api/tickets/classify/', {"description": description}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_repeat_is_served_from_cache(self):
+        """Test an identical description skips the LLM the second time"""
+        self.assertFalse(self.classify("Reset my password")["cached"])
+        second = self.classify("Reset my password")
+        self.assertTrue(second["cached"])
+        self.assertEqual(second["suggested_category"], "account")
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertEqual(get_classification_cache().stats(), {"hits": 1, "misses": 1, "hit_ratio": 0.5})
+
+    def test_near_duplicates_share_an_entry(self):
+        """Test whitespace, case and trailing signatures are normalized away"""
+        self.classify("Reset my password please")
+        self.assertTrue(self.classify("  reset MY\n password   please")["cached"])
+        self.assertTrue(self.classify("Reset my password please\n\nThanks,\nDana")["cached"])
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_only_trailing_signatures_are_cut(self):
+        """Test a sign-off word inside the body keeps the rest of the body in the key"""
+        cache = get_classification_cache()
+        first = "Thanks for the quick fix yesterday.\nNow checkout fails with error 502"
+        second = "Thanks for the quick fix yesterday.\nNow login fails with error 401"
+        self.assertNotEqual(cache.key(first, "m", "v"), cache.key(second, "m", "v"))
+        self.assertEqual(
+            cache.key("Checkout fails\n\nBest regards, Dana Smith\nAcme Corp", "m", "v"),
+            cache.key("Checkout fails", "m", "v"),
+        )
+
+    def test_normalization_is_configurable(self):
+        """Test disabling normalization makes case significant"""
+        with self.settings(CLASSIFY_CACHE_NORMALIZE=["whitespace"]):
+            self.classify("Reset my password")
+            self.assertFalse(self.classify("RESET MY PASSWORD")["cached"])
+
+    def test_model_is_part_of_the_key(self):
+        """Test switching model does not reuse another model's answer"""
+        self.classify("Reset my password")
+        with self.settings(LLM_MODEL="another-model"):
+            self.assertFalse(self.classify("Reset my password")["cached"])
+
+    def test_errors_are_not_cached(self):
+        """Test failed classifications are retried on the next call"""
+        self.stub.failures = [400]
+        self.assertIn("llm_error", self.classify("Reset my password"))
+        self.assertFalse(self.classify("Reset my password")["cached"])
+
+    def test_django_cache_backend(self):
+        """Test entries can live in a Django cache alias"""
+        with self.settings(CLASSIFY_CACHE_BACKEND="django"):
+            get_classification_cache().clear()
+            self.classify("Duplicate billing charge")
+            self.assertTrue(self.classify("Duplicate billing charge")["cached"])
+
+    def test_django_backend_clear_keeps_other_keys(self):
+        """Test clearing the shared backend leaves the rest of the cache alias alone"""
+        cache.set("unrelated", 1)
+        backend = DjangoCacheBackend("default", 60)
+        backend.set("a", {"suggested_category": "billing"})
+        backend.clear()
+        self.assertIsNone(backend.get("a"))
+        self.assertEqual(cache.get("unrelated"), 1)
+
+    def test_lookups_are_exported(self):
+        """Test cache hits and misses show up on the metrics endpoint"""
+        metrics.reset_metrics()
+        self.classify("Reset my password")
+        self.classify("Reset my password")
+        self.assertEqual(metrics.CLASSIFY_CACHE_LOOKUPS.value(result="hit"), 1)
+        self.assertEqual(metrics.CLASSIFY_CACHE_LOOKUPS.value(result="miss"), 1)
+        body = self.client.get('/api/metrics/').content.decode()
+        self.assertIn('tickets_classify_cache_lookups_total{result="hit"} 1', body)
+
+    def test_lru_bounds_and_ttl(self):
+        """Test the in-process backend evicts least recently used and expired entries"""
+        backend = LRUBackend(max_entries=2, ttl=60)
+        backend.set("a", 1)
+        backend.set("b", 2)
+        backend.get("a")
+        backend.set("c", 3)
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.get("a"), 1)
+
+        expired = LRUBackend(max_entries=2, ttl=-1)
+        expired.set("a", 1)
+        self.assertIsNone(expired.get("a"))
+        self.assertEqual(len(expired), 0)
+
+class BatchStubLLMServer(StubLLMServer):
+    """Stub that answers batch prompts with a JSON array, optionally mangling some items"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.drop = set()
+        self.mislabel = set()
+
+    def reply(self, body):
+        prompt = body["messages"][0]["content"]
+        if "Descriptions:" not in prompt:
+            return self.content
+        items = []
+        for index in map(int, re.findall(r"^\[(\d+)\]$", prompt, re.MULTILINE)):
+            if index in self.drop:
+                # Dropped from the first reply only
+                self.drop.discard(index)
+                continue
+            category = "not-a-category" if index in self.mislabel else "technical"
+            items.append({"index": index, "suggested_category": category, "suggested_priority": "medium"})
+        return json.dumps(items)
+
+    def batch_requests(self):
+        return [r for r in self.requests if "Descriptions:" in r["messages"][0]["content"]]
+
+@override_settings(CLASSIFY_CACHE_BACKEND="none")
+class TicketBatchClassificationTest(APITestCase):
+    """Test batch classification and bulk reclassification"""
+
+    def setUp(self):
+        self.stub = BatchStubLLMServer().__enter__()
+        self.addCleanup(self.stub.__exit__)
+        overrides = self.stub.settings(LLM_BATCH_ITEMS_PER_PROMPT=10)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def classify_batch(self, payload):
+        return self.client.post('/api/tickets/classify/batch/', payload, format='json')
+
+    def test_descriptions_are_packed_into_few_prompts(self):
+        """Test 25 descriptions need three LLM calls at ten per prompt"""
+        response = self.classify_batch({"descriptions": [f"Issue number {i}" for i in range(25)]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = response.json()["results"]
+        self.assertEqual([r["index"] for r in results], list(range(25)))
+        self.assertTrue(all(r["suggested_category"] == "technical" for r in results))
+        self.assertEqual(response.json()["error_count"], 0)
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_prompt_token_budget_splits_batches(self):
+        """Test long descriptions are spread over more prompts"""
+        with self.settings(LLM_BATCH_PROMPT_TOKENS=400):
+            self.classify_batch({"descriptions": ["x" * 600 for _ in range(4)]})
+        self.assertEqual(len(self.stub.requests), 4)
+
+    def test_invalid_items_are_retried_as_a_batch(self):
+        """Test missing and mislabelled items are retried together in one new prompt"""
+        self.stub.drop = {1}
+        self.stub.mislabel = {2}
+        with self.settings(LLM_MAX_RETRIES=2):
+            response = self.classify_batch({"descriptions": ["a", "b", "c", "d"]})
+
+        results = response.json()["results"]
+        self.assertEqual(results[0]["suggested_category"], "technical")
+        self.assertEqual(results[1]["suggested_category"], "technical")
+        self.assertEqual(results[2]["error"], "Invalid classification from LLM")
+        # The first prompt, items 1 and 2 together, then item 2 alone
+        self.assertEqual(len(self.stub.batch_requests()), 3)
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_per_item_errors(self):
+        """Test failed retries are reported per item without failing the batch"""
+        self.stub.mislabel = {0}
+        response = self.classify_batch({"descriptions": ["a", "", "c"]})
+
+        results = response.json()["results"]
+        self.assertEqual(results[0]["error"], "Invalid classification from LLM")
+        self.assertEqual(results[1]["error"], "Description is required")
+        self.assertEqual(results[2]["suggested_category"], "technical")
+        self.assertEqual(response.json()["error_count"], 2)
+
+    def test_failed_batches_are_not_fanned_out(self):
+        """Test a failed batch call leaves its items unclassified instead of retrying each one"""
+        self.stub.failures = [503] * 3
+        with self.settings(LLM_MAX_RETRIES=0):
+            response = self.classify_batch({"descriptions": [f"Issue number {i}" for i in range(25)]})
+        self.assertEqual(response.json()["error_count"], 25)
+        self.assertEqual(response.json()["results"][0]["error"], "LLM service unavailable")
+        self.assertEqual(len(self.stub.requests), 3)
+
+        get_circuit_breaker().opened_at = time.monotonic()
+        response = self.classify_batch({"descriptions": ["a", "b"]})
+        self.assertEqual(response.json()["error_count"], 2)
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_ticket_ids(self):
+        """Test tickets can be classified by id"""
+        ticket = Ticket.objects.create(title="T", description="Server down", category="general", priority="low")
+        response = self.classify_batch({"ticket_ids": [ticket.id, 999999]})
+
+        results = response.json()["results"]
+        self.assertEqual(results[0]["ticket_id"], ticket.id)
+        self.assertEqual(results[0]["suggested_category"], "technical")
+        self.assertEqual(results[1]["error"], "Ticket not found")
+
+    def test_batch_validation(self):
+        """Test malformed and oversized batches are rejected"""
+        with self.settings(LLM_BATCH_MAX_ITEMS=2):
+            for payload in [{}, {"descriptions": []}, {"descriptions": ["a", "b", "c"]}, {"ticket_ids": ["x"]}]:
+                with self.subTest(payload=payload):
+                    response = self.classify_batch(payload)
+                    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                    self.assertIn("error", response.json())
+
+    def test_reclassify_command(self):
+        """Test the command rewrites labels in chunks and keeps the rollup in step"""
+        for i in range(5):
+            Ticket.objects.create(title=f"T{i}", description=f"Issue {i}", category="billing", priority="low")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            state_file = os.path.join(tmp, "progress.json")
+            call_command('reclassify_tickets', chunk_size=2, state_file=state_file, stdout=StringIO())
+            self.assertFalse(os.path.exists(state_file))
+
+        self.assertEqual(Ticket.objects.filter(category="technical", priority="medium").count(), 5)
+        self.assertEqual(len(self.stub.batch_requests()), 3)
+        rollup = TicketDailyRollup.objects.filter(category="technical", priority="medium", status="open")
+        self.assertEqual(sum(row.count for row in rollup), 5)
+
+    def test_reclassify_resumes_from_checkpoint(self):
+        """Test a saved checkpoint skips tickets that were already processed"""
+        tickets = [
+            Ticket.objects.create(title=f"T{i}", description=f"Issue {i}", category="billing", priority="low")
+            for i in range(4)
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            state_file = os.path.join(tmp, "progress.json")
+            with open(state_file, "w") as f:
+                json.dump({"last_id": tickets[1].id}, f)
+            call_command('reclassify_tickets', state_file=state_file, stdout=StringIO())
+
+        self.assertEqual(
+            list(Ticket.objects.order_by("id").values_list("category", flat=True)),
+            ["billing", "billing", "technical", "technical"],
+        )
+
+
+@override_settings(CLASSIFY_CACHE_BACKEND="none", CLASSIFY_ON_CREATE="queue", CLASSIFY_QUEUE_RETRY_DELAY=0)
+class TicketClassificationQueueTest(APITestCase):
+    """Test queued classification on create and the worker write-back"""
+
+    def setUp(self):
+        self.stub = BatchStubLLMServer().__enter__()
+        self.addCleanup(self.stub.__exit__)
+        overrides = self.stub.settings(LLM_MAX_RETRIES=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def create(self, **data):
+        return self.client.post('/api/tickets/', {"title": "T", "description": "Server down", **data}, format='json')
+
+    def drain(self):
+        return run_worker(threading.Event(), batch_size=10, poll_interval=0, drain=True)
+
+    def test_create_enqueues_without_calling_llm(self):
+        """Test create returns placeholders at once and queues a job"""
+        response = self.create()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["classification"], "queued")
+        self.assertEqual(response.data["category"], "general")
+        self.assertEqual(self.stub.requests, [])
+
+        job = ClassificationJob.objects.get()
+        self.assertEqual(job.ticket_id, response.data["id"])
+        self.assertEqual(job.status, "pending")
+        self.assertEqual(job.fields, ["category", "priority"])
+
+    def test_complete_tickets_are_not_queued(self):
+        """Test tickets created with both labels skip the queue"""
+        response = self.create(category="billing", priority="low")
+        self.assertEqual(response.data["classification"], "skipped")
+        self.assertFalse(ClassificationJob.objects.exists())
+
+    def test_worker_writes_back_suggestion(self):
+        """Test the worker fills the missing fields and moves the rollup"""
+        kept = self.create(category="billing").data["id"]
+        filled = self.create().data["id"]
+
+        self.assertEqual(self.drain(), {"done": 2})
+        self.assertEqual(len(self.stub.batch_requests()), 1)
+        self.assertEqual(Ticket.objects.get(pk=kept).category, "billing")
+        self.assertEqual(Ticket.objects.get(pk=kept).priority, "medium")
+        self.assertEqual(Ticket.objects.get(pk=filled).category, "technical")
+
+        rollup = {(row.category, row.priority): row.count for row in TicketDailyRollup.objects.filter(count__gt=0)}
+        self.assertEqual(rollup, {("billing", "medium"): 1, ("technical", "medium"): 1})
+
+    def test_edited_ticket_is_not_overwritten(self):
+        """Test a ticket changed after enqueue keeps the user's values"""
+        ticket_id = self.create().data["id"]
+        self.client.patch(f'/api/tickets/{ticket_id}/', {"category": "account"}, format='json')
+
+        self.assertEqual(self.drain(), {"skipped": 1})
+        self.assertEqual(Ticket.objects.get(pk=ticket_id).category, "account")
+
+    def test_failed_jobs_retry_then_dead_letter(self):
+        """Test LLM failures are retried and dead-lettered after the last attempt"""
+        self.create()
+        self.stub.failures = [503] * 10
+
+        with self.settings(CLASSIFY_QUEUE_MAX_ATTEMPTS=2):
+            self.assertEqual(self.drain(), {"pending": 1, "dead": 1})
+
+        job = ClassificationJob.objects.get()
+        self.assertEqual(job.attempts, 2)
+        self.assertTrue(job.last_error)
+        self.assertEqual(Ticket.objects.get().category, "general")
+
+        call_command('classify_worker', requeue_dead=True, drain=True, workers=1, stdout=StringIO())
+        self.assertEqual(ClassificationJob.objects.get().status, "pending")
+
+    def test_queue_depth_endpoint(self):
+        """Test the queue endpoint reports jobs per status"""
+        self.create()
+        self.create()
+        response = self.client.get('/api/tickets/classify/queue/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["pending"], 2)
+        self.assertEqual(response.data["dead"], 0)
+
+
+@override_settings(CLASSIFY_CACHE_BACKEND="none", CLASSIFY_ON_CREATE="queue")
+class TicketClassificationWorkerTest(TransactionTestCase):
+    """Test the classify_worker command with concurrent workers"""
+
+    def test_workers_share_the_queue(self):
+        """Test several workers drain the queue without handling a job twice"""
+        with BatchStubLLMServer(delay=0.05) as stub, stub.settings():
+            for i in range(12):
+                self.client.post('/api/tickets/', {"title": f"T{i}", "description": f"Issue {i}"}, content_type='application/json')
+
+            out = StringIO()
+            call_command('classify_worker', workers=3, batch_size=2, drain=True, stdout=out)
+
+        self.assertIn("12 done", out.getvalue())
+        self.assertEqual(ClassificationJob.objects.filter(status="done", attempts=1).count(), 12)
+        self.assertEqual(Ticket.objects.filter(category="technical").count(), 12)
+        self.assertEqual(len(stub.batch_requests()), 6)
+
+
+LOCAL_TRAINING_TICKETS = [
+    ("I was charged twice on my invoice", "billing", "high"),
+    ("Please refund the duplicate payment", "billing", "high"),
+    ("My credit card payment failed at checkout", "billing", "high"),
+    ("Question about the invoice amount", "billing", "low"),
+    ("The server returns error 500 when I upload", "technical", "critical"),
+    ("App crashes on startup after the update", "technical", "critical"),
+    ("Page is very slow to load and times out", "technical", "critical"),
+    ("Dashboard shows an error loading charts", "technical", "low"),
+]
+
+
+# Training tickets would otherwise answer classify as near-duplicates
+@override_settings(CLASSIFY_CACHE_BACKEND="none", CLASSIFY_LOCAL_MODE="fallback", SIMILARITY_CLASSIFY_THRESHOLD=0)
+class TicketLocalClassifierTest(APITestCase):
+    """Test the local fallback classifier and the LLM circuit breaker"""
+
+    def setUp(self):
+        self.stub = StubLLMServer(content='{"suggested_category": "account", "suggested_priority": "medium"}').__enter__()
+        self.addCleanup(self.stub.__exit__)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.model_path = os.path.join(tmp.name, "model.npz")
+        overrides = self.stub.settings(LLM_MAX_RETRIES=0, LOCAL_CLASSIFIER_PATH=self.model_path)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def train(self):
+        for i in range(3):
+            for description, category, priority in LOCAL_TRAINING_TICKETS:
+                Ticket.objects.create(title=f"T{i}", description=description, category=category, priority=priority)
+        call_command('train_local_classifier', holdout=0, stdout=StringIO())
+
+    def classify(self, description):
+        response = self.client.post('/api/tickets/classify/', {"description": description}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_trained_model_predicts_quickly(self):
+        """Test the trained model is saved, loaded lazily and answers in under a millisecond"""
+        self.assertIsNone(get_local_classifier())
+        self.train()
+        model = get_local_classifier()
+        self.assertTrue(os.path.exists(self.model_path))
+
+        result = model.predict("Refund my payment, I was charged twice")
+        self.assertEqual(result["suggested_category"], "billing")
+        self.assertEqual(result["suggested_priority"], "high")
+        self.assertEqual(model.predict("the server crashes with an error")["suggested_category"], "technical")
+
+        started = time.perf_counter()
+        for _ in range(1000):
+            model.predict("My invoice payment failed and the app crashes")
+        self.assertLess((time.perf_counter() - started) / 1000, 0.001)
+
+    def test_falls_back_when_llm_fails(self):
+        """Test an LLM failure is answered by the local model"""
+        self.train()
+        self.stub.failures = [503]
+        result = self.classify("I was charged twice on my invoice")
+        self.assertEqual(result["source"], "local")
+        self.assertEqual(result["suggested_category"], "billing")
+        self.assertNotIn("llm_error", result)
+
+    def test_without_model_errors_are_returned(self):
+        """Test the error response is unchanged when no model is trained"""
+        self.stub.failures = [503]
+        self.assertEqual(self.classify("I was charged twice")["llm_error"], "LLM service unavailable")
+
+    def test_tiered_mode_skips_llm_when_confident(self):
+        """Test confident local answers skip the LLM and unsure ones still use it"""
+        self.train()
+        with self.settings(CLASSIFY_LOCAL_MODE="tiered", LOCAL_CLASSIFIER_MIN_CONFIDENCE=0.6):
+            self.assertEqual(self.classify("charged twice on my invoice, refund the payment")["source"], "local")
+            self.assertEqual(self.stub.requests, [])
+
+            self.assertEqual(self.classify("hello")["suggested_category"], "account")
+            self.assertEqual(len(self.stub.requests), 1)
+
+    def test_breaker_opens_on_errors(self):
+        """Test the LLM is no longer called once too many calls failed"""
+        self.train()
+        self.stub.failures = [503] * 10
+        with self.settings(LLM_BREAKER_WINDOW=4, LLM_BREAKER_MIN_CALLS=4, LLM_BREAKER_ERROR_RATE=0.5):
+            for _ in range(6):
+                self.assertEqual(self.classify("App crashes on startup")["source"], "local")
+            self.assertEqual(len(self.stub.requests), 4)
+            self.assertEqual(get_circuit_breaker().state, "open")
+
+    def test_breaker_probes_after_cooldown(self):
+        """Test a single probe is let through after the cooldown and closes the breaker"""
+        with self.settings(LLM_BREAKER_WINDOW=2, LLM_BREAKER_MIN_CALLS=2, LLM_BREAKER_COOLDOWN=0):
+            breaker = get_circuit_breaker()
+            breaker.record(False)
+            breaker.record(False)
+            self.assertEqual(breaker.state, "half-open")
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())
+            breaker.record(True)
+            self.assertEqual(breaker.state, "closed")
+            self.assertTrue(breaker.allow())
+
+
+    def test_cancelled_probe_reports_back(self):
+        """Test a probe that ends without an answer or an LLM error re-opens the breaker instead of wedging it"""
+        with StubLLMServer(delay=0.5) as stub, stub.settings(
+            LLM_BREAKER_WINDOW=2, LLM_BREAKER_MIN_CALLS=2, LLM_BREAKER_COOLDOWN=0
+        ):
+            breaker = get_circuit_breaker()
+            breaker.record(False)
+            breaker.record(False)
+
+            async def cancel_probe():
+                probe = asyncio.ensure_future(complete("Probe"))
+                await asyncio.sleep(0.1)
+                probe.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await probe
+
+            asyncio.run(cancel_probe())
+            self.assertFalse(breaker.probing)
+            self.assertTrue(breaker.allow())
+
+class TicketBulkTest(APITestCase):
+    """Test the bulk create, update and delete endpoints"""
+
+    def snapshot(self):
+        return {
+            (row.day, row.category, row.priority, row.status): row.count
+            for row in TicketDailyRollup.objects.filter(count__gt=0)
+        }
+
+    def assertRollupConsistent(self):
+        incremental = self.snapshot()
+        call_command('rebuild_ticket_rollup', stdout=StringIO())
+        self.assertEqual(incremental, self.snapshot())
+
+    def item(self, i, **overrides):
+        return {"title": f"Imported {i}", "description": f"Issue {i}", "category": "billing", "priority": "low", **overrides}
+
+    def test_bulk_create_json_array(self):
+        """Test a JSON array is inserted in chunks and bad items are reported"""
+        items = [self.item(i) for i in range(25)]
+        items[7]["priority"] = "urgent"
+        del items[12]["title"]
+
+        with self.settings(TICKET_BULK_BATCH_SIZE=10), CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/tickets/bulk/', items, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["created"], 23)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [7, 12])
+        self.assertIn("priority", response.data["errors"][0]["errors"])
+        self.assertEqual(Ticket.objects.count(), 23)
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith('INSERT INTO "tickets_ticket"')]
+        self.assertEqual(len(inserts), 3)
+        self.assertRollupConsistent()
+
+    def test_bulk_create_ndjson(self):
+        """Test an NDJSON body is parsed line by line"""
+        lines = [json.dumps(self.item(i)) for i in range(3)] + ["not json", ""]
+        response = self.client.post(
+            '/api/tickets/bulk/', "\n".join(lines), content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual(response.data["errors"][0]["index"], 3)
+        self.assertEqual(list(Ticket.objects.order_by("id").values_list("id", flat=True)), response.data["ids"])
+
+    def test_bulk_create_rejects_non_list(self):
+        """Test a single object and an all-invalid batch are rejected"""
+        response = self.client.post('/api/tickets/bulk/', self.item(0), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/tickets/bulk/', [{"title": "x"}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_bulk_create_queues_classification(self):
+        """Test queue mode enqueues a job for items missing labels"""
+        items = [self.item(0), self.item(1, category=""), {"title": "bad"}, self.item(3, priority="")]
+        with self.settings(CLASSIFY_ON_CREATE="queue"):
+            response = self.client.post('/api/tickets/bulk/', items, format='json')
+        self.assertEqual(response.data["created"], 3)
+        jobs = {job.ticket_id: job.fields for job in ClassificationJob.objects.all()}
+        self.assertEqual(jobs, {response.data["ids"][1]: ["category"], response.data["ids"][2]: ["priority"]})
+
+    def test_bulk_update_by_filter(self):
+        """Test resolved tickets older than a cutoff are closed in one statement"""
+        old = [Ticket.objects.create(**self.item(i), status="resolved") for i in range(3)]
+        Ticket.objects.create(**self.item(3), status="resolved")
+        Ticket.objects.create(**self.item(4), status="open")
+        Ticket.objects.filter(pk__in=[t.pk for t in old]).update(created_at=timezone.now() - timedelta(days=40))
+        call_command('rebuild_ticket_rollup', stdout=StringIO())
+        cutoff = (timezone.now() - timedelta(days=30)).isoformat()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch('/api/tickets/bulk/', {
+                "filter": {"status": "resolved", "created_before": cutoff},
+                "set": {"status": "closed"},
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 3)
+        self.assertEqual(Ticket.objects.filter(status="closed").count(), 3)
+        self.assertEqual(sum('UPDATE "tickets_ticket" SET' in q["sql"] for q in queries.captured_queries), 1)
+        self.assertRollupConsistent()
+
+    def test_bulk_update_validation(self):
+        """Test bulk updates need a filter and settable, valid values"""
+        for payload in [
+            {"filter": {}, "set": {"status": "closed"}},
+            {"filter": {"status": "open"}, "set": {"title": "x"}},
+            {"filter": {"status": "open"}, "set": {"status": "done"}},
+            {"filter": {"status": "open"}, "set": {}},
+        ]:
+            with self.subTest(payload=payload):
+                response = self.client.patch('/api/tickets/bulk/', payload, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_delete_by_filter(self):
+        """Test matching tickets and their queued jobs are deleted together"""
+        doomed = [Ticket.objects.create(**self.item(i)) for i in range(3)]
+        kept = Ticket.objects.create(**self.item(3, category="technical"))
+        ClassificationJob.objects.create(ticket=doomed[0], fields=["priority"])
+
+        response = self.client.delete('/api/tickets/bulk/', {"filter": {"category": "billing"}}, format='json')
+        self.assertEqual(response.data["deleted"], 3)
+        self.assertEqual(list(Ticket.objects.values_list("id", flat=True)), [kept.id])
+        self.assertFalse(ClassificationJob.objects.exists())
+        self.assertRollupConsistent()
+
+        response = self.client.delete('/api/tickets/bulk/', {"filter": {}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TicketExportTest(APITestCase):
+    """Test the streaming NDJSON/CSV export"""
+
+    def setUp(self):
+        for i in range(7):
+            Ticket.objects.create(
+                title=f"Export {i}", description=f"Login issue {i}" if i % 2 else f"Refund {i}",
+                category="billing" if i < 4 else "technical", priority="low",
+            )
+
+    def export(self, query="", **headers):
+        response = self.client.get(f'/api/tickets/export/?{query}', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_ndjson_honours_filters_and_ordering(self):
+        """Test NDJSON rows follow the list filters and ordering"""
+        with self.settings(TICKET_EXPORT_CHUNK_SIZE=2):
+            response, body = self.export("category=billing&ordering=title")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual([row["title"] for row in rows], ["Export 0", "Export 1", "Export 2", "Export 3"])
+        listed = self.client.get('/api/tickets/?category=billing&ordering=title').json()["results"][0]
+        self.assertEqual(rows[0], listed)
+
+    def test_csv_with_search(self):
+        """Test CSV output has a header row and respects search"""
+        response, body = self.export("output=csv&search=login")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="tickets.csv"', response["Content-Disposition"])
+        rows = list(csv.reader(StringIO(body.decode())))
+        self.assertEqual(rows[0][:3], ["id", "title", "description"])
+        self.assertEqual(len(rows), 4)
+        self.assertTrue(all("Login" in row[2] for row in rows[1:]))
+
+    def test_gzip_when_accepted(self):
+        """Test the stream is gzipped on the fly for clients that accept it"""
+        response, body = self.export(**{"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(gzip.decompress(body).decode().splitlines()), 7)
+
+    def test_invalid_output(self):
+        """Test unknown output formats are rejected"""
+        response = self.client.get('/api/tickets/export/?output=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_asgi_streams_asynchronously(self):
+        """Test ASGI responses stream from an async iterator instead of being collected"""
+        response = await AsyncClient().get('/api/tickets/export/?output=csv')
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body.decode().splitlines()), 8)
+
+
+class TicketFastReadTest(APITestCase):
+    """Test the values()-based read path, sparse fieldsets and the JSON renderer"""
+
+    def setUp(self):
+        self.tickets = [
+            Ticket.objects.create(title=f"Read {i}", description=f"Body {i}", category="billing", priority="low")
+            for i in range(5)
+        ]
+
+    def test_list_matches_serializer(self):
+        """Test fast list pages are identical to the serializer output"""
+        fast = self.client.get('/api/tickets/?page_size=2&ordering=title').json()
+        with self.settings(TICKET_FAST_READ=False):
+            stock = self.client.get('/api/tickets/?page_size=2&ordering=title').json()
+        self.assertEqual(fast, stock)
+
+    def test_retrieve_matches_serializer(self):
+        """Test fast retrieve is identical to the serializer output"""
+        url = f'/api/tickets/{self.tickets[0].id}/'
+        fast = self.client.get(url).json()
+        with self.settings(TICKET_FAST_READ=False):
+            self.assertEqual(fast, self.client.get(url).json())
+        self.assertEqual(self.client.get('/api/tickets/999999/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_sparse_fieldset(self):
+        """Test ?fields= trims the SELECT and payload but keeps cursors working"""
+        with CaptureQueriesContext(connection) as queries:
+            page = self.client.get('/api/tickets/?fields=id,title&page_size=3').json()
+        self.assertEqual(set(page["results"][0]), {"id", "title"})
+        self.assertNotIn('"description"', queries.captured_queries[-1]["sql"])
+
+        rest = self.client.get(page["next"]).json()
+        self.assertEqual(len(page["results"]) + len(rest["results"]), 5)
+        self.assertEqual(
+            self.client.get(f'/api/tickets/{self.tickets[0].id}/?fields=status').json(), {"status": "open"}
+        )
+
+    def test_unknown_fields_rejected(self):
+        """Test unknown sparse fields are a 400"""
+        response = self.client.get('/api/tickets/?fields=id,search_vector')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", response.json())
+
+    def test_renderer_fallback(self):
+        """Test the renderer matches the stock encoder with and without orjson"""
+        data = {"title": "Caf\u00e9", "when": timezone.now(), "ids": [1, 2]}
+        fast = FastJSONRenderer().render(data)
+        original, renderers.orjson = renderers.orjson, None
+        try:
+            self.assertEqual(json.loads(FastJSONRenderer().render(data)), json.loads(fast))
+        finally:
+            renderers.orjson = original
+
+
+class TicketConditionalRequestTest(APITestCase):
+    """Test ETag/Last-Modified validators and 304 responses on reads"""
+
+    def setUp(self):
+        self.ticket = Ticket.objects.create(
+            title="Cached", description="Body", category="billing", priority="low"
+        )
+        self.detail = f'/api/tickets/{self.ticket.id}/'
+
+    def assertNotModified(self, url, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        # Only the validator lookup ran, never the page or stats query
+        self.assertEqual(len(queries), 1)
+        return response
+
+    def test_not_modified_on_matching_etag(self):
+        """Test list, detail and stats answer 304 to a current If-None-Match"""
+        for url in ['/api/tickets/', '/api/tickets/?page_size=1&ordering=title', self.detail, '/api/tickets/stats/']:
+            first = self.client.get(url)
+            self.assertEqual(first.status_code, status.HTTP_200_OK)
+            self.assertIn("no-cache", first["Cache-Control"])
+            response = self.assertNotModified(url, if_none_match=first["ETag"])
+            self.assertEqual(response["ETag"], first["ETag"])
+
+    def test_etag_depends_on_query(self):
+        """Test different query strings get different ETags"""
+        first = self.client.get('/api/tickets/?status=open')
+        second = self.client.get('/api/tickets/?status=closed', headers={"if-none-match": first["ETag"]})
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(first["ETag"], second["ETag"])
+
+    def test_if_modified_since(self):
+        """Test If-Modified-Since alone is honoured"""
+        for url in ['/api/tickets/', self.detail, '/api/tickets/stats/']:
+            first = self.client.get(url)
+            self.assertNotModified(url, if_modified_since=first["Last-Modified"])
+            stale = self.client.get(url, headers={"if-modified-since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+            self.assertEqual(stale.status_code, status.HTTP_200_OK)
+
+    def test_invalidated_by_create(self):
+        """Test creating a ticket changes the list and stats ETags"""
+        etags = {url: self.client.get(url)["ETag"] for url in ['/api/tickets/', '/api/tickets/stats/']}
+        self.client.post('/api/tickets/', {
+            "title": "New", "description": "Body", "category": "technical", "priority": "high",
+        }, format="json")
+        for url, etag in etags.items():
+            response = self.client.get(url, headers={"if-none-match": etag})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response["ETag"], etag)
+
+    def test_invalidated_by_update(self):
+        """Test PATCH and bulk updates change the list and detail ETags"""
+        list_etag = self.client.get('/api/tickets/')["ETag"]
+        detail_etag = self.client.get(self.detail)["ETag"]
+        self.client.patch(self.detail, {"title": "Renamed"}, format="json")
+
+        response = self.client.get(self.detail, headers={"if-none-match": detail_etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["title"], "Renamed")
+        response = self.client.get('/api/tickets/', headers={"if-none-match": list_etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        detail_etag = self.client.get(self.detail)["ETag"]
+        self.client.patch('/api/tickets/bulk/', {
+            "filter": {"ids": [self.ticket.id]}, "set": {"status": "closed"},
+        }, format="json")
+        response = self.client.get(self.detail, headers={"if-none-match": detail_etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["status"], "closed")
+
+    def test_invalidated_by_delete(self):
+        """Test deleting a ticket changes the list and stats ETags and 404s the detail"""
+        other = Ticket.objects.create(title="Other", description="Body", category="billing", priority="low")
+        etags = {url: self.client.get(url)["ETag"] for url in ['/api/tickets/', '/api/tickets/stats/']}
+        self.client.delete(f'/api/tickets/{other.id}/')
+        for url, etag in etags.items():
+            response = self.client.get(url, headers={"if-none-match": etag})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response["ETag"], etag)
+
+        detail_etag = self.client.get(self.detail)["ETag"]
+        self.ticket.delete()
+        response = self.client.get(self.detail, headers={"if-none-match": detail_etag})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_disabled(self):
+        """Test TICKET_CONDITIONAL_REQUESTS=False serves plain 200s"""
+        etag = self.client.get(self.detail)["ETag"]
+        with self.settings(TICKET_CONDITIONAL_REQUESTS=False):
+            response = self.client.get(self.detail, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", response)
+
+
+class TicketConditionalCommitTest(TransactionTestCase):
+    """Test list and stats validators follow commits made on other connections"""
+
+    def test_late_commit_changes_etag(self):
+        """Test a write that commits after an ETag was issued still changes it"""
+        urls = ['/api/tickets/', '/api/tickets/stats/']
+        Ticket.objects.create(title="Committed", description="Body", category="billing", priority="low")
+        written, release = threading.Event(), threading.Event()
+
+        def slow_writer():
+            with transaction.atomic():
+                Ticket.objects.create(title="Slow", description="Body", category="general", priority="low")
+                written.set()
+                release.wait(10)
+            connection.close()
+
+        thread = threading.Thread(target=slow_writer)
+        thread.start()
+        written.wait(10)
+        # Issued while the write is still uncommitted
+        responses = {url: self.client.get(url) for url in urls}
+        self.assertEqual(len(responses['/api/tickets/'].data["results"]), 1)
+        release.set()
+        thread.join()
+
+        for url, first in responses.items():
+            self.assertIn("Last-Modified", first)
+            response = self.client.get(url, headers={"if-none-match": first["ETag"]})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_tickets"], 2)
+
+    def test_versions_fold(self):
+        """Test folding closed connections' counters leaves the version alone"""
+        Ticket.objects.create(title="First", description="Body", category="general", priority="low")
+        etag = self.client.get('/api/tickets/')["ETag"]
+        # Another connection's write, made and gone
+        thread = threading.Thread(target=lambda: (
+            Ticket.objects.create(title="Second", description="Body", category="general", priority="low"),
+            connection.close(),
+        ))
+        thread.start()
+        thread.join()
+        self.assertNotEqual(self.client.get('/api/tickets/')["ETag"], etag)
+        etag = self.client.get('/api/tickets/')["ETag"]
+
+        out = StringIO()
+        call_command('compact_ticket_changes', stdout=out)
+        self.assertIn("Folded 1 ticket version counters", out.getvalue())
+        self.assertEqual(TicketVersion.objects.count(), 2)
+        response = self.client.get('/api/tickets/', headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@override_settings(TICKET_EVENTS_BATCH_WINDOW=0.05)
+class TicketEventStreamTest(TestCase):
+    """Test the SSE event hub: batching, fan-out, backpressure and signal feeds"""
+
+    def setUp(self):
+        self.hub = get_event_hub()
+
+    def parse(self, frames):
+        """Split raw SSE frames into (event, data) pairs"""
+        events = []
+        for block in b"".join(frames).decode().split("\n\n"):
+            fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+            if "event" in fields:
+                events.append((fields["event"], json.loads(fields["data"])))
+        return events
+
+    async def test_burst_is_batched(self):
+        """Test a burst of events reaches a client as one frame"""
+        client = self.hub.connect()
+        try:
+            await asyncio.to_thread(lambda: [
+                self.hub.publish({"type": "ticket.created", "ticket": {"id": i}}) for i in range(50)
+            ])
+            frame = await asyncio.wait_for(client.queue.get(), 2)
+            (name, events), = self.parse([frame])
+            self.assertEqual(name, "tickets")
+            self.assertEqual([event["ticket"]["id"] for event in events], list(range(50)))
+            self.assertTrue(client.queue.empty())
+        finally:
+            self.hub.disconnect(client)
+
+    async def test_fan_out_shares_one_frame(self):
+        """Test every client gets the same encoded frame with coalesced stats"""
+        clients = [self.hub.connect() for _ in range(200)]
+        try:
+            day = timezone.localdate()
+            await asyncio.to_thread(lambda: [
+                self.hub.publish(stats={(day, "billing", "low", "open"): 1}),
+                self.hub.publish(stats={(day, "billing", "low", "open"): -1, (day, "billing", "low", "closed"): 1}),
+                self.hub.publish(stats={(day, "technical", "high", "open"): 2}),
+            ])
+            frames = await asyncio.gather(*[asyncio.wait_for(client.queue.get(), 2) for client in clients])
+            self.assertTrue(all(frame is frames[0] for frame in frames))
+            self.assertEqual(self.parse(frames[:1]), [("stats", {
+                "total_tickets": 3,
+                "open_tickets": 2,
+                "priority_breakdown": {"low": 1, "high": 2},
+                "category_breakdown": {"billing": 1, "technical": 2},
+            })])
+        finally:
+            for client in clients:
+                self.hub.disconnect(client)
+        self.assertFalse(self.hub.listening)
+
+    @override_settings(TICKET_EVENTS_CLIENT_BUFFER=2)
+    async def test_slow_client_is_told_to_resync(self):
+        """Test a client that stops reading is bounded and gets a resync"""
+        client = self.hub.connect()
+        try:
+            for i in range(5):
+                self.hub.deliver(json.dumps({"tickets": [{"type": "ticket.updated", "ticket": {"id": i}}]}))
+            await asyncio.sleep(0.05)
+            self.assertLessEqual(client.queue.qsize(), 2)
+            self.assertGreater(client.dropped, 0)
+            frames = [client.queue.get_nowait() for _ in range(client.queue.qsize())]
+            self.assertIn(("resync", {}), self.parse(frames))
+        finally:
+            self.hub.disconnect(client)
+
+    def test_model_writes_are_published(self):
+        """Test creates, updates, deletes and bulk writes become events after commit"""
+        loop = asyncio.new_event_loop()
+
+        async def connect():
+            return self.hub.connect()
+
+        client = loop.run_until_complete(connect())
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                ticket = Ticket.objects.create(title="Live", description="Body", category="billing", priority="low")
+            with self.captureOnCommitCallbacks(execute=True):
+                ticket.status = "closed"
+                ticket.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch('/api/tickets/bulk/', {
+                    "filter": {"ids": [ticket.id]}, "set": {"priority": "high"},
+                }, content_type="application/json")
+            with self.captureOnCommitCallbacks(execute=True):
+                Ticket.objects.get(pk=ticket.pk).delete()
+            with self.captureOnCommitCallbacks(execute=False):
+                # Never committed, so never announced
+                Ticket.objects.create(title="Rolled back", description="Body", category="billing", priority="low")
+
+            self.hub.flush()
+            loop.run_until_complete(asyncio.sleep(0.1))
+            frames = [client.queue.get_nowait() for _ in range(client.queue.qsize())]
+        finally:
+            self.hub.disconnect(client)
+            loop.close()
+
+        events = self.parse(frames)
+        tickets = [event for name, batch in events if name == "tickets" for event in batch]
+        self.assertEqual(
+            [event["type"] for event in tickets],
+            ["ticket.created", "ticket.updated", "tickets.bulk", "ticket.deleted"],
+        )
+        self.assertEqual(tickets[0]["ticket"]["title"], "Live")
+        self.assertEqual(tickets[1]["ticket"]["status"], "closed")
+        self.assertEqual(tickets[2]["count"], 1)
+        self.assertEqual(tickets[3]["ticket"], {"id": tickets[0]["ticket"]["id"]})
+        # Created then deleted nets out of the stats deltas, however the
+        # writes fell into batch windows
+        self.assertEqual(sum(data["total_tickets"] for name, data in events if name == "stats"), 0)
+
+    def test_set_based_writes_are_published(self):
+        """Test claims, lease renewals and archiving log, announce and invalidate like model saves"""
+        ticket = Ticket.objects.create(title="Claimed", description="Body", category="billing", priority="low")
+        old = Ticket.objects.create(title="Old", description="Body", category="billing", priority="low", status="closed")
+        Ticket.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=800))
+        loop = asyncio.new_event_loop()
+
+        async def connect():
+            return self.hub.connect()
+
+        client = loop.run_until_complete(connect())
+        try:
+            version = read_version()
+            with self.captureOnCommitCallbacks(execute=True):
+                claim_tickets("a1")
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertIsNotNone(renew_lease(ticket.pk, "a1"))
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(archive_tickets(timezone.now() - timedelta(days=365)), 1)
+            self.assertNotEqual(read_version(), version)
+
+            self.hub.flush()
+            loop.run_until_complete(asyncio.sleep(0.1))
+            frames = [client.queue.get_nowait() for _ in range(client.queue.qsize())]
+        finally:
+            self.hub.disconnect(client)
+            loop.close()
+
+        tickets = [event for name, batch in self.parse(frames) if name == "tickets" for event in batch]
+        self.assertEqual([event["type"] for event in tickets], ["ticket.updated", "ticket.updated", "tickets.bulk"])
+        self.assertEqual(tickets[0]["ticket"]["status"], "in_progress")
+        self.assertEqual(tickets[2], {"type": "tickets.bulk", "action": "updated", "count": 1})
+        self.assertEqual(
+            list(TicketChange.objects.filter(kind="updated").order_by("id").values_list("ticket_id", flat=True)),
+            [ticket.pk, ticket.pk, old.pk],
+        )
+
+    async def test_stream_endpoint(self):
+        """Test the SSE endpoint sends ready, then published batches"""
+        response = await AsyncClient().get('/api/tickets/events/')
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(self.parse([await anext(chunks)]), [("ready", {})])
+
+        await asyncio.to_thread(self.hub.publish, {"type": "ticket.deleted", "ticket": {"id": 7}})
+        self.assertEqual(
+            self.parse([await asyncio.wait_for(anext(chunks), 2)]),
+            [("tickets", [{"type": "ticket.deleted", "ticket": {"id": 7}}])],
+        )
+
+        # A client disconnect cancels the response task, which must unregister it
+        reader = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0.01)
+        reader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reader
+        self.assertEqual(self.hub.client_count, 0)
+
+    def test_stream_requires_asgi(self):
+        """Test the endpoint refuses to stream under WSGI"""
+        self.assertEqual(self.client.get('/api/tickets/events/').status_code, 501)
+
+
+class TicketBenchmarkTest(TestCase):
+    """Test the bench_api harness: seeding, results file and regression gate"""
+
+    def setUp(self):
+        self.output = os.path.join(tempfile.mkdtemp(), "bench.json")
+
+    def bench(self, **options):
+        call_command(
+            'bench_api', rows=300, requests=5, warmup=1, output=self.output, stdout=StringIO(), **options
+        )
+        with open(self.output) as handle:
+            return json.load(handle)
+
+    def test_results_file(self):
+        """Test every scenario is measured without errors and the seed is rolled back"""
+        Ticket.objects.create(title="Existing", description="Body", category="billing", priority="low")
+        results = self.bench()
+
+        self.assertEqual(results["meta"]["rows"], 300)
+        self.assertEqual(set(results["scenarios"]), {
+            "list", "list_filtered", "search", "detail", "create", "stats", "classify",
+        })
+        for name, summary in results["scenarios"].items():
+            self.assertEqual(summary["errors"], 0, name)
+            self.assertEqual(summary["requests"], 5)
+            self.assertLessEqual(summary["p50_ms"], summary["p95_ms"])
+            self.assertLessEqual(summary["p95_ms"], summary["p99_ms"])
+        self.assertGreater(results["scenarios"]["list"]["queries_max"], 0)
+        self.assertEqual(list(Ticket.objects.values_list("title", flat=True)), ["Existing"])
+
+    def test_seed_is_skewed(self):
+        """Test seeded tickets follow the configured distribution"""
+        seed_tickets(2000, seed=1)
+        counts = dict(Ticket.objects.values_list("category").annotate(n=Count("id")))
+        self.assertGreater(counts["technical"], counts["billing"])
+        self.assertGreater(counts["billing"], counts["general"])
+        self.assertEqual(TicketDailyRollup.objects.aggregate(n=Sum("count"))["n"], 2000)
+        self.assertGreater(Ticket.objects.filter(created_at__lt=timezone.now() - timedelta(days=30)).count(), 0)
+
+    def test_regression_threshold(self):
+        """Test the command fails when a run is slower than the baseline"""
+        results = self.bench(scenarios=["detail"])
+        baseline = os.path.join(os.path.dirname(self.output), "baseline.json")
+
+        results["scenarios"]["detail"]["p95_ms"] *= 100
+        results["scenarios"]["detail"]["throughput_rps"] /= 100
+        with open(baseline, "w") as handle:
+            json.dump(results, handle)
+        self.bench(scenarios=["detail"], baseline=baseline, threshold=0.2)
+
+        results["scenarios"]["detail"]["p95_ms"] = 0.001
+        results["scenarios"]["detail"]["queries_max"] = 1
+        with open(baseline, "w") as handle:
+            json.dump(results, handle)
+        with self.assertRaisesRegex(CommandError, "detail: p95.*\n.*detail: queries 1 -> 2"):
+            self.bench(scenarios=["detail"], baseline=baseline, threshold=0.2)
+
+
+class TicketMetricsTest(APITestCase):
+    """Test the instrumentation middleware, LLM metrics and /api/metrics/"""
+
+    def setUp(self):
+        metrics.reset_metrics()
+        Ticket.objects.create(title="Measured", description="Body", category="billing", priority="low")
+
+    def test_request_metrics(self):
+        """Test wall time, SQL and serializer time are recorded per viewset action"""
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            self.client.get('/api/tickets/')
+        self.client.get('/api/tickets/stats/')
+
+        self.assertEqual(metrics.REQUEST_DURATION.count(view="TicketViewSet.list", method="GET"), 1)
+        self.assertEqual(metrics.REQUEST_DURATION.count(view="TicketViewSet.stats", method="GET"), 1)
+        self.assertEqual(metrics.DB_QUERIES._series[("TicketViewSet.list",)][1], len(queries))
+        self.assertGreater(metrics.SERIALIZER_DURATION._series[("TicketViewSet.list",)][1], 0)
+
+        body = self.client.get('/api/metrics/').content.decode()
+        self.assertIn('# TYPE tickets_http_request_duration_seconds histogram', body)
+        self.assertIn('tickets_http_requests_total{view="TicketViewSet.list",method="GET",status="200"} 1', body)
+        self.assertIn('tickets_db_queries_per_request_bucket{view="TicketViewSet.list",le="+Inf"} 1', body)
+
+    def test_llm_metrics(self):
+        """Test LLM latency and token usage are recorded against the calling view"""
+        with StubLLMServer() as stub, stub.settings(CLASSIFY_CACHE_BACKEND="none"):
+            self.client.post('/api/tickets/classify/', {"description": "Refund please"}, format="json")
+
+        self.assertEqual(metrics.LLM_DURATION.count(view="ticket-classify", outcome="ok"), 1)
+        self.assertEqual(metrics.LLM_TOKENS.value(view="ticket-classify", type="prompt"), 120)
+        self.assertEqual(metrics.LLM_TOKENS.value(view="ticket-classify", type="completion"), 20)
+
+    @override_settings(METRICS_SLOW_REQUEST_MS=1)
+    def test_slow_request_log(self):
+        """Test slow requests are logged with their SQL"""
+        with self.assertLogs("tickets.metrics", "WARNING") as logs:
+            self.client.get('/api/tickets/?search=measured')
+        self.assertIn("TicketViewSet.list", logs.output[0])
+        self.assertIn("SELECT", logs.output[0])
+
+    def test_disabled(self):
+        """Test METRICS_ENABLED=False drops the middleware and the endpoint"""
+        with self.settings(METRICS_ENABLED=False):
+            client = self.client_class()
+            client.get('/api/tickets/')
+            self.assertEqual(client.get('/api/metrics/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(metrics.REQUEST_DURATION.count(view="TicketViewSet.list", method="GET"), 0)
+
+
+@override_settings(TICKET_CONDITIONAL_REQUESTS=False, TICKET_RESPONSE_CACHE_BACKEND="memory")
+class TicketResponseCacheTest(APITestCase):
+    """Test the versioned ticket list/detail response cache"""
+
+    def setUp(self):
+        metrics.reset_metrics()
+        get_response_cache().clear()
+        self.ticket = Ticket.objects.create(title="Cached", description="Body", category="billing", priority="high")
+        Ticket.objects.create(title="Other", description="Body", category="technical", priority="low")
+
+    def titles(self, query=""):
+        return [ticket["title"] for ticket in self.client.get(f'/api/tickets/?{query}').data["results"]]
+
+    def test_repeat_reads_skip_the_database(self):
+        """Test a repeated list or detail read only looks up the version, whatever the parameter order"""
+        self.assertEqual(self.titles("status=open&priority=high"), ["Cached"])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.titles("priority=high&category=&status=open"), ["Cached"])
+        self.assertEqual(self.client.get(f'/api/tickets/{self.ticket.pk}/').data["title"], "Cached")
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/tickets/{self.ticket.pk}/', HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_response_cache().stats(), {"hits": 2, "misses": 2, "coalesced": 0, "hit_ratio": 0.5})
+        self.assertEqual(metrics.RESPONSE_CACHE_LOOKUPS.value(action="list", result="hit"), 1)
+
+    def test_writes_invalidate(self):
+        """Test creates, edits, bulk updates and deletes are visible on the next read"""
+        self.assertEqual(self.titles(), ["Other", "Cached"])
+        self.client.post('/api/tickets/', {"title": "New", "description": "Body", "category": "general", "priority": "low"}, format='json')
+        self.assertEqual(self.titles(), ["New", "Other", "Cached"])
+
+        self.client.get(f'/api/tickets/{self.ticket.pk}/')
+        self.client.patch(f'/api/tickets/{self.ticket.pk}/', {"title": "Renamed"}, format='json')
+        self.assertEqual(self.client.get(f'/api/tickets/{self.ticket.pk}/').data["title"], "Renamed")
+
+        self.assertEqual(self.titles("status=open"), ["New", "Other", "Renamed"])
+        self.client.patch('/api/tickets/bulk/', {"filter": {"ids": [self.ticket.pk]}, "set": {"status": "closed"}}, format='json')
+        self.assertEqual(self.titles("status=open"), ["New", "Other"])
+
+        self.client.delete(f'/api/tickets/{self.ticket.pk}/')
+        self.assertEqual(self.titles(), ["New", "Other"])
+
+    def test_errors_are_not_cached(self):
+        """Test only successful responses are stored"""
+        self.client.get('/api/tickets/999999/')
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get('/api/tickets/999999/').status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(TICKET_RESPONSE_CACHE_BACKEND="django")
+    def test_shared_backend(self):
+        """Test responses can live in a Django cache shared between processes"""
+        self.assertEqual(self.titles(), ["Other", "Cached"])
+        # A fresh process-local object still finds the entry in the shared cache
+        with override_settings(TICKET_RESPONSE_CACHE_TTL=settings.TICKET_RESPONSE_CACHE_TTL):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.titles(), ["Other", "Cached"])
+        Ticket.objects.filter(pk=self.ticket.pk).delete()
+        self.assertEqual(self.titles(), ["Other"])
+
+    def test_other_process_writes_invalidate(self):
+        """Test a write that never touched this process's cache still orphans its entries"""
+        self.assertEqual(self.titles(), ["Other", "Cached"])
+        # What another process's write leaves behind: rows and a version bump
+        Ticket.objects.filter(pk=self.ticket.pk).update(title="Renamed")
+        bump_version()
+        self.assertEqual(self.titles(), ["Other", "Renamed"])
+
+    def test_concurrent_misses_compute_once(self):
+        """Test simultaneous misses on one key wait for a single computation"""
+        response_cache = ResponseCache(LRUBackend(10, 60), wait_timeout=5)
+        calls = []
+        start = threading.Barrier(20)
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"value": 42}
+
+        results = []
+
+        def reader():
+            start.wait()
+            results.append(response_cache.get_or_compute("key", compute, "list"))
+
+        threads = [threading.Thread(target=reader) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"value": 42}] * 20)
+        self.assertEqual(response_cache.stats(), {"hits": 0, "misses": 1, "coalesced": 19, "hit_ratio": 0.95})
+        self.assertEqual(response_cache.get_or_compute("key", compute, "list"), {"value": 42})
+        self.assertEqual(len(calls), 1)
+
+
+class TicketClaimTest(APITestCase):
+    """Test agents claiming open tickets under leases"""
+
+    def setUp(self):
+        cache.clear()
+        self.low = Ticket.objects.create(title="Low", description="Body", category="billing", priority="low")
+        self.critical_old = Ticket.objects.create(title="Critical old", description="Body", category="technical", priority="critical")
+        self.high = Ticket.objects.create(title="High", description="Body", category="account", priority="high")
+        self.critical_new = Ticket.objects.create(title="Critical new", description="Body", category="billing", priority="critical")
+        Ticket.objects.create(title="Closed", description="Body", category="billing", priority="critical", status="closed")
+
+    def claim(self, agent="a1", **data):
+        return self.client.post('/api/tickets/claim/', {"agent": agent, **data}, format='json')
+
+    def test_claims_by_priority_then_age(self):
+        """Test claims hand out critical tickets first, oldest first, then move them to in_progress"""
+        response = self.claim(count=3, lease_seconds=60)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([ticket["title"] for ticket in response.data["results"]], ["Critical old", "Critical new", "High"])
+        for ticket in response.data["results"]:
+            self.assertEqual(ticket["status"], "in_progress")
+            self.assertEqual(ticket["claimed_by"], "a1")
+        self.critical_old.refresh_from_db()
+        self.assertEqual(self.critical_old.status, "in_progress")
+        self.assertAlmostEqual(
+            (self.critical_old.lease_expires_at - timezone.now()).total_seconds(), 60, delta=5
+        )
+        self.assertEqual(self.client.get('/api/tickets/stats/').data["open_tickets"], 1)
+
+        self.assertEqual([ticket["title"] for ticket in self.claim("a2", count=5).data["results"]], ["Low"])
+        self.assertEqual(self.claim("a3").data["results"], [])
+
+    def test_claim_by_category(self):
+        """Test an agent can restrict its claim to one category"""
+        response = self.claim(category="billing", count=5)
+        self.assertEqual([ticket["title"] for ticket in response.data["results"]], ["Critical new", "Low"])
+
+    def test_invalid_claims(self):
+        """Test claims need an agent and stay within the batch and lease limits"""
+        self.assertEqual(self.client.post('/api/tickets/claim/', {}, format='json').status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(TICKET_CLAIM_MAX_BATCH=2, TICKET_CLAIM_MAX_LEASE_SECONDS=60):
+            self.assertEqual(self.claim(count=3).status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(self.claim(lease_seconds=61).status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(self.claim(count=0).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Ticket.objects.filter(status="in_progress").count(), 0)
+
+    @override_settings(TICKET_CLAIM_SWEEP_SECONDS=0)
+    def test_expired_lease_returns_to_pool(self):
+        """Test a ticket whose lease ran out goes to the next agent"""
+        self.claim("a1")
+        Ticket.objects.filter(pk=self.critical_old.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.claim("a2")
+        self.assertEqual(response.data["results"][0]["id"], self.critical_old.pk)
+        self.assertEqual(response.data["results"][0]["claimed_by"], "a2")
+        self.assertEqual(self.client.get('/api/tickets/stats/').data["open_tickets"], 3)
+
+    def test_renew_and_release(self):
+        """Test only the holding agent can extend or hand back its lease"""
+        self.claim("a1", lease_seconds=60)
+        url = f'/api/tickets/{self.critical_old.pk}/lease/'
+        response = self.client.post(url, {"agent": "a1", "lease_seconds": 600}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.critical_old.refresh_from_db()
+        self.assertGreater(self.critical_old.lease_expires_at, timezone.now() + timedelta(seconds=500))
+        self.assertEqual(self.client.post(url, {"agent": "a2"}, format='json').status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.client.delete(url, {"agent": "a2"}, format='json').status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.delete(url, {"agent": "a1"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "open")
+        self.assertEqual(response.data["claimed_by"], "")
+        self.assertIsNone(response.data["lease_expires_at"])
+        self.assertEqual(self.client.post(url, {"agent": "a1"}, format='json').status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.claim("a2").data["results"][0]["id"], self.critical_old.pk)
+
+    def test_leaving_in_progress_ends_claim(self):
+        """Test resolving a claimed ticket, singly or in bulk, clears its claim"""
+        self.claim("a1", count=2)
+        response = self.client.patch(f'/api/tickets/{self.critical_old.pk}/', {"status": "resolved"}, format='json')
+        self.assertEqual(response.data["claimed_by"], "")
+        self.assertIsNone(response.data["lease_expires_at"])
+        self.client.patch('/api/tickets/bulk/', {"filter": {"ids": [self.critical_new.pk]}, "set": {"status": "closed"}}, format='json')
+        self.critical_new.refresh_from_db()
+        self.assertEqual((self.critical_new.claimed_by, self.critical_new.lease_expires_at), ("", None))
+        # Clients cannot claim by writing the fields themselves
+        self.client.patch(f'/api/tickets/{self.low.pk}/', {"claimed_by": "a2"}, format='json')
+        self.low.refresh_from_db()
+        self.assertEqual(self.low.claimed_by, "")
+
+
+class TicketClaimConcurrencyTest(TransactionTestCase):
+    """Test many agents claiming in parallel never share a ticket"""
+
+    AGENTS = 40
+    TICKETS = 400
+
+    def test_parallel_agents(self):
+        """Test dozens of agent threads drain the open pool without double claims"""
+        rng = random.Random(7)
+        bulk_create_tickets([
+            Ticket(title=f"T{i}", description="Body", category="technical", priority=rng.choice(["low", "medium", "high", "critical"]))
+            for i in range(self.TICKETS)
+        ])
+        claims = {}
+        failures = []
+        start = threading.Barrier(self.AGENTS)
+
+        def agent(name, batch):
+            claimed = claims[name] = []
+            try:
+                start.wait()
+                while tickets := claim_tickets(name, count=batch):
+                    claimed.extend(ticket.pk for ticket in tickets)
+            except Exception as exc:
+                failures.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=agent, args=(f"agent-{i}", i % 3 + 1)) for i in range(self.AGENTS)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(failures, [])
+        claimed = [ticket_id for ids in claims.values() for ticket_id in ids]
+        self.assertEqual(len(claimed), self.TICKETS)
+        self.assertEqual(len(set(claimed)), self.TICKETS)
+        holders = dict(Ticket.objects.filter(status="in_progress").values_list("id", "claimed_by"))
+        self.assertEqual(holders, {ticket_id: name for name, ids in claims.items() for ticket_id in ids})
+        self.assertGreater(sum(1 for ids in claims.values() if ids), 1)
+        # A generous floor so a slow or busy machine still passes
+        self.assertGreater(self.TICKETS / elapsed, 50, f"{self.TICKETS / elapsed:.0f} claims/s")
+        self.assertEqual(self.client.get('/api/tickets/stats/').data["open_tickets"], 0)
+        in_progress = TicketDailyRollup.objects.filter(status="in_progress").aggregate(total=Sum("count"))
+        self.assertEqual(in_progress["total"], self.TICKETS)
+
+
+class TicketPartitionTest(APITestCase):
+    """Test monthly ticket partitions, archival and include_archived"""
+
+    def setUp(self):
+        cache.clear()
+        long_ago = timezone.now() - timedelta(days=800)
+        self.old_closed = Ticket.objects.create(title="Old closed", description="Body", category="billing", priority="low", status="closed")
+        self.old_open = Ticket.objects.create(title="Old open", description="Body", category="billing", priority="low")
+        self.recent_closed = Ticket.objects.create(title="Recent closed", description="Body", category="technical", priority="high", status="closed")
+        Ticket.objects.filter(pk__in=[self.old_closed.pk, self.old_open.pk]).update(created_at=long_ago)
+        call_command('rebuild_ticket_rollup', stdout=StringIO())
+
+    def partition_of(self, ticket):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tableoid::regclass::text FROM tickets_ticket WHERE id = %s", [ticket.pk])
+            return cursor.fetchone()[0]
+
+    def titles(self, query=""):
+        return {ticket["title"] for ticket in self.client.get(f'/api/tickets/?{query}').data["results"]}
+
+    def test_rows_land_in_monthly_partitions(self):
+        """Test new tickets go to their month's partition and stray months are split out of the default one"""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT relkind FROM pg_class WHERE relname = 'tickets_ticket'")
+            self.assertEqual(cursor.fetchone()[0], "p")
+        self.assertEqual(self.partition_of(self.recent_closed), f"tickets_ticket_{timezone.now():%Y_%m}")
+        self.assertEqual(self.partition_of(self.old_open), "tickets_ticket_live_default")
+
+        out = StringIO()
+        call_command('partition_tickets', archive_after=0, stdout=out)
+        old_month = f"tickets_ticket_{self.old_open.created_at - timedelta(days=800):%Y_%m}"
+        self.assertIn(old_month, out.getvalue())
+        self.assertEqual(self.partition_of(self.old_open), old_month)
+        self.assertEqual(self.partition_of(self.old_closed), old_month)
+
+    def test_archive_and_include_archived(self):
+        """Test old closed tickets are archived, hidden by default and still counted in stats"""
+        stats = self.client.get('/api/tickets/stats/').data
+        out = StringIO()
+        call_command('partition_tickets', archive_after=365, stdout=out)
+        self.assertIn("Archived 1 tickets", out.getvalue())
+        self.assertEqual(self.partition_of(self.old_closed), "tickets_ticket_archive")
+        self.assertEqual(self.partition_of(self.recent_closed), f"tickets_ticket_{timezone.now():%Y_%m}")
+
+        self.assertEqual(self.titles(), {"Old open", "Recent closed"})
+        self.assertEqual(self.titles("include_archived=1"), {"Old closed", "Old open", "Recent closed"})
+        self.assertEqual(self.client.get(f'/api/tickets/{self.old_closed.pk}/').status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(f'/api/tickets/{self.old_closed.pk}/?include_archived=1')
+        self.assertTrue(response.data["archived"])
+
+        cache.clear()
+        self.assertEqual(self.client.get('/api/tickets/stats/').data, stats)
+        self.assertEqual(stats["total_tickets"], 3)
+
+    def test_reopening_unarchives(self):
+        """Test a reopened ticket moves back to the live partitions"""
+        old_month = f"tickets_ticket_{timezone.now() - timedelta(days=800):%Y_%m}"
+        call_command('partition_tickets', archive_after=365, stdout=StringIO())
+        response = self.client.patch(
+            '/api/tickets/bulk/?include_archived=1', {"filter": {"ids": [self.old_closed.pk]}, "set": {"status": "open"}}, format='json'
+        )
+        self.assertEqual(response.data, {"updated": 1})
+        self.assertEqual(self.partition_of(self.old_closed), old_month)
+        self.assertIn("Old closed", self.titles())
+
+        self.client.patch(f'/api/tickets/{self.old_closed.pk}/', {"status": "resolved"}, format='json')
+        call_command('partition_tickets', archive_after=365, stdout=StringIO())
+        self.assertEqual(self.partition_of(self.old_closed), "tickets_ticket_archive")
+        response = self.client.patch(f'/api/tickets/{self.old_closed.pk}/?include_archived=1', {"status": "open"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["archived"])
+        self.assertEqual(self.partition_of(self.old_closed), old_month)
+
+    def test_drop_empty_partitions(self):
+        """Test months emptied by archiving are dropped"""
+        self.old_open.delete()
+        out = StringIO()
+        call_command('partition_tickets', archive_after=365, drop_empty=True, stdout=out)
+        old_month = f"tickets_ticket_{timezone.now() - timedelta(days=800):%Y_%m}"
+        self.assertIn("Dropped 26 empty partitions", out.getvalue())
+        self.assertNotIn(old_month, month_partitions().values())
+        self.assertIn(timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0), month_partitions())
+        self.assertEqual(self.titles("include_archived=1"), {"Old closed", "Recent closed"})
+
+
+DUPLICATE_DESCRIPTION = "The mobile app crashes every time I open the settings page after the latest update"
+
+
+class TicketSimilarityTest(APITestCase):
+    """Test the near-duplicate index, the similar endpoints and label reuse in classify"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.index_path = os.path.join(tmp.name, "similarity.npz")
+        overrides = self.settings(SIMILARITY_INDEX_PATH=self.index_path, CLASSIFY_CACHE_BACKEND="none")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.original = Ticket.objects.create(
+            title="App crash", description=DUPLICATE_DESCRIPTION, category="technical", priority="high"
+        )
+        self.duplicate = Ticket.objects.create(
+            title="App crash",
+            description=DUPLICATE_DESCRIPTION.replace("every time", "whenever"),
+            category="technical",
+            priority="high",
+        )
+        self.unrelated = Ticket.objects.create(
+            title="Refund", description="Please refund the duplicate charge on my last invoice"
+        )
+
+    def similar_ids(self, ticket):
+        response = self.client.get(f'/api/tickets/{ticket.id}/similar/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [match["id"] for match in response.json()["results"]]
+
+    def test_build_and_lookup(self):
+        """Test the built index is saved, reloaded and finds near-duplicates but not the ticket itself"""
+        out = StringIO()
+        call_command('build_similarity_index', probes=3, stdout=out)
+        self.assertIn("Indexed 3 tickets", out.getvalue())
+        self.assertTrue(os.path.exists(self.index_path))
+        self.assertEqual(get_similarity_index().built_through, self.unrelated.id)
+
+        self.assertEqual(self.similar_ids(self.original), [self.duplicate.id])
+        self.assertEqual(self.similar_ids(self.unrelated), [])
+        match = self.client.get(f'/api/tickets/{self.original.id}/similar/').json()["results"][0]
+        self.assertEqual(match["category"], "technical")
+        self.assertGreater(match["similarity"], 0.7)
+
+    def test_index_follows_saves(self):
+        """Test saved, edited and deleted tickets update the index without a rebuild"""
+        call_command('build_similarity_index', probes=0, stdout=StringIO())
+        response = self.client.post(
+            '/api/tickets/similar/', {"title": "Refund", "description": "Please refund the duplicate charge"},
+            format='json'
+        )
+        self.assertEqual([match["id"] for match in response.json()["results"]], [self.unrelated.id])
+
+        later = Ticket.objects.create(title="App crash", description=DUPLICATE_DESCRIPTION + " again")
+        self.assertEqual(self.similar_ids(self.original), [later.id, self.duplicate.id])
+
+        later.description = "Totally different: how do I export my data to a spreadsheet"
+        later.save()
+        self.duplicate.delete()
+        self.assertEqual(self.similar_ids(self.original), [])
+
+    def test_only_new_text_is_reindexed(self):
+        """Test edits that leave the title and description alone skip the index"""
+        index = get_similarity_index()
+        added = []
+        add_many = index.add_many
+
+        def record(rows):
+            rows = list(rows)
+            added.extend(ticket_id for ticket_id, _, _ in rows)
+            add_many(rows)
+
+        index.add_many = record
+        self.addCleanup(vars(index).pop, "add_many")
+
+        self.client.patch(f'/api/tickets/{self.original.id}/', {"status": "resolved"}, format='json')
+        self.client.patch('/api/tickets/bulk/', {"filter": {"ids": [self.duplicate.id]}, "set": {"priority": "low"}}, format='json')
+        self.assertEqual(added, [])
+        self.client.patch(f'/api/tickets/{self.original.id}/', {"description": "Now about invoices"}, format='json')
+        self.assertEqual(added, [self.original.id])
+
+    def test_check_before_create(self):
+        """Test the pre-create check validates its input"""
+        response = self.client.post('/api/tickets/similar/', {"title": ""}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/tickets/similar/?limit=500', {"title": "App crash"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            '/api/tickets/similar/?limit=1', {"title": "App crash", "description": DUPLICATE_DESCRIPTION},
+            format='json'
+        )
+        self.assertEqual([match["id"] for match in response.json()["results"]], [self.original.id])
+        self.assertEqual(response.json()["results"][0]["similarity"], 1.0)
+
+    def classify(self):
+        return self.client.post('/api/tickets/classify/', {"description": DUPLICATE_DESCRIPTION}, format='json').json()
+
+    def test_classify_reuses_labels(self):
+        """Test classify answers a near-identical description from the existing ticket"""
+        with StubLLMServer() as stub, stub.settings(CLASSIFY_CACHE_BACKEND="none"):
+            result = self.classify()
+            self.assertEqual(result["source"], "similar")
+            self.assertEqual(result["suggested_category"], "technical")
+            self.assertEqual(result["suggested_priority"], "high")
+            self.assertIn(result["similar_ticket"], [self.original.id, self.duplicate.id])
+
+            with self.settings(SIMILARITY_CLASSIFY_THRESHOLD=0):
+                result = self.classify()
+            self.assertEqual(result["suggested_category"], "account")
+            self.assertEqual(len(stub.requests), 1)
+
+    def test_lookup_speed(self):
+        """Test an index lookup stays well under 10ms"""
+        rng = random.Random(0)
+        words = [f"word{i}" for i in range(2000)]
+        index = SimilarityIndex.build(
+            (i, "title", " ".join(rng.choices(words, k=30))) for i in range(1, 20001)
+        )
+        queries = [band_keys([shingles("title", " ".join(rng.choices(words, k=30)))])[0] for _ in range(200)]
+        started = time.perf_counter()
+        for keys in queries:
+            index.candidates(keys, 50)
+        self.assertLess((time.perf_counter() - started) / len(queries), 0.01)
+
+    def test_disabled(self):
+        """Test SIMILARITY_ENABLED=False turns the endpoints off"""
+        with self.settings(SIMILARITY_ENABLED=False):
+            response = self.client.get(f'/api/tickets/{self.original.id}/similar/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TicketSimilarityCatchUpTest(TransactionTestCase):
+    """Test lookups pick up tickets other processes saved after the build"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        overrides = self.settings(SIMILARITY_INDEX_PATH=os.path.join(tmp.name, "similarity.npz"))
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.original = Ticket.objects.create(title="App crash", description=DUPLICATE_DESCRIPTION)
+        call_command('build_similarity_index', probes=0, stdout=StringIO())
+
+    def elsewhere(self):
+        # With the index off this process never sees the writes, as if
+        # another worker had made them; the index reloads from the file after
+        return self.settings(SIMILARITY_ENABLED=False)
+
+    def similar_ids(self):
+        response = self.client.get(f'/api/tickets/{self.original.id}/similar/')
+        return [match["id"] for match in response.json()["results"]]
+
+    def test_other_process_writes_are_found(self):
+        """Test tickets created or edited elsewhere are caught up on from the change log"""
+        with self.elsewhere():
+            duplicate = Ticket.objects.create(title="App crash", description=DUPLICATE_DESCRIPTION.replace("every time", "whenever"))
+            edited = Ticket.objects.create(title="Export", description="How do I export my data to a spreadsheet")
+        self.assertEqual(self.similar_ids(), [duplicate.id])
+
+        with self.elsewhere():
+            edited.title, edited.description = "App crash", DUPLICATE_DESCRIPTION + " again"
+            edited.save()
+            duplicate.delete()
+        self.assertEqual(self.similar_ids(), [edited.id])
+
+    def test_compacted_log_reindexes_recent_edits(self):
+        """Test a change log compacted past the build falls back to the tickets updated since"""
+        with self.elsewhere():
+            duplicate = Ticket.objects.create(title="App crash", description=DUPLICATE_DESCRIPTION.replace("every time", "whenever"))
+        compact_changes(timezone.now() + timedelta(seconds=1))
+        self.assertEqual(self.similar_ids(), [duplicate.id])
+
+
+REPLICA = "replica_test"
+UNREACHABLE_REPLICA = "replica_unreachable"
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], DB_REPLICA_STICKY_SECONDS=5)
+class TicketReplicaRoutingTest(TransactionTestCase):
+    """Test read routing to a replica database and read-your-writes stickiness"""
+
+    @classmethod
+    def setUpClass(cls):
+        # A second real database stands in for the replica; nothing copies
+        # rows across, so every row shows which side a request read from
+        primary = connections["default"].settings_dict
+        settings.DATABASES[REPLICA] = {
+            **primary, "TEST": {**primary["TEST"], "NAME": f"{primary['NAME']}_replica"},
+        }
+        connections[REPLICA].creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        settings.DATABASES[UNREACHABLE_REPLICA] = {
+            **primary, "HOST": "/nonexistent", "TEST": {**primary["TEST"], "MIRROR": "default"},
+        }
+        # Declared here rather than on the class: the runner checks the
+        # class's aliases before these exist
+        cls.databases = {"default", REPLICA, UNREACHABLE_REPLICA}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].creation.destroy_test_db(verbosity=0)
+        for alias in (REPLICA, UNREACHABLE_REPLICA):
+            del connections[alias]
+            del settings.DATABASES[alias]
+
+    def setUp(self):
+        cache.clear()
+        db_router._down_until.clear()
+        self.primary = Ticket.objects.create(title="On primary", description="Body")
+        self.replica = Ticket.objects.using(REPLICA).create(title="On replica", description="Body")
+        TicketDailyRollup.objects.using(REPLICA).create(
+            day=timezone.localdate(), category="general", priority="low", status="open", count=7
+        )
+
+    def titles(self):
+        return [ticket["title"] for ticket in self.client.get('/api/tickets/').json()["results"]]
+
+    def test_reads_use_replica(self):
+        """Test list, detail, stats and export read from the replica"""
+        self.assertEqual(self.titles(), ["On replica"])
+        self.assertEqual(self.client.get(f'/api/tickets/{self.replica.id}/').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/tickets/stats/').json()["total_tickets"], 7)
+        export = b"".join(self.client.get('/api/tickets/export/').streaming_content)
+        self.assertEqual([json.loads(line)["title"] for line in export.splitlines()], ["On replica"])
+
+    def test_writes_stick_to_primary(self):
+        """Test writes go to the primary and the writer reads from it afterwards"""
+        response = self.client.post(
+            '/api/tickets/',
+            {"title": "Just filed", "description": "Body", "category": "general", "priority": "low"},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.cookies[db_router.STICKY_COOKIE]["max-age"], 5)
+        self.assertTrue(Ticket.objects.filter(title="Just filed").exists())
+        self.assertFalse(Ticket.objects.using(REPLICA).filter(title="Just filed").exists())
+
+        self.assertEqual(self.titles(), ["Just filed", "On primary"])
+        self.client.cookies.clear()
+        self.assertEqual(self.titles(), ["On replica"])
+
+    def test_sticky_cookie_round_trip_cross_origin(self):
+        """Test the frontend's origin may send credentials, so the cookie comes back on its next read"""
+        origin = settings.CORS_ALLOWED_ORIGINS[0]
+        preflight = self.client.options(
+            '/api/tickets/',
+            HTTP_ORIGIN=origin,
+            HTTP_ACCESS_CONTROL_REQUEST_METHOD="POST",
+            HTTP_ACCESS_CONTROL_REQUEST_HEADERS="content-type",
+        )
+        self.assertEqual(preflight["Access-Control-Allow-Origin"], origin)
+        self.assertEqual(preflight["Access-Control-Allow-Credentials"], "true")
+
+        response = self.client.post(
+            '/api/tickets/',
+            {"title": "Just filed", "description": "Body", "category": "general", "priority": "low"},
+            content_type='application/json',
+            HTTP_ORIGIN=origin,
+        )
+        self.assertEqual(response["Access-Control-Allow-Credentials"], "true")
+        cookie = response.cookies[db_router.STICKY_COOKIE]
+        self.assertEqual(cookie["samesite"], "Lax")
+
+        # What a browser's credentialed fetch sends back
+        self.client.cookies.clear()
+        self.client.cookies[db_router.STICKY_COOKIE] = cookie.value
+        response = self.client.get('/api/tickets/', HTTP_ORIGIN=origin)
+        self.assertEqual(response["Access-Control-Allow-Origin"], origin)
+        self.assertEqual(response["Access-Control-Allow-Credentials"], "true")
+        self.assertEqual([ticket["title"] for ticket in response.json()["results"]], ["Just filed", "On primary"])
+
+    def test_failed_write_does_not_stick(self):
+        """Test a rejected write leaves the client on the replica"""
+        response = self.client.post('/api/tickets/', {"title": ""}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn(db_router.STICKY_COOKIE, response.cookies)
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        """Test a replica that cannot connect is skipped until the retry delay passes"""
+        with self.settings(DATABASE_REPLICAS=[UNREACHABLE_REPLICA, REPLICA]):
+            db_router._down_until[REPLICA] = float("inf")
+            with self.assertLogs("tickets.db_router", "WARNING"):
+                self.assertEqual(self.titles(), ["On primary"])
+            self.assertIn(UNREACHABLE_REPLICA, db_router._down_until)
+
+            del db_router._down_until[REPLICA]
+            self.assertEqual(self.titles(), ["On replica"])
+
+    def test_without_replicas(self):
+        """Test everything stays on the primary and no cookie is set without replicas"""
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.titles(), ["On primary"])
+            response = self.client.post(
+                '/api/tickets/',
+                {"title": "Filed", "description": "Body", "category": "general", "priority": "low"},
+                content_type='application/json',
+            )
+        self.assertNotIn(db_router.STICKY_COOKIE, response.cookies)
+
+
+def stats_limit(**limit):
+    return override_settings(ADMISSION_LIMITS={"TicketViewSet.stats": limit})
+
+
+class TicketAdmissionControlTest(TransactionTestCase):
+    """Test rate limits, concurrency limits and priority lanes under overload"""
+
+    def get_stats(self, **extra):
+        return self.client.get('/api/tickets/stats/', **extra)
+
+    @stats_limit(rate=1, burst=2)
+    def test_rate_limit_per_client(self):
+        """Test a client over its token bucket gets 429 and Retry-After while others pass"""
+        shed = metrics.ADMISSION_REJECTIONS.value(view="TicketViewSet.stats", reason="rate_limited")
+        self.assertEqual(self.get_stats().status_code, 200)
+        self.assertEqual(self.get_stats().status_code, 200)
+        response = self.get_stats()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertEqual(response.json(), {"error": "Too many requests"})
+        self.assertEqual(self.get_stats(REMOTE_ADDR="10.0.0.2").status_code, 200)
+        self.assertEqual(
+            metrics.ADMISSION_REJECTIONS.value(view="TicketViewSet.stats", reason="rate_limited"), shed + 1
+        )
+
+    @override_settings(ADMISSION_CLIENT_HEADER="X-Forwarded-For")
+    @stats_limit(rate=1, burst=1)
+    def test_client_header(self):
+        """Test clients are told apart by ADMISSION_CLIENT_HEADER when it is set"""
+        self.assertEqual(self.get_stats(HTTP_X_FORWARDED_FOR="10.0.0.3, 10.0.0.1").status_code, 200)
+        self.assertEqual(self.get_stats(HTTP_X_FORWARDED_FOR="10.0.0.4").status_code, 200)
+        self.assertEqual(self.get_stats(HTTP_X_FORWARDED_FOR="10.0.0.3").status_code, 429)
+
+    @override_settings(ADMISSION_RETRY_AFTER=7)
+    @stats_limit(concurrency=1, queue=0)
+    def test_full_queue_sheds_with_503(self):
+        """Test a request finding every slot and queue place taken fails fast with 503"""
+        pool = get_admission_controller().pools["TicketViewSet.stats"]
+        self.assertTrue(pool.acquire())
+        response = self.get_stats()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Retry-After"], "7")
+        pool.release()
+        self.assertEqual(self.get_stats().status_code, 200)
+        self.assertEqual(get_admission_controller().shared.in_use, 0)
+
+    @stats_limit(concurrency=1, queue=1, timeout=5)
+    def test_queued_request_runs_once_a_slot_frees(self):
+        """Test a queued request waits for a slot instead of failing"""
+        pool = get_admission_controller().pools["TicketViewSet.stats"]
+        pool.acquire()
+        results = []
+
+        def request():
+            results.append(self.get_stats().status_code)
+            connection.close()
+
+        thread = threading.Thread(target=request)
+        thread.start()
+        time.sleep(0.2)
+        self.assertEqual(results, [])
+        pool.release()
+        thread.join()
+        self.assertEqual(results, [200])
+        self.assertEqual(pool.in_use, 0)
+
+    @stats_limit(concurrency=1, queue=1, timeout=0.2)
+    def test_queued_request_times_out(self):
+        """Test a request still queued after its timeout gets 503 and leaves the queue"""
+        pool = get_admission_controller().pools["TicketViewSet.stats"]
+        pool.acquire()
+        started = time.perf_counter()
+        self.assertEqual(self.get_stats().status_code, 503)
+        self.assertGreaterEqual(time.perf_counter() - started, 0.2)
+        pool.release()
+        self.assertEqual(pool.in_use, 0)
+        self.assertEqual(len(pool._queues[1]), 0)
+
+    def test_priority_lane(self):
+        """Test reserved slots only go to priority requests, which also jump the queue"""
+        pool = SlotPool(2, 4, reserved=1)
+        self.assertTrue(pool.acquire())
+        self.assertFalse(pool.acquire(timeout=0))
+        self.assertTrue(pool.acquire(priority=True))
+
+        order = []
+        threads = [
+            threading.Thread(target=lambda name=name, priority=priority: pool.acquire(priority, 5) and order.append(name))
+            for name, priority in (("read", False), ("write", True))
+        ]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        pool.release()
+        time.sleep(0.05)
+        self.assertEqual(order, ["write"])
+        # A normal request never takes the reserved slot
+        pool.release()
+        time.sleep(0.05)
+        self.assertEqual(order, ["write"])
+        pool.release()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, ["write", "read"])
+
+    def test_async_waiter(self):
+        """Test a coroutine queued for a slot is woken by a release from another thread"""
+        pool = SlotPool(1, 1)
+        pool.acquire()
+
+        async def wait():
+            releaser = threading.Timer(0.1, pool.release)
+            releaser.start()
+            return await pool.aacquire(timeout=5)
+
+        self.assertTrue(asyncio.run(wait()))
+        self.assertEqual(pool.in_use, 1)
+
+    def test_cancelled_waiter_gives_up_its_place(self):
+        """Test a queued coroutine cancelled by a client disconnect leaves no slot or queue entry behind"""
+        pool = SlotPool(1, 2)
+        pool.acquire()
+
+        async def cancel(grant_first):
+            waiter = asyncio.ensure_future(pool.aacquire(timeout=5))
+            await asyncio.sleep(0.01)
+            if grant_first:
+                # The slot is handed over, but the waiter is cancelled before it resumes
+                pool.release()
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+
+        asyncio.run(cancel(grant_first=False))
+        self.assertEqual((pool.in_use, len(pool._queues[1])), (1, 0))
+        asyncio.run(cancel(grant_first=True))
+        self.assertEqual((pool.in_use, len(pool._queues[1])), (0, 0))
+
+    @override_settings(ADMISSION_MAX_CONCURRENCY=1, ADMISSION_PRIORITY_RESERVED=0)
+    @stats_limit(concurrency=1, queue=1, timeout=5)
+    def test_cancelled_admission_releases_taken_pools(self):
+        """Test slots already taken are handed back when a later pool's wait is cancelled"""
+        controller = get_admission_controller()
+        controller.shared.acquire()
+
+        async def cancel():
+            admission = asyncio.ensure_future(controller.aadmit("TicketViewSet.stats", "client"))
+            await asyncio.sleep(0.01)
+            admission.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await admission
+
+        asyncio.run(cancel())
+        self.assertEqual(controller.pools["TicketViewSet.stats"].in_use, 0)
+        controller.shared.release()
+        self.assertEqual(controller.shared.in_use, 0)
+
+    @override_settings(ADMISSION_CONTROL=False)
+    @stats_limit(rate=1, burst=1)
+    def test_disabled(self):
+        """Test nothing is limited with ADMISSION_CONTROL off"""
+        for _ in range(3):
+            self.assertEqual(self.get_stats().status_code, 200)
+
+    @override_settings(
+        CLASSIFY_CACHE_BACKEND="none",
+        ADMISSION_MAX_CONCURRENCY=4,
+        ADMISSION_PRIORITY_RESERVED=1,
+        ADMISSION_LIMITS={"ticket-classify": {"concurrency": 8, "queue": 8, "timeout": 0.5}},
+    )
+    def test_overload_keeps_creates_fast(self):
+        """Test a flood of slow classify calls is shed while ticket creation stays fast"""
+        outcomes = []
+        stop = threading.Event()
+
+        with StubLLMServer(delay=0.3) as stub, stub.settings(LLM_TIMEOUT=5):
+            def flood(worker):
+                count = 0
+                while not stop.is_set():
+                    count += 1
+                    response = self.client.post(
+                        '/api/tickets/classify/',
+                        {"description": f"Flood {worker} request {count} cannot log in"},
+                        content_type='application/json',
+                    )
+                    outcomes.append(response.status_code)
+                    if response.status_code == 503:
+                        time.sleep(0.05)
+                connection.close()
+
+            threads = [threading.Thread(target=flood, args=(i,)) for i in range(24)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.3)
+
+            latencies = []
+            for i in range(15):
+                started = time.perf_counter()
+                response = self.client.post(
+                    '/api/tickets/',
+                    {"title": f"Urgent {i}", "description": "Down", "category": "technical", "priority": "critical"},
+                    content_type='application/json',
+                )
+                latencies.append(time.perf_counter() - started)
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.assertIn(200, outcomes)
+        self.assertIn(503, outcomes)
+        # Classify only ever holds the unreserved shared slots
+        self.assertLessEqual(stub.max_in_flight, 3)
+        # One stub round trip is 0.3s; a create queued behind the flood would wait far longer
+        self.assertLess(max(latencies), 0.25, f"max create latency {max(latencies):.3f}s")
+        self.assertEqual(Ticket.objects.count(), 15)
+        self.assertEqual(get_admission_controller().shared.in_use, 0)
+
+
+class TicketChangesTest(TransactionTestCase):
+    """Test the delta-sync change log and endpoint"""
+
+    def token(self):
+        return self.client.get('/api/tickets/changes/').data["next"]
+
+    def sync(self, token, **params):
+        return self.client.get('/api/tickets/changes/', {"since": token, **params})
+
+    def create(self, title, **fields):
+        response = self.client.post(
+            '/api/tickets/',
+            {"title": title, "description": "Body", "category": "general", "priority": "low", **fields},
+            content_type='application/json',
+        )
+        return response.data["id"]
+
+    def kinds(self, response):
+        return {change["id"]: change["kind"] for change in response.data["changes"]}
+
+    def test_sync_returns_changes_since_token(self):
+        """Test creates, edits and deletes since a token come back once, with current data"""
+        token = self.token()
+        kept = self.create("Kept")
+        dropped = self.create("Dropped")
+        self.client.patch(f'/api/tickets/{kept}/', {"status": "closed"}, content_type='application/json')
+        self.client.delete(f'/api/tickets/{dropped}/')
+
+        response = self.sync(token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["has_more"])
+        self.assertEqual(response.data["changes"][0]["kind"], "created")
+        self.assertEqual(response.data["changes"][0]["ticket"]["status"], "closed")
+        self.assertEqual(response.data["changes"][1], {"kind": "deleted", "id": dropped})
+
+        token = response.data["next"]
+        self.assertEqual(self.sync(token).data["changes"], [])
+        self.client.patch(f'/api/tickets/{kept}/', {"priority": "high"}, content_type='application/json')
+        response = self.sync(token, fields="id,priority")
+        self.assertEqual(response.data["changes"], [{"kind": "updated", "id": kept, "ticket": {"id": kept, "priority": "high"}}])
+
+    def test_every_write_path_is_logged(self):
+        """Test bulk writes, claims and archiving log one entry per ticket"""
+        token = self.token()
+        tickets = bulk_create_tickets([
+            Ticket(title=f"T{i}", description="Body", category="billing", priority="low") for i in range(4)
+        ])
+        ids = [ticket.pk for ticket in tickets]
+        self.assertEqual(self.kinds(self.sync(token)), dict.fromkeys(ids, "created"))
+
+        token = self.token()
+        bulk_update_tickets(Ticket.objects.filter(pk__in=ids[:2]), {"status": "closed"})
+        claim_tickets("agent-1", count=1)
+        bulk_delete_tickets(Ticket.objects.filter(pk=ids[3]))
+        Ticket.objects.filter(pk__in=ids[:2]).update(created_at=timezone.now() - timedelta(days=800))
+        archive_tickets(timezone.now() - timedelta(days=365))
+        response = self.sync(token)
+        self.assertEqual(self.kinds(response), {ids[0]: "updated", ids[1]: "updated", ids[2]: "updated", ids[3]: "deleted"})
+        tickets = {change["id"]: change.get("ticket") for change in response.data["changes"]}
+        self.assertTrue(tickets[ids[0]]["archived"])
+        self.assertEqual(tickets[ids[2]]["claimed_by"], "agent-1")
+
+    @override_settings(TICKET_CHANGES_PAGE_SIZE=3)
+    def test_pages(self):
+        """Test changes come in bounded pages that chain through the next token"""
+        token = self.token()
+        ids = [self.create(f"T{i}") for i in range(7)]
+        seen = []
+        pages = 0
+        while True:
+            response = self.sync(token)
+            pages += 1
+            seen.extend(change["id"] for change in response.data["changes"])
+            token = response.data["next"]
+            if not response.data["has_more"]:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, ids)
+
+    def test_running_transaction_holds_back_later_commits(self):
+        """Test a write committed after a still-running one waits, so the slow one is never skipped"""
+        token = self.token()
+        written, release = threading.Event(), threading.Event()
+        slow = []
+
+        def slow_writer():
+            with transaction.atomic():
+                slow.append(Ticket.objects.create(title="Slow", description="Body", category="general", priority="low").pk)
+                written.set()
+                release.wait(10)
+            connection.close()
+
+        thread = threading.Thread(target=slow_writer)
+        thread.start()
+        written.wait(10)
+        # Another rollup bucket, so the write does not queue behind the slow one's row lock
+        fast = self.create("Fast", category="billing", priority="high")
+        response = self.sync(token)
+        self.assertEqual(response.data["changes"], [])
+
+        release.set()
+        thread.join()
+        self.assertEqual(self.kinds(self.sync(response.data["next"])), {slow[0]: "created", fast: "created"})
+
+    def test_rolled_back_write_leaves_no_entry(self):
+        """Test change log entries commit or roll back with their ticket write"""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Ticket.objects.create(title="Gone", description="Body", category="general", priority="low")
+            raise RuntimeError
+        self.assertFalse(TicketChange.objects.exists())
+
+    def test_compaction(self):
+        """Test compacted entries make older tokens expire while newer ones keep syncing"""
+        stale = self.token()
+        self.create("Old")
+        fresh = self.token()
+
+        out = StringIO()
+        call_command('compact_ticket_changes', days=-1, stdout=out)
+        self.assertIn("Removed 1 change log entries", out.getvalue())
+        response = self.sync(stale)
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+        latest = self.create("New")
+        self.assertEqual(self.kinds(self.sync(fresh)), {latest: "created"})
+        call_command('compact_ticket_changes', days=-1, stdout=out)
+        self.assertEqual(list(TicketChange.objects.values_list("kind", flat=True)), ["compacted"])
+
+    def test_invalid_token(self):
+        """Test a malformed token is rejected"""
+        for token in ("abc", "1", "1.-2"):
+            self.assertEqual(self.sync(token).status_code, status.HTTP_400_BAD_REQUEST)
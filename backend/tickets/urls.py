@@ -1,7 +1,13 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import TicketViewSet
+from .views import TicketViewSet, classify, classify_batch, metrics, ticket_events
 
 router = DefaultRouter()
 router.register(r'tickets', TicketViewSet)
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = [
+    path('tickets/classify/', classify, name='ticket-classify'),
+    path('tickets/classify/batch/', classify_batch, name='ticket-classify-batch'),
+    path('tickets/events/', ticket_events, name='ticket-events'),
+    path('metrics/', metrics, name='metrics'),
+] + router.urls
\ No newline at end of file
@@ -1,134 +1,565 @@
-import os
-from groq import Groq
+import json
+from datetime import timedelta
+from itertools import islice
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Count, Avg
-from django.db.models.functions import TruncDate
-from .models import Ticket
-from .serializers import TicketSerializer
+from rest_framework.filters import OrderingFilter
+from rest_framework.parsers import JSONParser
 from django.conf import settings
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from django.utils.dateparse import parse_date
+from .bulk import bulk_delete_tickets, bulk_update_tickets
+from .changes import ChangesCompacted, current_position, format_token, parse_token, read_changes
+from .classifier import classify_batch as classify_batch_descriptions, classify_description
+from .conditional import response_etag, conditional, tickets_version
+from .db_router import STICKY_COOKIE, choose_replica, pin_to_primary, read_alias, read_from
+from .dispatch import claim_tickets, release_claim, renew_lease
+from .events import READY_FRAME, get_event_hub
+from .export import EXPORT_FORMATS, async_chunks, export_chunks, gzip_chunks
+from .filters import TicketSearchFilter
+from .metrics import render_metrics
+from .models import Ticket, TicketDailyRollup
+from .pagination import TicketCursorPagination
+from .parsers import NDJSONParser
+from .queue import PLACEHOLDERS, enqueue, queue_depth
+from .response_cache import cached_response
+from .serializers import (
+    TicketBulkFilterSerializer,
+    TicketBulkUpdateSerializer,
+    TicketClaimSerializer,
+    TicketLeaseSerializer,
+    TicketRowEncoder,
+    TicketSerializer,
+)
+from .similarity import find_similar
+from .stats import STATS_FILTER_FIELDS, compute_trends, get_stats
+
+
+MAX_TREND_DAYS = 3660
+
+# Actions that may read from a replica; everything else stays on the primary
+REPLICA_ACTIONS = ("list", "retrieve", "changes", "stats", "trends", "export", "similar", "check_similar")
+MAX_SIMILAR_RESULTS = 50
+
+
+def _list_validators(view, request, *args, **kwargs):
+    version, changed_at = tickets_version(request)
+    return response_etag(request, version), changed_at
+
+
+def _detail_validators(view, request, *args, **kwargs):
+    try:
+        updated_at = (
+            view.get_queryset().filter(pk=kwargs[view.lookup_field])
+            .values_list('updated_at', flat=True)
+            .first()
+        )
+    except (TypeError, ValueError):
+        updated_at = None
+    if updated_at is None:
+        # Unknown ticket: fall through so the view answers 404
+        return None, None
+    return response_etag(request, updated_at), updated_at
+
+
+def _stats_validators(view, request, *args, **kwargs):
+    version, changed_at = tickets_version(request)
+    return response_etag(request, version), changed_at
+
+
+def _similar_limit(request):
+    try:
+        limit = int(request.query_params.get("limit", 10))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_SIMILAR_RESULTS:
+        raise ValidationError({"limit": f"Must be between 1 and {MAX_SIMILAR_RESULTS}"})
+    return limit
+
+
+def _parse_day(value, default):
+    if not value:
+        return default
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(value)
+    return day
 
 
 class TicketViewSet(viewsets.ModelViewSet):
-    queryset = Ticket.objects.all().order_by('-created_at')
+    queryset = Ticket.objects.all().order_by('-created_at', '-id')
     serializer_class = TicketSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    pagination_class = TicketCursorPagination
+    filter_backends = [DjangoFilterBackend, TicketSearchFilter, OrderingFilter]
     filterset_fields = ['category', 'priority', 'status']
     search_fields = ['title', 'description']
 
-    @action(detail=False, methods=['get'], url_path='stats')
-    def stats(self, request):
-        total_tickets = Ticket.objects.count()
-        open_tickets = Ticket.objects.filter(status="open").count()
+    def get_queryset(self):
+        """
+        Archived tickets stay out of every action unless the request passes
+        ``?include_archived=1``.
+        """
+        return self._archive_scope(super().get_queryset())
+
+    def _archive_scope(self, queryset):
+        if self.request.query_params.get("include_archived") in ("1", "true"):
+            return queryset
+        return queryset.filter(archived=False)
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Route the read-only actions to a replica unless this client wrote
+        recently, and pin clients to the primary after a successful write.
+        """
+        action = self.action_map.get(request.method.lower())
+        alias = None
+        if action in REPLICA_ACTIONS and STICKY_COOKIE not in request.COOKIES:
+            alias = choose_replica()
+        with read_from(alias):
+            response = super().dispatch(request, *args, **kwargs)
+        wrote = action not in REPLICA_ACTIONS and request.method not in ("GET", "HEAD", "OPTIONS")
+        if wrote and response.status_code < 400:
+            pin_to_primary(response)
+        return response
+
+    @conditional(_list_validators)
+    @cached_response
+    def list(self, request, *args, **kwargs):
+        """
+        With ``TICKET_FAST_READ`` rows are fetched as ``values()`` dicts and
+        encoded by `TicketRowEncoder` instead of going through the serializer
+        per instance. ``?fields=`` trims both the SELECT and the payload.
+        """
+        if not settings.TICKET_FAST_READ:
+            return super().list(request, *args, **kwargs)
+
+        fields = self.get_read_fields(request)
+        encoder = TicketRowEncoder(fields)
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is None:
+            return Response(encoder.encode_many(queryset.values(*fields)))
+
+        # The cursor needs the ordering columns even when they are not returned
+        ordering = self.paginator.get_ordering(request, queryset, self)
+        select = fields + [term.lstrip('-') for term in ordering if term.lstrip('-') not in fields]
+        page = self.paginate_queryset(queryset.values(*select))
+        return self.get_paginated_response(encoder.encode_many(page))
+
+    @conditional(_detail_validators)
+    @cached_response
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.TICKET_FAST_READ:
+            return super().retrieve(request, *args, **kwargs)
+
+        fields = self.get_read_fields(request)
+        row = get_object_or_404(self.get_queryset().values(*fields), pk=kwargs[self.lookup_field])
+        return Response(TicketRowEncoder(fields).encode(row))
+
+    def get_read_fields(self, request):
+        available = list(self.get_serializer().fields)
+        requested = request.query_params.get("fields")
+        if not requested:
+            return available
+        fields = [field for field in dict.fromkeys(requested.split(",")) if field]
+        unknown = [field for field in fields if field not in available]
+        if unknown or not fields:
+            raise ValidationError({"fields": f"Choose from {', '.join(available)}"})
+        return fields
+
+    def create(self, request, *args, **kwargs):
+        if settings.CLASSIFY_ON_CREATE != "queue":
+            return super().create(request, *args, **kwargs)
+
+        # Let the classifier fill in whatever the client left out
+        data = request.data.copy()
+        missing = [field for field, placeholder in PLACEHOLDERS.items() if not data.get(field)]
+        for field in missing:
+            data[field] = PLACEHOLDERS[field]
+
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            self.perform_create(serializer)
+            if missing:
+                enqueue(serializer.instance, missing)
+
+        headers = self.get_success_headers(serializer.data)
+        body = {**serializer.data, "classification": "queued" if missing else "skipped"}
+        return Response(body, status=201, headers=headers)
+
+    @action(detail=False, methods=['post'], url_path='bulk', parser_classes=[JSONParser, NDJSONParser])
+    def bulk_create(self, request):
+        """
+        Create tickets from a JSON array or an NDJSON stream, inserting them
+        in chunks of ``TICKET_BULK_BATCH_SIZE``. Invalid items are reported by
+        position and do not stop the rest.
+        """
+        items = request.data
+        if isinstance(items, dict) or not hasattr(items, "__iter__"):
+            return Response({"error": "Expected a JSON array or NDJSON body"}, status=400)
+
+        items = iter(items)
+        ids, errors, offset = [], [], 0
+        while chunk := list(islice(items, settings.TICKET_BULK_BATCH_SIZE)):
+            if offset + len(chunk) > settings.TICKET_BULK_MAX_ITEMS:
+                errors.append({"index": offset, "errors": [f"At most {settings.TICKET_BULK_MAX_ITEMS} items per request"]})
+                break
+
+            queued_fields = {}
+            if settings.CLASSIFY_ON_CREATE == "queue":
+                chunk = [self._fill_placeholders(item, position, queued_fields) for position, item in enumerate(chunk)]
+
+            serializer = self.get_serializer(
+                data=chunk, many=True, context={**self.get_serializer_context(), "queued_fields": queued_fields}
+            )
+            serializer.is_valid(raise_exception=True)
+            if serializer.validated_data:
+                ids.extend(ticket.id for ticket in serializer.save())
+            errors.extend(
+                {"index": offset + index, "errors": detail}
+                for index, detail in serializer.item_errors.items()
+            )
+            offset += len(chunk)
+
+        status_code = 201 if not errors else 207 if ids else 400
+        return Response({"created": len(ids), "ids": ids, "errors": errors}, status=status_code)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        """
+        Set category, priority or status on every ticket matching ``filter``
+        with a single UPDATE.
+        """
+        serializer = TicketBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        queryset = self._bulk_queryset(serializer.validated_data["filter"])
+        return Response({"updated": bulk_update_tickets(queryset, serializer.validated_data["set"])})
+
+    @bulk_create.mapping.delete
+    def bulk_delete(self, request):
+        """
+        Delete every ticket matching ``filter`` in one statement.
+        """
+        serializer = TicketBulkFilterSerializer(data=request.data.get("filter") if isinstance(request.data, dict) else None)
+        serializer.is_valid(raise_exception=True)
+        return Response({"deleted": bulk_delete_tickets(self._bulk_queryset(serializer.validated_data))})
 
-        priority_data = (
-            Ticket.objects.values("priority")
-            .annotate(count=Count("id"))
+    def _fill_placeholders(self, item, position, queued_fields):
+        if not isinstance(item, dict):
+            return item
+        missing = [field for field in PLACEHOLDERS if not item.get(field)]
+        if missing:
+            queued_fields[position] = missing
+        return {**item, **{field: PLACEHOLDERS[field] for field in missing}}
+
+    def _bulk_queryset(self, filters):
+        lookups = {"ids": "id__in", "created_before": "created_at__lt", "created_after": "created_at__gte"}
+        return self._archive_scope(
+            Ticket.objects.filter(**{lookups.get(key, key): value for key, value in filters.items()})
         )
 
-        priority_breakdown = {
-            item["priority"]: item["count"]
-            for item in priority_data
+    @action(detail=False, methods=['post'], url_path='claim')
+    def claim(self, request):
+        """
+        Hand the calling ``agent`` the next ``count`` open tickets, critical
+        first and oldest first within a priority, moved to in_progress under
+        a lease of ``lease_seconds``. Returns an empty list when nothing is
+        open.
+        """
+        serializer = TicketClaimSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tickets = claim_tickets(**serializer.validated_data)
+        return Response({"results": TicketSerializer(tickets, many=True).data})
+
+    @action(detail=True, methods=['post', 'delete'])
+    def lease(self, request, pk=None):
+        """
+        POST extends the lease ``agent`` holds on this ticket; DELETE hands
+        the ticket back to the open pool. 409 once the agent no longer holds
+        it.
+        """
+        ticket = self.get_object()
+        serializer = TicketLeaseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        agent = serializer.validated_data["agent"]
+        if request.method == "DELETE":
+            ticket = release_claim(ticket.pk, agent)
+        elif renew_lease(ticket.pk, agent, serializer.validated_data.get("lease_seconds")):
+            ticket.refresh_from_db()
+        else:
+            ticket = None
+        if ticket is None:
+            return Response({"error": "Ticket is not claimed by this agent"}, status=409)
+        return Response(TicketSerializer(ticket).data)
+
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """
+        Delta sync: the tickets created, updated or deleted since the
+        ``?since=`` token, from at most ``TICKET_CHANGES_PAGE_SIZE`` log
+        entries, and the token to send next. Without ``since`` only the
+        current token comes back, to take before loading the full list. A
+        ticket changed several times within a page is sent once, as it is now.
+        """
+        since = request.query_params.get("since")
+        if not since:
+            return Response({"changes": [], "next": format_token(current_position()), "has_more": False})
+        try:
+            position = parse_token(since)
+        except ValueError:
+            raise ValidationError({"since": "Invalid sync token"})
+        try:
+            entries, next_position, has_more = read_changes(position, settings.TICKET_CHANGES_PAGE_SIZE)
+        except ChangesCompacted:
+            return Response({"error": "Sync token expired, reload the tickets"}, status=410)
+
+        kinds = {}
+        for _, ticket_id, kind in entries:
+            previous = kinds.pop(ticket_id, None)
+            kinds[ticket_id] = "created" if previous == "created" and kind == "updated" else kind
+        fields = self.get_read_fields(request)
+        encoder = TicketRowEncoder(fields)
+        rows = {
+            row["id"]: row
+            for row in Ticket.objects.filter(pk__in=[ticket_id for ticket_id, kind in kinds.items() if kind != "deleted"])
+            .values(*dict.fromkeys(["id", *fields]))
         }
+        changes = []
+        for ticket_id, kind in kinds.items():
+            if kind == "deleted":
+                changes.append({"kind": kind, "id": ticket_id})
+            elif ticket_id in rows:
+                changes.append({"kind": kind, "id": ticket_id, "ticket": encoder.encode(rows[ticket_id])})
+            # A missing row was deleted after this page; its own entry follows
+        return Response({"changes": changes, "next": format_token(next_position), "has_more": has_more})
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        """
+        Stream every ticket matching the list filters, search and ordering as
+        NDJSON (default) or CSV (``?output=csv``), gzipped when the client
+        accepts it.
+        """
+        export_format = request.query_params.get("output", "ndjson")
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": f"output must be one of {', '.join(EXPORT_FORMATS)}"}, status=400)
+
+        # Rows are streamed after dispatch has left the routed block
+        queryset = self.filter_queryset(self.get_queryset()).using(read_alias())
+        fields = list(self.get_serializer().fields)
+        chunks = export_chunks(queryset, fields, export_format, settings.TICKET_EXPORT_CHUNK_SIZE)
+
+        gzip = settings.TICKET_EXPORT_GZIP and "gzip" in request.headers.get("Accept-Encoding", "")
+        if gzip:
+            chunks = gzip_chunks(chunks)
+        if isinstance(request._request, ASGIRequest):
+            chunks = async_chunks(chunks)
+
+        response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[export_format])
+        response["Content-Disposition"] = f'attachment; filename="tickets.{export_format}"'
+        response["Vary"] = "Accept-Encoding"
+        if gzip:
+            response["Content-Encoding"] = "gzip"
+        return response
 
-        category_data = (
-            Ticket.objects.values("category")
-            .annotate(count=Count("id"))
+    @action(detail=False, methods=['get'], url_path='classify/queue')
+    def classification_queue(self, request):
+        return Response(queue_depth())
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """
+        Near-duplicates of this ticket, most similar first.
+        """
+        if not settings.SIMILARITY_ENABLED:
+            return Response({"error": "Similarity search is disabled"}, status=404)
+        ticket = get_object_or_404(self.get_queryset().values("id", "title", "description"), pk=pk)
+        matches = find_similar(
+            ticket["title"],
+            ticket["description"],
+            limit=_similar_limit(request),
+            exclude=ticket["id"],
+            queryset=self.get_queryset(),
         )
+        return Response({"results": matches})
 
-        category_breakdown = {
-            item["category"]: item["count"]
-            for item in category_data
-        }
+    @action(detail=False, methods=['post'], url_path='similar')
+    def check_similar(self, request):
+        """
+        Existing tickets resembling a ``title`` and ``description`` that are
+        about to be filed, so duplicates can be caught before creating.
+        """
+        if not settings.SIMILARITY_ENABLED:
+            return Response({"error": "Similarity search is disabled"}, status=404)
+        title = request.data.get("title") or ""
+        description = request.data.get("description") or ""
+        if not isinstance(title, str) or not isinstance(description, str) or not (title or description):
+            return Response({"error": "title or description is required"}, status=400)
+        matches = find_similar(title, description, limit=_similar_limit(request), queryset=self.get_queryset())
+        return Response({"results": matches})
 
-        daily_counts = (
-            Ticket.objects
-            .annotate(day=TruncDate("created_at"))
-            .values("day")
-            .annotate(count=Count("id"))
+    @action(detail=False, methods=['get'], url_path='stats')
+    @conditional(_stats_validators)
+    def stats(self, request):
+        queryset = DjangoFilterBackend().filter_queryset(
+            request, TicketDailyRollup.objects.all(), self
         )
+        return Response(get_stats(queryset, request.query_params, tickets_version(request)[0]))
 
-        avg_per_day = daily_counts.aggregate(avg=Avg("count"))["avg"] or 0
+    @action(detail=False, methods=['get'], url_path='trends')
+    def trends(self, request):
+        try:
+            end = _parse_day(request.query_params.get("end"), timezone.localdate())
+            start = _parse_day(request.query_params.get("start"), end - timedelta(days=29))
+        except ValueError:
+            return Response({"error": "start and end must be YYYY-MM-DD dates"}, status=400)
 
+        if start > end:
+            return Response({"error": "start must not be after end"}, status=400)
+        if (end - start).days >= MAX_TREND_DAYS:
+            return Response({"error": f"Date range is limited to {MAX_TREND_DAYS} days"}, status=400)
+
+        group_by = request.query_params.get("group_by") or None
+        if group_by and group_by not in STATS_FILTER_FIELDS:
+            return Response({"error": f"group_by must be one of {', '.join(STATS_FILTER_FIELDS)}"}, status=400)
+
+        queryset = DjangoFilterBackend().filter_queryset(
+            request, TicketDailyRollup.objects.all(), self
+        )
         return Response({
-            "total_tickets": total_tickets,
-            "open_tickets": open_tickets,
-            "avg_tickets_per_day": round(avg_per_day, 2),
-            "priority_breakdown": priority_breakdown,
-            "category_breakdown": category_breakdown,
+            "start": start,
+            "end": end,
+            "series": compute_trends(queryset, start, end, group_by),
         })
 
-    @action(detail=False, methods=['post'], url_path='classify')
-    def classify(self, request):
-        description = request.data.get("description")
 
-        if not description:
-            return Response({"error": "Description is required"}, status=400)
+def _json_body(request):
+    """
+    Return the request payload as a dict, or None when a JSON body is
+    malformed.
+    """
+    if request.content_type != "application/json":
+        return request.POST
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else {}
 
-        try:
-            client = Groq(api_key=settings.GROQ_API_KEY)
 
-            prompt = f"""
-            You are a support ticket classifier.
+@csrf_exempt
+@require_POST
+async def classify(request):
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
 
-            Return ONLY valid JSON:
-            {{
-                "suggested_category": "billing|technical|account|general",
-                "suggested_priority": "low|medium|high|critical"
-            }}
+    description = data.get("description")
 
-            Description:
-            {description}
-            """
+    if not description:
+        return JsonResponse({"error": "Description is required"}, status=400)
+
+    return JsonResponse(await classify_description(description))
+
+
+@csrf_exempt
+@require_POST
+async def classify_batch(request):
+    data = _json_body(request)
+    if data is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    descriptions = data.get("descriptions")
+    ticket_ids = data.get("ticket_ids")
+    if (descriptions is None) == (ticket_ids is None):
+        return JsonResponse({"error": "Provide either descriptions or ticket_ids"}, status=400)
+
+    items = descriptions if descriptions is not None else ticket_ids
+    if not isinstance(items, list) or not items:
+        return JsonResponse({"error": "Expected a non-empty list"}, status=400)
+    if len(items) > settings.LLM_BATCH_MAX_ITEMS:
+        return JsonResponse({"error": f"At most {settings.LLM_BATCH_MAX_ITEMS} items per batch"}, status=400)
+
+    if ticket_ids is not None:
+        if not all(isinstance(ticket_id, int) for ticket_id in ticket_ids):
+            return JsonResponse({"error": "ticket_ids must be integers"}, status=400)
+        found = {
+            ticket_id: description
+            async for ticket_id, description in Ticket.objects.filter(
+                id__in=ticket_ids
+            ).values_list("id", "description")
+        }
+        descriptions = [found.get(ticket_id, "") for ticket_id in ticket_ids]
+        errors = {i: "Ticket not found" for i, ticket_id in enumerate(ticket_ids) if ticket_id not in found}
+    else:
+        errors = {
+            i: "Description is required"
+            for i, description in enumerate(descriptions)
+            if not isinstance(description, str) or not description.strip()
+        }
+
+    to_classify = [i for i in range(len(items)) if i not in errors]
+    classified = await classify_batch_descriptions([descriptions[i] for i in to_classify])
+    results = dict(zip(to_classify, classified))
+
+    response = []
+    for i, item in enumerate(items):
+        result = results.get(i) or {"suggested_category": None, "suggested_priority": None, "error": errors[i]}
+        entry = {"index": i, **result}
+        if ticket_ids is not None:
+            entry["ticket_id"] = item
+        response.append(entry)
+
+    return JsonResponse({
+        "results": response,
+        "error_count": sum(1 for entry in response if "error" in entry),
+    })
+
+
+@require_GET
+async def ticket_events(request):
+    """
+    Server-Sent Events stream of ticket changes and stats deltas. Every
+    connection shares the same batched frames, so the cost of a change does
+    not grow with the number of open dashboards.
+    """
+    if not isinstance(request, ASGIRequest):
+        # A sync server would try to buffer the endless stream
+        return JsonResponse({"error": "Event streaming requires the ASGI server"}, status=501)
+
+    hub = get_event_hub()
+    client = hub.connect()
+
+    async def stream():
+        try:
+            yield READY_FRAME
+            async for frame in client.frames(settings.TICKET_EVENTS_HEARTBEAT):
+                yield frame
+        finally:
+            hub.disconnect(client)
+
+    return StreamingHttpResponse(
+        stream(),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-            response = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",  # very good model
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0
-            )
 
-            content = response.choices[0].message.content.strip()
-
-            if not content:
-                return Response({
-                    "suggested_category": None,
-                    "suggested_priority": None,
-                    "llm_error": "Empty response from LLM"
-                })
-
-            # Remove markdown code blocks if present
-            if content.startswith('```'):
-                lines = content.split('\n')
-                # Remove first line (``` or ```json) and last line (```)
-                if len(lines) > 2:
-                    content = '\n'.join(lines[1:-1]).strip()
-                else:
-                    content = content.replace('```', '').strip()
-
-            import json
-            try:
-                parsed = json.loads(content)
-            except json.JSONDecodeError as e:
-                print("JSON PARSE ERROR:", str(e), "Content:", content)
-                return Response({
-                    "suggested_category": None,
-                    "suggested_priority": None,
-                    "llm_error": "Invalid JSON response from LLM"
-                })
-
-            return Response({
-                "suggested_category": parsed.get("suggested_category"),
-                "suggested_priority": parsed.get("suggested_priority")
-            })
-
-        except Exception as e:
-            print("LLM ERROR:", str(e))
-
-            return Response({
-                "suggested_category": None,
-                "suggested_priority": None,
-                "llm_error": "LLM service unavailable"
-            })
\ No newline at end of file
+@require_GET
+def metrics(request):
+    """
+    This process's request, SQL, serializer and LLM histograms in the
+    Prometheus text format.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
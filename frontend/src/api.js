@@ -1,12 +1,34 @@
 const API_BASE = import.meta.env.VITE_API_BASE_URL || "http://localhost:8000/api";
 
+// Cookies go along with every call, so after a write the server's
+// `tickets_primary` cookie keeps this client reading from the primary
+function apiFetch(path, options = {}) {
+  return fetch(`${API_BASE}${path}`, { credentials: "include", ...options });
+}
+
 export async function getTickets(params = "") {
-  const res = await fetch(`${API_BASE}/tickets/${params}`);
+  const res = await apiFetch(`/tickets/${params}`);
+  return res.json();
+}
+
+// The page after one from `getTickets`, given that page's absolute `next` link
+export async function getTicketPage(next) {
+  const res = await fetch(next, { credentials: "include" });
+  return res.json();
+}
+
+// Tickets created, updated or deleted since the `since` token; without one
+// only the current token comes back, to take before a full load. Resolves to
+// null once the token has expired and the list has to be reloaded.
+export async function getTicketChanges(since = "") {
+  const query = since ? `?since=${encodeURIComponent(since)}` : "";
+  const res = await apiFetch(`/tickets/changes/${query}`);
+  if (res.status === 410) return null;
   return res.json();
 }
 
 export async function createTicket(data) {
-  const res = await fetch(`${API_BASE}/tickets/`, {
+  const res = await apiFetch("/tickets/", {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify(data),
@@ -15,7 +37,7 @@ export async function createTicket(data) {
 }
 
 export async function classifyDescription(description) {
-  const res = await fetch(`${API_BASE}/tickets/classify/`, {
+  const res = await apiFetch("/tickets/classify/", {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify({ description }),
@@ -23,13 +45,22 @@ export async function classifyDescription(description) {
   return res.json();
 }
 
+export async function findSimilarTickets(title, description) {
+  const res = await apiFetch("/tickets/similar/?limit=3", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ title, description }),
+  });
+  return res.ok ? res.json() : { results: [] };
+}
+
 export async function getStats() {
-  const res = await fetch(`${API_BASE}/tickets/stats/`);
+  const res = await apiFetch("/tickets/stats/");
   return res.json();
 }
 
 export async function updateTicket(id, data) {
-  const res = await fetch(`${API_BASE}/tickets/${id}/`, {
+  const res = await apiFetch(`/tickets/${id}/`, {
     method: "PATCH",
     headers: {
       "Content-Type": "application/json",
@@ -38,4 +69,32 @@ export async function updateTicket(id, data) {
   });
 
   return res.json();
-}
\ No newline at end of file
+}
+// Live ticket and stats changes pushed by the server. Handlers are keyed by
+// event name ("ready", "tickets", "stats", "resync"); every subscriber in the
+// tab shares one connection. Returns an unsubscribe function.
+const eventSubscribers = new Set();
+let eventSource = null;
+
+export function subscribeTicketEvents(handlers) {
+  if (typeof EventSource === "undefined") return () => {};
+
+  if (!eventSource) {
+    eventSource = new EventSource(`${API_BASE}/tickets/events/`);
+    for (const name of ["ready", "tickets", "stats", "resync"]) {
+      eventSource.addEventListener(name, (event) => {
+        const data = JSON.parse(event.data);
+        for (const subscriber of eventSubscribers) subscriber[name]?.(data);
+      });
+    }
+  }
+  eventSubscribers.add(handlers);
+
+  return () => {
+    eventSubscribers.delete(handlers);
+    if (!eventSubscribers.size) {
+      eventSource.close();
+      eventSource = null;
+    }
+  };
+}
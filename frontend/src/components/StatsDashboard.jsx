@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { getStats } from "../api";
+import { getStats, subscribeTicketEvents } from "../api";
 
 function StatsDashboard({ refresh }) {
   const [stats, setStats] = useState(null);
@@ -13,6 +13,17 @@ function StatsDashboard({ refresh }) {
     fetchStats();
   }, [refresh]);
 
+  useEffect(
+    () =>
+      subscribeTicketEvents({
+        stats: (delta) => setStats((current) => current && applyStatsDelta(current, delta)),
+        // (Re)connecting may have missed deltas, so start from a fresh copy
+        ready: fetchStats,
+        resync: fetchStats,
+      }),
+    []
+  );
+
   if (!stats) return <p>Loading stats...</p>;
 
   return (
@@ -33,6 +44,25 @@ function StatsDashboard({ refresh }) {
 );
 }
 
+function applyStatsDelta(stats, delta) {
+  const merge = (breakdown = {}, changes = {}) => {
+    const merged = { ...breakdown };
+    for (const [key, value] of Object.entries(changes)) {
+      merged[key] = (merged[key] || 0) + value;
+      if (!merged[key]) delete merged[key];
+    }
+    return merged;
+  };
+
+  return {
+    ...stats,
+    total_tickets: stats.total_tickets + (delta.total_tickets || 0),
+    open_tickets: stats.open_tickets + (delta.open_tickets || 0),
+    priority_breakdown: merge(stats.priority_breakdown, delta.priority_breakdown),
+    category_breakdown: merge(stats.category_breakdown, delta.category_breakdown),
+  };
+}
+
 function StatCard({ title, value }) {
   return (
     <div className="bg-white p-6 rounded-xl shadow">
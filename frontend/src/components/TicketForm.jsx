@@ -1,5 +1,5 @@
 import { useState } from "react";
-import { createTicket, classifyDescription } from "../api";
+import { createTicket, classifyDescription, findSimilarTickets } from "../api";
 
 function TicketForm({ onTicketCreated }) {
   const [title, setTitle] = useState("");
@@ -8,12 +8,17 @@ function TicketForm({ onTicketCreated }) {
   const [priority, setPriority] = useState("low");
   const [loading, setLoading] = useState(false);
   const [classifying, setClassifying] = useState(false);
+  const [similar, setSimilar] = useState([]);
 
   const handleClassify = async () => {
     if (!description.trim()) return;
 
     setClassifying(true);
-    const result = await classifyDescription(description);
+    const [result, matches] = await Promise.all([
+      classifyDescription(description),
+      findSimilarTickets(title, description),
+    ]);
+    setSimilar(matches.results || []);
 
     if (result.suggested_category) {
       setCategory(result.suggested_category);
@@ -44,6 +49,7 @@ function TicketForm({ onTicketCreated }) {
       setDescription("");
       setCategory("general");
       setPriority("low");
+      setSimilar([]);
 
       onTicketCreated();
     }
@@ -76,6 +82,19 @@ function TicketForm({ onTicketCreated }) {
 
       {classifying && <p>Getting suggestions...</p>}
 
+      {similar.length > 0 && (
+        <div className="border border-yellow-300 bg-yellow-50 rounded-lg p-3">
+          <p>This looks like an existing ticket:</p>
+          <ul>
+            {similar.map((ticket) => (
+              <li key={ticket.id}>
+                #{ticket.id} {ticket.title} ({ticket.status}, {Math.round(ticket.similarity * 100)}% similar)
+              </li>
+            ))}
+          </ul>
+        </div>
+      )}
+
       <br />
 
       <select value={category} onChange={(e) => setCategory(e.target.value)} className="w-full border rounded-lg p-2">
@@ -1,10 +1,30 @@
-import { useEffect, useState } from "react";
-import { getTickets, updateTicket } from "../api";
+import { useEffect, useRef, useState } from "react";
+import { getTicketChanges, getTicketPage, getTickets, subscribeTicketEvents, updateTicket } from "../api";
+
+const byNewest = (a, b) => new Date(b.created_at) - new Date(a.created_at) || b.id - a.id;
+
+// Merge delta-sync changes into the shown tickets: deleted, archived and no
+// longer matching tickets go, edited ones are replaced in place and new ones
+// slot in by creation time
+function applyChanges(tickets, changes, statusFilter) {
+  const shown = new Map(tickets.map((ticket) => [ticket.id, ticket]));
+  for (const { kind, id, ticket } of changes) {
+    if (!ticket || ticket.archived || (statusFilter && ticket.status !== statusFilter)) {
+      shown.delete(id);
+    } else if (shown.has(id) || kind === "created") {
+      shown.set(id, ticket);
+    }
+  }
+  return [...shown.values()].sort(byNewest);
+}
 
 function TicketList({ refresh }) {
   const [tickets, setTickets] = useState([]);
   const [search, setSearch] = useState("");
   const [statusFilter, setStatusFilter] = useState("");
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const syncToken = useRef(null);
 
   const fetchTickets = async () => {
     let query = "?";
@@ -12,17 +32,59 @@ function TicketList({ refresh }) {
     if (search) query += `search=${search}&`;
     if (statusFilter) query += `status=${statusFilter}&`;
 
+    // Taken before the load, so changes made during it are replayed
+    syncToken.current = (await getTicketChanges()).next;
     const data = await getTickets(query);
-    setTickets(data);
+    setTickets(data.results);
+    setNextPage(data.next);
+  };
+
+  // Append the next page; tickets already shown (e.g. synced in since the
+  // first page loaded) are skipped
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const data = await getTicketPage(nextPage);
+      setTickets((current) => {
+        const shown = new Set(current.map((ticket) => ticket.id));
+        return [...current, ...data.results.filter((ticket) => !shown.has(ticket.id))];
+      });
+      setNextPage(data.next);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Fetch only what changed since the last load; search results are ranked
+  // by the server, so those are reloaded instead
+  const syncTickets = async () => {
+    if (search || !syncToken.current) return fetchTickets();
+    let page;
+    do {
+      page = await getTicketChanges(syncToken.current);
+      if (!page) return fetchTickets();
+      syncToken.current = page.next;
+      const { changes } = page;
+      setTickets((current) => applyChanges(current, changes, statusFilter));
+    } while (page.has_more);
   };
 
   useEffect(() => {
     fetchTickets();
-  }, [refresh, search, statusFilter]);
+  }, [search, statusFilter]);
+
+  useEffect(() => {
+    if (syncToken.current) syncTickets();
+  }, [refresh]);
+
+  useEffect(
+    () => subscribeTicketEvents({ ready: fetchTickets, tickets: syncTickets, resync: fetchTickets }),
+    [search, statusFilter]
+  );
 
   const handleStatusChange = async (id, newStatus) => {
     await updateTicket(id, { status: newStatus });
-    fetchTickets();
+    syncTickets();
   };
 
   return (
@@ -93,6 +155,18 @@ function TicketList({ refresh }) {
             </div>
           ))}
         </div>
+
+        {nextPage && (
+          <div className="flex justify-center my-8">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="border border-gray-300 rounded-lg px-4 py-2 text-gray-700 hover:bg-gray-50 disabled:opacity-50"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -7,13 +7,29 @@ import TicketList from '../TicketList';
 const mockFetch = jest.fn();
 global.fetch = mockFetch;
 
+const API = 'http://localhost:8000/api';
+const page = (results, next = null) => ({ next, previous: null, results });
+
+// Answer the changes-token request the list makes before every load, POSTs
+// with the created ticket, absolute `next` links from `pages` and every other
+// list request with `tickets`
+function mockApi({ tickets = [], next = null, pages = {} } = {}) {
+  mockFetch.mockImplementation((url, options = {}) => {
+    let body;
+    if (url.startsWith(`${API}/tickets/changes/`)) body = { changes: [], next: 'token-1', has_more: false };
+    else if (options.method === 'POST') body = { id: 1 };
+    else body = pages[url] || page(tickets, next);
+    return Promise.resolve({ ok: true, status: 200, json: () => Promise.resolve(body) });
+  });
+}
+
 describe('TicketList Component', () => {
   beforeEach(() => {
-    mockFetch.mockClear();
+    mockFetch.mockReset();
   });
 
   test('renders ticket list with loading state', () => {
-    mockFetch.mockImplementationOnce(() => Promise.resolve({ ok: true, json: () => Promise.resolve([]) }));
+    mockApi();
     
     render(<TicketList />);
     
@@ -45,9 +61,7 @@ describe('TicketList Component', () => {
       }
     ];
 
-    mockFetch.mockImplementationOnce(() => 
-      Promise.resolve({ ok: true, json: () => Promise.resolve(mockTickets) })
-    );
+    mockApi({ tickets: mockTickets });
 
     render(<TicketList />);
 
@@ -73,9 +87,7 @@ describe('TicketList Component', () => {
     ];
 
     // Mock the search API call
-    mockFetch.mockImplementationOnce(() => 
-      Promise.resolve({ ok: true, json: () => Promise.resolve(mockTickets) })
-    );
+    mockApi({ tickets: mockTickets });
 
     render(<TicketList />);
 
@@ -91,9 +103,7 @@ describe('TicketList Component', () => {
   });
 
   test('filters tickets by category', async () => {
-    mockFetch.mockImplementationOnce(() => 
-      Promise.resolve({ ok: true, json: () => Promise.resolve([]) })
-    );
+    mockApi();
 
     render(<TicketList />);
 
@@ -109,9 +119,7 @@ describe('TicketList Component', () => {
   });
 
   test('filters tickets by status', async () => {
-    mockFetch.mockImplementationOnce(() => 
-      Promise.resolve({ ok: true, json: () => Promise.resolve([]) })
-    );
+    mockApi();
 
     render(<TicketList />);
 
@@ -126,6 +134,45 @@ describe('TicketList Component', () => {
     });
   });
 
+  test('takes a changes token before loading the list', async () => {
+    mockApi();
+
+    render(<TicketList />);
+
+    await waitFor(() => {
+      expect(mockFetch).toHaveBeenCalledTimes(2);
+    });
+    expect(mockFetch.mock.calls[0][0]).toBe(`${API}/tickets/changes/`);
+    expect(mockFetch.mock.calls[1][0]).toMatch(`${API}/tickets/?`);
+  });
+
+  test('loads the next page on demand', async () => {
+    const next = `${API}/tickets/?cursor=cD0y`;
+    const ticket = (id, title) => ({
+      id,
+      title,
+      description: `${title} details`,
+      category: 'general',
+      priority: 'low',
+      status: 'open',
+      created_at: `2026-02-${10 + id}T00:00:00Z`
+    });
+    mockApi({
+      tickets: [ticket(2, 'Newer Ticket')],
+      next,
+      pages: { [next]: page([ticket(2, 'Newer Ticket'), ticket(1, 'Older Ticket')]) }
+    });
+
+    render(<TicketList />);
+
+    fireEvent.click(await screen.findByText('Load more'));
+
+    expect(await screen.findByText('Older Ticket')).toBeInTheDocument();
+    expect(screen.getAllByText('Newer Ticket')).toHaveLength(1);
+    expect(mockFetch).toHaveBeenCalledWith(next, expect.objectContaining({ credentials: 'include' }));
+    expect(screen.queryByText('Load more')).not.toBeInTheDocument();
+  });
+
   test('displays error message when API fails', async () => {
     mockFetch.mockImplementationOnce(() => 
       Promise.reject(new Error('Network error'))
@@ -139,7 +186,7 @@ describe('TicketList Component', () => {
   });
 
   test('opens new ticket modal when button is clicked', () => {
-    mockFetch.mockImplementationOnce(() => Promise.resolve({ ok: true, json: () => Promise.resolve([]) }));
+    mockApi();
     
     render(<TicketList />);
     
@@ -150,9 +197,7 @@ describe('TicketList Component', () => {
   });
 
   test('submits new ticket form', async () => {
-    mockFetch
-      .mockImplementationOnce(() => Promise.resolve({ ok: true, json: () => Promise.resolve([]) }))
-      .mockImplementationOnce(() => Promise.resolve({ ok: true, json: () => Promise.resolve({ id: 1 }) }));
+    mockApi();
 
     render(<TicketList />);
     